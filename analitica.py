@@ -0,0 +1,167 @@
+from collections import Counter, namedtuple
+import heapq
+
+# ============================================
+# ESTADÍSTICAS AGREGADAS
+# ============================================
+
+# Cuántas carreras se conservan por escolaridad
+TOP_CARRERAS = 10
+
+# Resumen compacto (solo tuplas y diccionarios pequeños) que se calcula al
+# cargar la hoja; las vistas lo leen sin recorrer el DataFrame
+Estadisticas = namedtuple('Estadisticas', [
+    'total_usuarios',           # int: usuarios con resultado vigente
+    'total_envios',             # int: filas de la hoja (incluye envíos repetidos)
+    'carreras_por_escolaridad', # ((escolaridad, ((carrera, n), ...)), ...)
+    'generos',                  # (genero, ...): columnas de areas_por_genero
+    'areas_por_genero',         # ((area, (n por género...)), ...)
+    'envios_por_dia',           # ((date, n), ...) en orden cronológico
+])
+
+ESTADISTICAS_VACIAS = Estadisticas(0, 0, (), (), (), ())
+
+# Conteos completos (sin recortar) de los que se derivan las Estadisticas.
+# Se guardan en el snapshot para que anexar filas solo cuente las filas
+# afectadas: se suman las que pasan a ser vigentes y se restan las que
+# dejan de serlo
+Conteos = namedtuple('Conteos', [
+    'usuarios',     # int: usuarios con resultado vigente
+    'envios',       # int: filas de la hoja
+    'carreras',     # dict escolaridad -> Counter(carrera)
+    'areas',        # Counter((area, genero))
+    'dias',         # Counter(date)
+])
+
+CONTEOS_VACIOS = Conteos(0, 0, {}, Counter(), Counter())
+
+def _carreras(valor):
+    """Separa una celda A1-A4 en carreras (una por línea)"""
+    return [item.strip() for item in str(valor).split('\n') if item.strip()]
+
+def _carreras_por_escolaridad(vigentes):
+    if 'Escolaridad' not in vigentes.columns:
+        return {}
+    conteos = {}
+    for columna in ('A1', 'A2', 'A3', 'A4'):
+        if columna not in vigentes.columns:
+            continue
+        # Agrupado vectorizado; el bucle solo recorre combinaciones distintas
+        tabla = vigentes.groupby(['Escolaridad', columna], observed=True, dropna=True).size()
+        for (escolaridad, valor), n in tabla.items():
+            conteo = conteos.setdefault(str(escolaridad), Counter())
+            for carrera in _carreras(valor):
+                conteo[carrera] += int(n)
+    return conteos
+
+def _areas_por_genero(vigentes):
+    if 'Areas' not in vigentes.columns or 'Genero' not in vigentes.columns:
+        return Counter()
+    # groupby sobre categóricas: no convierte cada celda a texto como crosstab
+    tabla = vigentes.groupby(['Areas', 'Genero'], observed=True).size()
+    return Counter({(str(area), str(genero)): int(n) for (area, genero), n in tabla.items() if n})
+
+def _envios_por_dia(df):
+    import pandas as pd
+    if 'Fecha' not in df.columns:
+        return Counter()
+    # Se cuentan los textos del día y solo se parsean los valores distintos
+    dias = pd.Series([str(fecha).strip().split(' ', 1)[0] for fecha in df['Fecha']]).value_counts()
+    fechas = pd.to_datetime(dias.index.to_series(), errors='coerce', dayfirst=True, format='mixed')
+    validas = fechas.notna().to_numpy()
+    por_dia = pd.Series(dias.to_numpy()[validas], index=fechas[validas].dt.date)
+    por_dia = por_dia.groupby(level=0).sum()
+    return Counter({dia: int(n) for dia, n in por_dia.items()})
+
+def contar(df, indice):
+    """
+    Cuenta desde cero una carga de la hoja
+
+    Args:
+        df: DataFrame de resultados
+        indice: dict email_normalized -> fila vigente
+
+    Returns:
+        Conteos: Conteos completos de la carga
+    """
+    if df is None or df.empty:
+        return CONTEOS_VACIOS
+    vigentes = df.loc[list(indice.values())]
+    return Conteos(
+        usuarios=len(vigentes),
+        envios=len(df),
+        carreras=_carreras_por_escolaridad(vigentes),
+        areas=_areas_por_genero(vigentes),
+        dias=_envios_por_dia(df),
+    )
+
+def actualizar(conteos, df, retiradas, agregadas, desde):
+    """
+    Actualiza los conteos tras anexar filas, recorriendo solo las afectadas
+
+    Args:
+        conteos: Conteos de la carga anterior
+        df: DataFrame de resultados con las filas nuevas ya anexadas
+        retiradas: Filas que eran vigentes y dejaron de serlo
+        agregadas: Filas que pasaron a ser vigentes
+        desde: Posición de la primera fila nueva
+
+    Returns:
+        Conteos: Los mismos conteos que contar() sobre la carga completa
+    """
+    antes, despues = df.loc[list(retiradas)], df.loc[list(agregadas)]
+    restar, sumar = _carreras_por_escolaridad(antes), _carreras_por_escolaridad(despues)
+    carreras = {}
+    for escolaridad in set(conteos.carreras) | set(sumar):
+        conteo = conteos.carreras.get(escolaridad, Counter()) + sumar.get(escolaridad, Counter())
+        # La resta de Counter descarta las carreras que quedan en cero
+        carreras[escolaridad] = conteo - restar.get(escolaridad, Counter())
+    return Conteos(
+        usuarios=conteos.usuarios + len(despues) - len(antes),
+        envios=len(df),
+        carreras=carreras,
+        areas=conteos.areas + _areas_por_genero(despues) - _areas_por_genero(antes),
+        dias=conteos.dias + _envios_por_dia(df.iloc[desde:]),
+    )
+
+def resumir(conteos):
+    """
+    Deriva de los conteos el resumen que muestran las vistas
+
+    Args:
+        conteos: Conteos de una carga
+
+    Returns:
+        Estadisticas: Resumen listo para mostrarse
+    """
+    # Empates por nombre: el orden no depende de cómo se llegó a los conteos
+    carreras = tuple(
+        (escolaridad, tuple(heapq.nsmallest(TOP_CARRERAS, conteo.items(), key=lambda par: (-par[1], par[0]))))
+        for escolaridad, conteo in sorted(conteos.carreras.items()) if conteo
+    )
+    generos = tuple(sorted({genero for _, genero in conteos.areas}))
+    areas = tuple(
+        (area, tuple(conteos.areas[(area, genero)] for genero in generos))
+        for area in sorted({area for area, _ in conteos.areas})
+    )
+    return Estadisticas(
+        total_usuarios=conteos.usuarios,
+        total_envios=conteos.envios,
+        carreras_por_escolaridad=carreras,
+        generos=generos,
+        areas_por_genero=areas,
+        envios_por_dia=tuple(sorted(conteos.dias.items())),
+    )
+
+def calcular_estadisticas(df, indice):
+    """
+    Calcula las estadísticas agregadas de una carga de la hoja
+
+    Args:
+        df: DataFrame de resultados
+        indice: dict email_normalized -> fila vigente
+
+    Returns:
+        Estadisticas: Resumen listo para mostrarse
+    """
+    return resumir(contar(df, indice))
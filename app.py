@@ -1,13 +1,229 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, make_response, abort, Response, stream_with_context, g, before_render_template, template_rendered
 from auth import AuthManager
+from render_cache import RenderCache
+from rate_limit import RateLimiter, MemoryBackend, SQLiteBackend
+from werkzeug.utils import secure_filename
+from datetime import datetime, timedelta, timezone
+import assets
+import exportacion
+import metricas
+import reportes
+import snapshot_cache
+import time
 import sheets
 import secrets
+import threading
+import hashlib
+import hmac
+import gzip
+import os
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)  # Clave secreta para sesiones
+# Clave con la que se firman las cookies de sesión. Debe ser la misma en
+# todos los workers y sobrevivir a los reinicios: en producción es
+# obligatoria (gunicorn.conf.py no arranca sin ella)
+SECRET_KEY = os.getenv('SECRET_KEY', '')
+if SECRET_KEY:
+    app.secret_key = SECRET_KEY
+else:
+    # Solo para desarrollo con un único proceso: las sesiones se pierden al reiniciar
+    print("⚠️ SECRET_KEY no definida; se usa una clave aleatoria solo válida para este proceso")
+    app.secret_key = secrets.token_hex(32)
 
-# Inicializa el gestor de autenticación
-auth_manager = AuthManager()
+def contar_proxies():
+    """
+    Número de proxies delante de la app (PROXY_COUNT). Sin definirlo se
+    asume el balanceador de Render cuando se corre allí (variable RENDER)
+    
+    Returns:
+        int: Saltos de X-Forwarded-For que se confían
+    """
+    valor = os.getenv('PROXY_COUNT')
+    if valor is None:
+        return 1 if os.getenv('RENDER') else 0
+    proxies = int(valor)
+    if proxies == 0 and os.getenv('RENDER'):
+        print("⚠️ PROXY_COUNT=0 detrás del balanceador de Render: todos los clientes "
+              "comparten su IP y el límite de login por IP pasa a ser global")
+    return proxies
+
+# Número de proxies (p. ej. el balanceador de Render) delante de la app: la IP
+# del cliente se toma de X-Forwarded-For solo si hay proxies
+PROXY_COUNT = contar_proxies()
+if PROXY_COUNT > 0:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_COUNT)
+
+# Dashboards ya renderizados, por (email, versión de los datos)
+dashboard_cache = RenderCache(max_entries=int(os.getenv('DASHBOARD_CACHE_SIZE', '1000')))
+
+# Páginas de error y sin resultados: solo dependen de la plantilla y de sus argumentos
+paginas_cache = RenderCache(max_entries=1000)
+
+# Los archivos versionados (styles.<hash>.css) nunca cambian de contenido
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# Emails (separados por comas) con acceso a las rutas de administración
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()}
+
+# Días (con envíos) que se muestran en /admin/analytics
+DIAS_ANALITICA = int(os.getenv('ANALYTICS_DAYS', '30'))
+
+# Límite de intentos de login (cubeta de tokens) por IP y por email. El backend
+# 'sqlite' comparte los límites entre workers; 'memory' los lleva por proceso
+LOGIN_LIMIT_BACKEND = os.getenv('LOGIN_LIMIT_BACKEND', 'memory')
+if LOGIN_LIMIT_BACKEND == 'sqlite':
+    _login_backend = SQLiteBackend(os.path.join(snapshot_cache.CACHE_DIR or '.', 'limites.sqlite3'))
+else:
+    _login_backend = MemoryBackend(max_keys=int(os.getenv('LOGIN_LIMIT_MAX_KEYS', '100000')))
+login_por_ip = RateLimiter(
+    per_minute=float(os.getenv('LOGIN_IP_PER_MINUTE', '10')),
+    capacity=int(os.getenv('LOGIN_IP_BURST', '20')),
+    backend=_login_backend, prefix='ip:'
+)
+login_por_email = RateLimiter(
+    per_minute=float(os.getenv('LOGIN_EMAIL_PER_MINUTE', '2')),
+    capacity=int(os.getenv('LOGIN_EMAIL_BURST', '5')),
+    backend=_login_backend, prefix='email:'
+)
+
+# Plantillas que forman el dashboard; su contenido entra en el ETag
+PLANTILLAS_DASHBOARD = ('dashboard.html', '_resultados.html')
+_huella_dashboard = None
+
+# Segundos tras los que el navegador reintenta mientras termina la primera carga de datos
+REINTENTO_CARGA = int(os.getenv('LOADING_RETRY_AFTER', '5'))
+
+# Token opcional que Prometheus debe enviar (Authorization: Bearer ...) para leer /metrics
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# El gestor de autenticación se crea en el primer uso: importar la app no hace E/S
+_auth_manager = None
+_auth_manager_lock = threading.Lock()
+
+def get_auth_manager():
+    """Devuelve el gestor de autenticación, creándolo (y cargando usuarios) la primera vez"""
+    global _auth_manager
+    with _auth_manager_lock:
+        if _auth_manager is None:
+            _auth_manager = AuthManager()
+        return _auth_manager
+
+metricas.registrar_valor('dashboard_cache_total', lambda: dashboard_cache.hits, tipo='counter', resultado='hit')
+metricas.registrar_valor('dashboard_cache_total', lambda: dashboard_cache.misses, tipo='counter', resultado='miss')
+metricas.registrar_valor(
+    'snapshot_filas', lambda: _auth_manager.get_total_users() if _auth_manager is not None else None, datos='usuarios'
+)
+
+def warm_up():
+    """Carga anticipada de usuarios, resultados y estáticos (p. ej. al arrancar un worker)"""
+    assets.construir_todos()
+    get_auth_manager()
+    sheets.inicializar()
+
+# ============================================
+# MÉTRICAS
+# ============================================
+
+@app.before_request
+def iniciar_cronometro():
+    g.inicio_peticion = time.perf_counter()
+
+@app.after_request
+def registrar_duracion(response):
+    inicio = g.pop('inicio_peticion', None)
+    if inicio is not None:
+        metricas.observar(
+            'http_request_seconds', time.perf_counter() - inicio,
+            endpoint=request.endpoint or 'desconocido', metodo=request.method
+        )
+    return response
+
+def _inicio_plantilla(sender, template, context, **extra):
+    g.inicio_plantilla = time.perf_counter()
+
+def _fin_plantilla(sender, template, context, **extra):
+    inicio = g.pop('inicio_plantilla', None)
+    if inicio is not None:
+        metricas.observar('plantilla_render_seconds', time.perf_counter() - inicio, plantilla=template.name)
+
+before_render_template.connect(_inicio_plantilla, app)
+template_rendered.connect(_fin_plantilla, app)
+
+@app.route('/metrics')
+def metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'
+    ):
+        abort(403)
+    return Response(metricas.exponer(), mimetype='text/plain; version=0.0.4')
+
+# ============================================
+# ESTÁTICOS Y PÁGINAS CACHEADAS
+# ============================================
+
+@app.template_global()
+def asset_url(nombre):
+    """URL versionada (con el hash del contenido) de un archivo de static/"""
+    return url_for('asset', versionado=assets.nombre_versionado(nombre))
+
+@app.route('/assets/<versionado>')
+def asset(versionado):
+    """Sirve un estático minificado y precomprimido, cacheable indefinidamente"""
+    archivo, vigente = assets.buscar_versionado(versionado)
+    if archivo is None:
+        abort(404)
+    
+    cuerpo, codificacion = archivo.contenido, None
+    if archivo.brotli is not None and request.accept_encodings['br']:
+        cuerpo, codificacion = archivo.brotli, 'br'
+    elif request.accept_encodings['gzip']:
+        cuerpo, codificacion = archivo.gzip, 'gzip'
+    
+    response = make_response(cuerpo)
+    response.mimetype = archivo.mimetype
+    if codificacion:
+        response.headers['Content-Encoding'] = codificacion
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f'{archivo.hash}-{codificacion or "identity"}')
+    if vigente:
+        response.cache_control.public = True
+        response.cache_control.max_age = ASSET_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        # Hash de otra versión (p. ej. una página vieja tras un despliegue): sin caché larga
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def huella_dashboard():
+    """
+    Hash de las plantillas del dashboard y de los estáticos versionados.
+    Cambia con un despliegue que los modifica aunque los datos sean los
+    mismos, así el navegador no conserva HTML que apunta a CSS que ya no existe.
+    """
+    global _huella_dashboard
+    if _huella_dashboard is None:
+        huella = hashlib.sha1(assets.huella_manifiesto().encode('utf-8'))
+        for nombre in PLANTILLAS_DASHBOARD:
+            huella.update(app.jinja_loader.get_source(app.jinja_env, nombre)[0].encode('utf-8'))
+        _huella_dashboard = huella.hexdigest()[:12]
+    return _huella_dashboard
+
+def pagina_cacheada(plantilla, **contexto):
+    """Renderiza una plantilla una sola vez por combinación de argumentos"""
+    clave = (plantilla,) + tuple(sorted(contexto.items()))
+    body = paginas_cache.get(clave)
+    if body is None:
+        body = render_template(plantilla, **contexto)
+        paginas_cache.set(clave, body)
+    return body
+
+def respuesta_cargando(body=None):
+    """503 con Retry-After mientras no terminó la primera carga de usuarios o resultados"""
+    response = make_response(body or pagina_cacheada('cargando.html', reintento=REINTENTO_CARGA), 503)
+    response.headers['Retry-After'] = str(REINTENTO_CARGA)
+    return response
 
 @app.route('/')
 def index():
@@ -16,6 +232,25 @@ def index():
         return redirect(url_for('dashboard'))
     return redirect(url_for('login'))
 
+_aviso_proxy = False
+
+def ip_cliente():
+    """
+    IP con la que se limitan los logins. Avisa una vez si llegan peticiones
+    reenviadas por un proxy sin PROXY_COUNT: todas compartirían su IP
+    """
+    global _aviso_proxy
+    if not PROXY_COUNT and not _aviso_proxy and 'X-Forwarded-For' in request.headers:
+        _aviso_proxy = True
+        print("⚠️ Peticiones con X-Forwarded-For y PROXY_COUNT=0: el límite de login "
+              "por IP se comparte entre todos los clientes del proxy")
+    return request.remote_addr or ''
+
+def devolver_intento(email):
+    """Descuenta de los límites de login un intento que no falló"""
+    login_por_ip.refund(ip_cliente())
+    login_por_email.refund(email.lower())
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Página de login"""
@@ -28,10 +263,32 @@ def login():
             flash('Por favor ingresa tu email y contraseña', 'error')
             return render_template('login.html')
         
+        # Límite de intentos antes de cualquier búsqueda: una ráfaga no cuesta CPU ni logs.
+        # Los intentos que no fallan devuelven su token (ver devolver_intento)
+        permitido, espera = login_por_ip.hit(ip_cliente())
+        motivo = 'ip'
+        if permitido:
+            permitido, espera = login_por_email.hit(email.lower())
+            motivo = 'email'
+        if not permitido:
+            metricas.contar('login_limitados_total', motivo=motivo)
+            flash('Demasiados intentos de inicio de sesión. Espera un momento e inténtalo de nuevo.', 'error')
+            response = make_response(render_template('login.html'), 429)
+            response.headers['Retry-After'] = str(max(1, int(espera + 0.999)))
+            return response
+        
+        # Sin usuarios cargados todavía no se puede saber si las credenciales son válidas
+        auth_manager = get_auth_manager()
+        if not auth_manager.loaded:
+            devolver_intento(email)
+            flash('Estamos cargando los datos. Inténtalo de nuevo en unos segundos.', 'info')
+            return respuesta_cargando(render_template('login.html'))
+        
         # Autentica al usuario
         user = auth_manager.authenticate(email, password)
         
         if user:
+            devolver_intento(email)
             # Guarda la información en la sesión
             session['user_email'] = user['email']
             session['user_name'] = user['nombre']
@@ -58,34 +315,72 @@ def dashboard():
     # Obtiene el email del usuario desde la sesión
     user_email = session['user_email']
     
+    # Sin datos cargados todavía no se puede decir que el usuario no tenga resultados
+    if not sheets.datos_cargados():
+        return respuesta_cargando()
+    
     # Obtiene los resultados del usuario desde Google Sheets
-    data = sheets.obtener_resultados_completos(user_email)
+    data, version = sheets.obtener_resultados_con_version(user_email)
     
     if data is None:
         flash('No se encontraron resultados para tu cuenta. Contacta al administrador.', 'error')
         user_name = session.get('user_name', 'Usuario')
-        return f"""
-        <!DOCTYPE html>
-        <html lang="es">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Sin resultados - ICATHI 4.0</title>
-            <link rel="stylesheet" href="{url_for('static', filename='styles.css')}">
-        </head>
-        <body>
-            <div class="container" style="text-align: center; padding: 50px;">
-                <h1>⚠️ Sin resultados</h1>
-                <p>Hola {user_name}, no se encontraron resultados para tu cuenta.</p>
-                <p>Por favor contacta al administrador.</p>
-                <br>
-                <a href="{url_for('logout')}" style="background: #d05a7e; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Cerrar Sesión</a>
-            </div>
-        </body>
-        </html>
-        """
-    
-    return render_template('dashboard.html', data=data)
+        return pagina_cacheada('sin_resultados.html', user_name=user_name)
+    
+    # El HTML solo cambia cuando se recargan los datos: se renderiza una vez por versión
+    cache_key = (user_email.lower().strip(), version)
+    body = dashboard_cache.get(cache_key)
+    if body is None:
+        body = render_template('dashboard.html', data=data)
+        dashboard_cache.set(cache_key, body)
+    
+    # ETag/Last-Modified permiten que el navegador reciba un 304 al recargar
+    response = make_response(body)
+    response.set_etag(hashlib.sha1(
+        f'{cache_key[0]}|{version.isoformat()}|{huella_dashboard()}'.encode('utf-8')
+    ).hexdigest())
+    # version es hora local sin zona; la cabecera HTTP va en UTC
+    response.last_modified = version.astimezone(timezone.utc)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/reporte')
+def reporte():
+    """Descarga del informe imprimible (HTML) del usuario; un administrador puede pedir el de cualquier email"""
+    if 'user_email' not in session:
+        flash('Por favor inicia sesión para descargar tu informe', 'error')
+        return redirect(url_for('login'))
+    
+    email = session['user_email']
+    solicitado = request.args.get('email', '').strip()
+    if solicitado and solicitado.lower() != email.lower().strip():
+        if email.lower().strip() not in ADMIN_EMAILS:
+            abort(403)
+        email = solicitado
+    
+    if not sheets.datos_cargados():
+        return respuesta_cargando()
+    data = sheets.obtener_resultados_completos(email)
+    if data is None:
+        abort(404)
+    
+    # Normalmente ya está generado tras la última carga; si no, se genera ahora
+    contenido, huella = reportes.obtener(data)
+    if request.accept_encodings['gzip']:
+        response = make_response(contenido)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(f'{huella}-gzip')
+    else:
+        response = make_response(gzip.decompress(contenido))
+        response.set_etag(f'{huella}-identity')
+    response.mimetype = 'text/html'
+    response.vary.add('Accept-Encoding')
+    nombre = secure_filename(f'informe_{data.email or email}.html')
+    response.headers['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/logout')
 def logout():
@@ -95,66 +390,88 @@ def logout():
     flash(f'Hasta luego, {user_name}. Has cerrado sesión correctamente.', 'info')
     return redirect(url_for('login'))
 
+@app.route('/admin/export')
+def export_results():
+    """Descarga masiva de resultados en CSV o JSONL (solo administradores)"""
+    if 'user_email' not in session:
+        return redirect(url_for('login'))
+    if session['user_email'].lower().strip() not in ADMIN_EMAILS:
+        abort(403)
+    
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'jsonl'):
+        abort(400, description='Formato no soportado (usa csv o jsonl)')
+    
+    # Rango de fechas en formato AAAA-MM-DD; 'hasta' incluye el día completo
+    try:
+        desde = request.args.get('desde')
+        desde = datetime.strptime(desde, '%Y-%m-%d') if desde else None
+        hasta = request.args.get('hasta')
+        hasta = datetime.strptime(hasta, '%Y-%m-%d') + timedelta(days=1) if hasta else None
+    except ValueError:
+        abort(400, description='Fechas inválidas (usa AAAA-MM-DD)')
+    
+    resultados = sheets.filtrar_resultados(
+        escolaridad=request.args.get('escolaridad'),
+        genero=request.args.get('genero'),
+        desde=desde,
+        hasta=hasta,
+        areas=request.args.get('areas')
+    )
+    
+    # Se transmite bloque a bloque: la memoria no crece con el número de filas
+    if formato == 'csv':
+        cuerpo, mimetype = exportacion.a_csv(resultados), 'text/csv'
+    else:
+        cuerpo, mimetype = exportacion.a_jsonl(resultados), 'application/x-ndjson'
+    return Response(
+        stream_with_context(cuerpo),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=resultados.{formato}'}
+    )
+
+@app.route('/admin/analytics')
+def analytics():
+    """Estadísticas agregadas de los resultados (solo administradores)"""
+    if 'user_email' not in session:
+        return redirect(url_for('login'))
+    if session['user_email'].lower().strip() not in ADMIN_EMAILS:
+        abort(403)
+    
+    # Las estadísticas se calculan al cargar la hoja; aquí solo se muestran
+    stats = sheets.obtener_estadisticas()
+    actualizado = sheets.obtener_ultima_actualizacion()
+    return render_template(
+        'analytics.html',
+        stats=stats,
+        envios_por_dia=stats.envios_por_dia[-DIAS_ANALITICA:][::-1],
+        actualizado=actualizado.strftime('%d/%m/%Y %H:%M') if actualizado else 'sin cargar'
+    )
+
 @app.route('/refresh')
 def refresh():
-    """Refresca los datos desde Google Sheets"""
+    """Solicita la recarga completa de los datos desde Google Sheets"""
     if 'user_email' not in session:
         return redirect(url_for('login'))
     
-    if sheets.refrescar_datos():
-        flash('Datos actualizados correctamente', 'success')
-    else:
-        flash('Error al actualizar los datos', 'error')
+    # Las recargas corren en segundo plano; mientras tanto se sirven los datos actuales.
+    # Son completas: recogen también ediciones de filas anteriores (p. ej. contraseñas)
+    sheets.refrescar_datos()
+    get_auth_manager().request_refresh()
+    dashboard_cache.clear()
+    flash('Actualizando datos, los cambios se verán en unos momentos', 'info')
     
     return redirect(url_for('dashboard'))
 
 @app.errorhandler(404)
 def page_not_found(e):
     """Maneja errores 404"""
-    return f"""
-    <!DOCTYPE html>
-    <html lang="es">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>404 - Página no encontrada</title>
-        <link rel="stylesheet" href="{url_for('static', filename='styles.css')}">
-    </head>
-    <body>
-        <div class="container" style="text-align: center; padding: 50px;">
-            <h1 style="font-size: 72px; color: #d05a7e;">404</h1>
-            <h2 style="color: #3d5a96;">Página no encontrada</h2>
-            <p>La página que buscas no existe.</p>
-            <br>
-            <a href="{url_for('index')}" style="background: #3d5a96; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Ir al inicio</a>
-        </div>
-    </body>
-    </html>
-    """, 404
+    return pagina_cacheada('404.html'), 404
 
 @app.errorhandler(500)
 def internal_error(e):
     """Maneja errores 500"""
-    return f"""
-    <!DOCTYPE html>
-    <html lang="es">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>500 - Error interno</title>
-        <link rel="stylesheet" href="{url_for('static', filename='styles.css')}">
-    </head>
-    <body>
-        <div class="container" style="text-align: center; padding: 50px;">
-            <h1 style="font-size: 72px; color: #d05a7e;">500</h1>
-            <h2 style="color: #3d5a96;">Error interno del servidor</h2>
-            <p>Lo sentimos, algo salió mal. Por favor intenta de nuevo más tarde.</p>
-            <br>
-            <a href="{url_for('index')}" style="background: #3d5a96; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Ir al inicio</a>
-        </div>
-    </body>
-    </html>
-    """, 500
+    return pagina_cacheada('500.html'), 500
 
 if __name__ == '__main__':
     print("\n" + "="*70)
@@ -163,7 +480,7 @@ if __name__ == '__main__':
     
     # Verifica la conexión con usuarios
     print("\n📋 Verificando archivo de usuarios...")
-    total_users = auth_manager.get_total_users()
+    total_users = get_auth_manager().get_total_users()
     if total_users > 0:
         print(f"✅ {total_users} usuarios registrados")
     else:
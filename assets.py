@@ -0,0 +1,129 @@
+from collections import namedtuple
+import hashlib
+import gzip
+import re
+import threading
+import os
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Los archivos de static/ se minifican, se nombran con el hash de su
+# contenido (styles.<hash>.css) y se comprimen una sola vez por proceso;
+# al cambiar el contenido cambia la URL, así que se pueden cachear sin
+# caducidad en el navegador.
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+MIMETYPES = {
+    '.css': 'text/css',
+}
+
+Asset = namedtuple('Asset', ['nombre', 'versionado', 'hash', 'contenido', 'gzip', 'brotli', 'mimetype'])
+
+_assets = {}        # nombre original -> Asset
+_versionados = {}   # nombre versionado -> Asset
+_lock = threading.Lock()
+
+# ============================================
+# PROCESAMIENTO
+# ============================================
+
+def minificar_css(texto):
+    """Quita comentarios y espacios innecesarios de una hoja de estilos"""
+    texto = re.sub(r'/\*.*?\*/', '', texto, flags=re.S)
+    texto = re.sub(r'\s+', ' ', texto)
+    texto = re.sub(r'\s*([{};,>])\s*', r'\1', texto)
+    texto = re.sub(r':\s+', ':', texto)
+    texto = texto.replace(';}', '}')
+    return texto.strip()
+
+def _comprimir_brotli(contenido):
+    try:
+        import brotli
+    except ImportError:
+        # brotli es opcional: sin él solo se sirve gzip
+        return None
+    return brotli.compress(contenido, quality=11)
+
+def construir(nombre):
+    """
+    Minifica, versiona y comprime un archivo de static/
+
+    Args:
+        nombre: Ruta relativa a static/ (p. ej. 'styles.css')
+
+    Returns:
+        Asset: Archivo procesado
+    """
+    base, extension = os.path.splitext(nombre)
+    with open(os.path.join(STATIC_DIR, nombre), encoding='utf-8') as archivo:
+        texto = archivo.read()
+    if extension == '.css':
+        texto = minificar_css(texto)
+    contenido = texto.encode('utf-8')
+    huella = hashlib.sha256(contenido).hexdigest()[:12]
+    return Asset(
+        nombre=nombre,
+        versionado=f'{base}.{huella}{extension}',
+        hash=huella,
+        contenido=contenido,
+        gzip=gzip.compress(contenido, compresslevel=9, mtime=0),
+        brotli=_comprimir_brotli(contenido),
+        mimetype=MIMETYPES.get(extension, 'application/octet-stream'),
+    )
+
+def construir_todos():
+    """Procesa todos los archivos soportados de static/ (p. ej. al arrancar un worker)"""
+    for nombre in sorted(os.listdir(STATIC_DIR)):
+        if os.path.splitext(nombre)[1] in MIMETYPES:
+            obtener(nombre)
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def obtener(nombre):
+    """Devuelve el Asset de un archivo, procesándolo la primera vez"""
+    asset = _assets.get(nombre)
+    if asset is None:
+        with _lock:
+            asset = _assets.get(nombre)
+            if asset is None:
+                asset = construir(nombre)
+                _assets[nombre] = asset
+                _versionados[asset.versionado] = asset
+    return asset
+
+def nombre_versionado(nombre):
+    """'styles.css' -> 'styles.<hash>.css'"""
+    return obtener(nombre).versionado
+
+def huella_manifiesto():
+    """Hash de los nombres versionados de todos los estáticos: cambia si cambia cualquiera"""
+    construir_todos()
+    nombres = sorted(asset.versionado for asset in list(_assets.values()))
+    return hashlib.sha256('\n'.join(nombres).encode('utf-8')).hexdigest()[:12]
+
+def buscar_versionado(versionado):
+    """
+    Busca un archivo por su nombre versionado
+
+    Returns:
+        tuple: (Asset, vigente) donde vigente es False si el hash pedido ya
+               no corresponde al contenido actual (p. ej. tras un despliegue);
+               (None, False) si el archivo no existe
+    """
+    asset = _versionados.get(versionado)
+    if asset is not None:
+        return asset, True
+    partes = versionado.split('.')
+    if len(partes) < 3:
+        return None, False
+    nombre = '.'.join(partes[:-2] + partes[-1:])
+    if os.path.splitext(nombre)[1] not in MIMETYPES or os.sep in nombre:
+        return None, False
+    if nombre not in _assets and not os.path.isfile(os.path.join(STATIC_DIR, nombre)):
+        return None, False
+    return obtener(nombre), False
@@ -1,8 +1,23 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import pandas as pd
+from datetime import datetime
+import hmac
+import threading
+import time
 import os
-import json
+import google_client
+import snapshot_cache
+import coordinacion
+import metricas
+from sheet_sync import SheetSync
+
+# Cada cuántos segundos se consulta si otro worker publicó usuarios nuevos
+GENERATION_CHECK_INTERVAL = float(os.getenv('SHEETS_GENERATION_CHECK', '2'))
+
+# Segundos que se espera la carga inicial si no hay copia local; después sigue en segundo plano
+INITIAL_LOAD_WAIT = float(os.getenv('SHEETS_INIT_WAIT', '10'))
+
+# Segundos durante los que la última verificación contra Sheets (de cualquier
+# worker) hace innecesaria una revalidación no forzada
+VERIFIED_TTL = float(os.getenv('SHEETS_USERS_VERIFIED_TTL', '60'))
 
 class AuthManager:
     """Gestor de autenticación de usuarios desde Google Sheets"""
@@ -11,71 +26,224 @@ class AuthManager:
         self.spreadsheet_id = spreadsheet_id
         self.sheet_name = sheet_name
         self.users_df = None
-        self.load_users()
+        self.users_index = {}
+        self._sync = SheetSync()
+        self._load_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        self._refresh_pending = None
+        self.generation = 0
+        self._next_generation_check = 0.0
+        self.last_checked = None
+        
+        if self.load_local_copy():
+            # Se sirve la copia local y se revalida contra Sheets en segundo plano
+            threading.Thread(target=self.revalidate, name='auth-refresco', daemon=True).start()
+        else:
+            loader = threading.Thread(target=self.load_users, name='auth-carga', daemon=True)
+            loader.start()
+            loader.join(INITIAL_LOAD_WAIT)
     
     def get_credentials(self):
-        """Obtiene credenciales desde variable de entorno (Render) o archivo local"""
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+        """Obtiene las credenciales compartidas con sheets.py (ver google_client)"""
+        return google_client.get_credentials()
+    
+    @property
+    def local_copy_name(self):
+        return f'usuarios_{self.spreadsheet_id}_{self.sheet_name}'
+    
+    def save_local_copy(self):
+        """Persiste la tabla de usuarios, su índice y el estado de sincronización"""
+        snapshot_cache.guardar(self.local_copy_name, {
+            'users_df': self.users_df,
+            'users_index': self.users_index,
+            'sync': self._sync.get_state()
+        })
+    
+    def load_local_copy(self):
+        """
+        Carga la copia local guardada por la última carga exitosa
         
-        # Intentar obtener desde variable de entorno
-        creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
+        Returns:
+            bool: True si se cargó la copia local
+        """
+        generation = coordinacion.obtener_generacion(self.local_copy_name)
+        data = snapshot_cache.cargar(self.local_copy_name)
+        if data is None:
+            return False
+        with self._load_lock:
+            self._sync.set_state(data['sync'])
+            self.users_index = data['users_index']
+            self.users_df = data['users_df']
+            self.generation = generation
+        print(f"💾 Copia local de usuarios cargada: {len(self.users_df)} registros")
+        return True
+    
+    def load_users(self, full=False):
+        """
+        Carga los usuarios desde Google Sheets (solo las filas nuevas tras la primera carga)
         
-        if creds_json:
-            # Producción (Render)
-            print("🔐 [Auth] Usando credenciales desde variable de entorno")
-            credentials_dict = json.loads(creds_json)
-            return ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, scope)
-        else:
-            # Desarrollo local
-            print("🔐 [Auth] Usando credenciales desde archivo local")
-            return ServiceAccountCredentials.from_json_keyfile_name(
-                'drive-python-446800-fe3f38b5a4b3.json', 
-                scope
-            )
+        Args:
+            full: Descarga la hoja entera (recoge ediciones de cualquier fila, p. ej. contraseñas)
+        
+        Returns:
+            bool: True si se cargaron datos nuevos, False si la hoja no cambió o falló
+        """
+        with self._load_lock:
+            with metricas.medir('carga_seconds', datos='usuarios'):
+                loaded = self._load_users(full)
+            if loaded:
+                self.save_local_copy()
+                self.generation = coordinacion.incrementar_generacion(self.local_copy_name)
+            if loaded is not False:
+                # Los demás workers no necesitan repetir la consulta durante VERIFIED_TTL
+                coordinacion.registrar_verificacion(self.local_copy_name)
+            return bool(loaded)
     
-    def load_users(self):
-        """Carga los usuarios desde Google Sheets"""
+    def revalidate(self, force=False):
+        """
+        Actualiza los usuarios desde la copia local si otro worker ya los
+        descargó, o desde Google Sheets si este worker obtiene el liderazgo.
+        Sin forzar no se consulta Sheets si cualquier worker lo hizo hace
+        menos de VERIFIED_TTL segundos.
+        
+        Args:
+            force: Descarga la hoja entera de Google Sheets aunque haya una copia más nueva
+            
+        Returns:
+            bool: True si se actualizaron los usuarios; False si no hubo
+                cambios, otro worker está descargando o la descarga falló
+        """
+        if coordinacion.obtener_generacion(self.local_copy_name) > self.generation:
+            if self.load_local_copy() and not force:
+                return True
+        if not force and self.adopt_verification():
+            return False
+        if not coordinacion.adquirir_liderazgo(self.local_copy_name):
+            return False
+        try:
+            return self.load_users(full=force)
+        finally:
+            coordinacion.liberar_liderazgo(self.local_copy_name)
+    
+    def adopt_verification(self):
+        """
+        Toma como propia una verificación reciente de otro worker
+        
+        Returns:
+            bool: True si los usuarios se confirmaron hace menos de VERIFIED_TTL segundos
+        """
+        verified = coordinacion.obtener_verificacion(self.local_copy_name)
+        if verified is None or self.users_df is None or time.time() - verified >= VERIFIED_TTL:
+            return False
+        self.last_checked = max(self.last_checked or datetime.min, datetime.fromtimestamp(verified))
+        return True
+    
+    def check_generation(self):
+        """Recarga en segundo plano la copia local si otro worker publicó una generación nueva"""
+        now = time.monotonic()
+        if now < self._next_generation_check:
+            return
+        self._next_generation_check = now + GENERATION_CHECK_INTERVAL
+        if coordinacion.obtener_generacion(self.local_copy_name) > self.generation:
+            threading.Thread(target=self.load_local_copy, name='auth-recarga', daemon=True).start()
+    
+    def _load_users(self, full=False):
+        # True si hay datos nuevos, None si la hoja no cambió, False si falló
+        import pandas as pd
         try:
             print(f"📊 Cargando usuarios desde Google Sheets...")
             
-            # 1. Autenticación
-            creds = self.get_credentials()
-            client = gspread.authorize(creds)
+            # 1-3. Cliente compartido y worksheet por ID y nombre (se reutilizan entre cargas)
+            worksheet = google_client.get_worksheet(
+                spreadsheet_key=self.spreadsheet_id, sheet_name=self.sheet_name
+            )
             
-            # 2. Abrir hoja por ID
-            spreadsheet = client.open_by_key(self.spreadsheet_id)
+            # 4. Obtener los datos (todos, o solo los añadidos desde la última carga)
+            data, completa = self._sync.fetch(worksheet, completa=full)
             
-            # 3. Obtener worksheet por nombre
-            worksheet = spreadsheet.worksheet(self.sheet_name)
+            if not completa and not data and self.users_df is not None:
+                # La hoja no cambió: no hay nada que guardar ni que avisar a otros workers
+                self.last_checked = datetime.now()
+                print(f"✅ Sin cambios en usuarios: {len(self.users_df)} registros")
+                return None
             
-            # 4. Obtener todos los datos
-            data = worksheet.get_all_records()
+            if not completa and self.users_df is not None:
+                # 5. Anexar las filas nuevas al DataFrame existente
+                nuevos = pd.DataFrame(data)
+                if not nuevos.empty:
+                    nuevos['email_normalized'] = nuevos['Dirección de correo electrónico'].str.lower().str.strip()
+                    self.users_df = pd.concat([self.users_df, nuevos], ignore_index=True)
+                    self.users_index = self.build_index(nuevos, dict(self.users_index))
+                self.last_checked = datetime.now()
+                print(f"✅ Usuarios sincronizados: {len(nuevos)} nuevos, {len(self.users_df)} registros")
+                return True
             
             # 5. Convertir a DataFrame
-            self.users_df = pd.DataFrame(data)
+            users_df = pd.DataFrame(data)
             
-            print(f"✅ Usuarios cargados: {len(self.users_df)} registros")
+            print(f"✅ Usuarios cargados: {len(users_df)} registros")
             
             # 6. Verificar columnas necesarias
             required_columns = ['Dirección de correo electrónico', 'Contraseña', 'Nombre completo']
-            missing_columns = [col for col in required_columns if col not in self.users_df.columns]
+            missing_columns = [col for col in required_columns if col not in users_df.columns]
             
             if missing_columns:
                 print(f"❌ Error: Faltan columnas: {missing_columns}")
-                print(f"📋 Columnas disponibles: {list(self.users_df.columns)}")
+                print(f"📋 Columnas disponibles: {list(users_df.columns)}")
+                self._sync.reset()
                 return False
             
             # 7. Normalizar emails (minúsculas y sin espacios)
-            self.users_df['email_normalized'] = self.users_df['Dirección de correo electrónico'].str.lower().str.strip()
+            users_df['email_normalized'] = users_df['Dirección de correo electrónico'].str.lower().str.strip()
+            
+            # 8. Compilar el índice de credenciales por email
+            self.users_index = self.build_index(users_df)
+            self.users_df = users_df
+            self.last_checked = datetime.now()
             
             return True
             
+        except google_client.SheetsNoDisponible as e:
+            # Se conservan los usuarios ya cargados y el estado de sincronización
+            print(f"⚠️ Google Sheets no disponible, se conservan los usuarios anteriores: {e}")
+            return False
         except Exception as e:
             print(f"❌ Error al cargar usuarios desde Google Sheets: {e}")
             import traceback
             traceback.print_exc()
+            self._sync.reset()
+            google_client.reset()
             return False
     
+    @staticmethod
+    def build_index(users_df, index=None):
+        """
+        Compila la tabla de usuarios en un diccionario por email normalizado
+        
+        Args:
+            users_df: DataFrame con las columnas requeridas y 'email_normalized'
+            index: Índice existente al que se agregan las filas (opcional)
+            
+        Returns:
+            dict: email_normalized -> (información del usuario, contraseña en bytes).
+                  Si un email se repite prevalece la última fila de la hoja.
+        """
+        index = {} if index is None else index
+        columnas = zip(
+            users_df['email_normalized'],
+            users_df['Dirección de correo electrónico'],
+            users_df['Nombre completo'],
+            users_df['Contraseña']
+        )
+        for email_normalized, email, nombre, password in columnas:
+            if not isinstance(email_normalized, str) or not email_normalized:
+                continue
+            user = {'email': email, 'nombre': nombre, 'password': password}
+            index[email_normalized] = (user, str(password).encode('utf-8'))
+        return index
+    
+    @metricas.cronometrado('autenticacion_seconds')
     def authenticate(self, email, password):
         """
         Autentica un usuario
@@ -87,7 +255,9 @@ class AuthManager:
         Returns:
             dict: Información del usuario si la autenticación es exitosa, None si falla
         """
-        if self.users_df is None or self.users_df.empty:
+        self.check_generation()
+        if not self.users_index:
+            metricas.contar('autenticaciones_total', resultado='sin_usuarios')
             print("⚠️ No hay usuarios cargados")
             return None
         
@@ -95,23 +265,22 @@ class AuthManager:
         email_normalized = email.lower().strip()
         
         # Buscar el usuario
-        user = self.users_df[
-            (self.users_df['email_normalized'] == email_normalized) & 
-            (self.users_df['Contraseña'].astype(str) == str(password))
-        ]
+        entry = self.users_index.get(email_normalized)
+        
+        # Se compara aunque el email no exista para no revelar por tiempo si está registrado
+        expected = entry[1] if entry is not None else b'\x00'
+        password_ok = hmac.compare_digest(expected, str(password).encode('utf-8'))
         
-        if len(user) == 0:
+        if entry is None or not password_ok:
+            metricas.contar('autenticaciones_total', resultado='fallido')
             print(f"⚠️ Login fallido para: {email}")
             return None
         
         # Retornar la información del usuario
-        user_data = user.iloc[0]
-        print(f"✅ Login exitoso: {user_data['Nombre completo']}")
-        return {
-            'email': user_data['Dirección de correo electrónico'],
-            'nombre': user_data['Nombre completo'],
-            'password': user_data['Contraseña']
-        }
+        user = entry[0]
+        metricas.contar('autenticaciones_total', resultado='exitoso')
+        print(f"✅ Login exitoso: {user['nombre']}")
+        return dict(user)
     
     def get_user_by_email(self, email):
         """
@@ -123,21 +292,11 @@ class AuthManager:
         Returns:
             dict: Información del usuario o None si no existe
         """
-        if self.users_df is None or self.users_df.empty:
+        self.check_generation()
+        entry = self.users_index.get(email.lower().strip())
+        if entry is None:
             return None
-        
-        email_normalized = email.lower().strip()
-        user = self.users_df[self.users_df['email_normalized'] == email_normalized]
-        
-        if len(user) == 0:
-            return None
-        
-        user_data = user.iloc[0]
-        return {
-            'email': user_data['Dirección de correo electrónico'],
-            'nombre': user_data['Nombre completo'],
-            'password': user_data['Contraseña']
-        }
+        return dict(entry[0])
     
     def user_exists(self, email):
         """
@@ -151,6 +310,11 @@ class AuthManager:
         """
         return self.get_user_by_email(email) is not None
     
+    @property
+    def loaded(self):
+        """True cuando ya hay usuarios (de Sheets o de la copia local); antes un login fallido no significa nada"""
+        return self.users_df is not None
+    
     def get_total_users(self):
         """Retorna el total de usuarios registrados"""
         if self.users_df is None or self.users_df.empty:
@@ -158,6 +322,40 @@ class AuthManager:
         return len(self.users_df)
     
     def refresh_users(self):
-        """Recarga los usuarios desde Google Sheets"""
+        """
+        Recarga la hoja entera de usuarios desde Google Sheets
+        
+        Returns:
+            bool: True si se actualizaron los usuarios (ver revalidate)
+        """
         print("🔄 Refrescando datos de usuarios...")
-        return self.load_users()
\ No newline at end of file
+        return self.revalidate(force=True)
+    
+    def request_refresh(self):
+        """
+        Solicita refresh_users en segundo plano. Como mucho hay una recarga en
+        curso y otra pendiente: las solicitudes que llegan mientras la
+        pendiente espera se suman a ella en lugar de lanzar otra descarga.
+        
+        Returns:
+            threading.Thread: Hilo de la recarga que atenderá la solicitud
+        """
+        with self._refresh_lock:
+            if self._refresh_pending is not None:
+                return self._refresh_pending
+            previous = self._refresh_thread
+            if previous is not None and not previous.is_alive():
+                previous = None
+            
+            def task():
+                if previous is not None:
+                    previous.join()
+                with self._refresh_lock:
+                    # Desde aquí las nuevas solicitudes esperan otra recarga
+                    self._refresh_pending = None
+                self.refresh_users()
+            
+            thread = threading.Thread(target=task, name='auth-refresco', daemon=True)
+            self._refresh_thread = self._refresh_pending = thread
+            thread.start()
+            return thread
\ No newline at end of file
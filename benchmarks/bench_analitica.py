@@ -0,0 +1,69 @@
+"""
+Benchmark: estadísticas agregadas calculadas al cargar vs. al pedir la página.
+
+calcular_estadisticas corre una vez por carga de la hoja (en el hilo de
+refresco); /admin/analytics solo renderiza el resultado. Se mide el costo
+del cálculo completo, el de actualizarlo al anexar unas pocas filas y el
+de renderizar la página ya calculada, que es lo que paga cada petición.
+
+Uso:
+    python benchmarks/bench_analitica.py --filas 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+import analitica  # noqa: E402
+import sheets  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cálculo de estadísticas vs. render de la página')
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    hoja, _ = fake_sheets.crear(args.filas, n_usuarios=0)
+    df = sheets.compactar_dataframe(sheets.normalizar_emails(pd.DataFrame(hoja.get_all_records())))
+    indice = sheets.construir_indice_email(df)
+
+    inicio = time.perf_counter()
+    stats = analitica.calcular_estadisticas(df, indice)
+    t_calculo = time.perf_counter() - inicio
+
+    # Dos filas nuevas, una de ellas reemplaza el resultado vigente de un email
+    conteos = analitica.contar(df, indice)
+    nuevas = [fake_sheets.fila_resultado(args.filas), fake_sheets.fila_resultado(args.filas + 1)]
+    nuevas[1][2] = fake_sheets.email(1)
+    df_anexado = sheets.unir_filas_nuevas(df, sheets.normalizar_emails(
+        pd.DataFrame([dict(zip(fake_sheets.COLUMNAS_RESULTADOS, fila)) for fila in nuevas])
+    ))
+    inicio = time.perf_counter()
+    analitica.actualizar(conteos, df_anexado, [indice[fake_sheets.email(1)]], [args.filas, args.filas + 1], args.filas)
+    t_incremental = time.perf_counter() - inicio
+
+    from flask import render_template
+    import app
+
+    with app.app.test_request_context('/admin/analytics'):
+        render_template('analytics.html', stats=stats, envios_por_dia=stats.envios_por_dia[-30:], actualizado='-')
+        inicio = time.perf_counter()
+        for _ in range(args.repeticiones):
+            render_template('analytics.html', stats=stats, envios_por_dia=stats.envios_por_dia[-30:], actualizado='-')
+        t_render = (time.perf_counter() - inicio) / args.repeticiones
+
+    print(f"{args.filas} filas, {stats.total_usuarios} usuarios, {len(stats.envios_por_dia)} días")
+    print(f"  cálculo completo (una vez por carga): {t_calculo * 1000:10.1f} ms")
+    print(f"  actualización al anexar 2 filas:      {t_incremental * 1000:10.1f} ms")
+    print(f"  render por petición:                  {t_render * 1000:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: búsqueda de resultados por email.
+
+Compara el escaneo con máscara booleana (implementación anterior) contra
+el índice hash construido por sheets.construir_indice_email.
+
+Uso:
+    python benchmarks/bench_busqueda_email.py
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sheets  # noqa: E402
+
+TAMANOS = [1_000, 100_000, 1_000_000]
+CONSULTAS = 200
+
+
+def generar_df(n):
+    # ~5% de envíos repetidos del mismo email
+    unicos = max(1, int(n * 0.95))
+    emails = [f"usuario{i % unicos}@correo.com" for i in range(n)]
+    df = pd.DataFrame({
+        'Fecha': pd.date_range('2024-01-01', periods=n, freq='min').strftime('%d/%m/%Y %H:%M:%S'),
+        'Dirección de correo electrónico': emails,
+    })
+    df['email_normalized'] = df['Dirección de correo electrónico'].str.lower().str.strip()
+    return df
+
+
+def medir(funcion, consultas):
+    inicio = time.perf_counter()
+    for email in consultas:
+        funcion(email)
+    return (time.perf_counter() - inicio) / len(consultas)
+
+
+def main():
+    print(f"{'filas':>10} {'índice (s)':>12} {'escaneo/consulta':>18} {'índice/consulta':>18} {'speedup':>10}")
+    for n in TAMANOS:
+        df = generar_df(n)
+        consultas = [f"usuario{random.randrange(int(n * 0.95))}@correo.com" for _ in range(CONSULTAS)]
+
+        inicio = time.perf_counter()
+        indice = sheets.construir_indice_email(df)
+        t_indice = time.perf_counter() - inicio
+
+        def escaneo(email):
+            resultado = df[df['email_normalized'] == email]
+            return resultado.iloc[0] if len(resultado) else None
+
+        def por_indice(email):
+            fila = indice.get(email)
+            return df.loc[fila] if fila is not None else None
+
+        t_escaneo = medir(escaneo, consultas)
+        t_hash = medir(por_indice, consultas)
+        print(f"{n:>10} {t_indice:>12.3f} {t_escaneo * 1e6:>15.1f} µs {t_hash * 1e6:>15.1f} µs {t_escaneo / t_hash:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
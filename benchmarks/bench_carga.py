@@ -0,0 +1,106 @@
+"""
+Prueba de carga: /login, /dashboard y /refresh con un Google Sheets lento.
+
+Levanta la aplicación en un servidor WSGI con hilos sobre las hojas falsas
+de fake_sheets, con latencia inyectada en cada llamada a la "API", y lanza
+clientes concurrentes. Las descargas ocurren en segundo plano, así que las
+latencias de las rutas no deberían acercarse a la de Sheets.
+
+Uso:
+    python benchmarks/bench_carga.py --latencia 2 --clientes 20 --duracion 10
+"""
+import argparse
+import http.cookiejar
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Copias locales en un directorio temporal y refresco automático frecuente
+os.environ['SHEETS_CACHE_DIR'] = tempfile.mkdtemp(prefix='bench_carga_')
+os.environ.setdefault('SHEETS_REFRESH_TTL', '3')
+# Todos los clientes salen de 127.0.0.1: sin límites de intentos de login
+os.environ['LOGIN_IP_PER_MINUTE'] = '0'
+os.environ['LOGIN_EMAIL_PER_MINUTE'] = '0'
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+
+
+def cliente(base, i, hasta, latencias):
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+        # Las redirecciones se miden por separado, no se siguen
+        type('SinRedireccion', (urllib.request.HTTPRedirectHandler,), {
+            'redirect_request': lambda *args, **kwargs: None
+        })(),
+    )
+
+    def pedir(ruta, datos=None):
+        inicio = time.perf_counter()
+        try:
+            opener.open(base + ruta, data=datos, timeout=60).read()
+        except urllib.error.HTTPError as e:
+            e.read()
+        latencias[ruta.split('?')[0]].append(time.perf_counter() - inicio)
+
+    n = 0
+    while time.perf_counter() < hasta:
+        pedir('/login', urllib.parse.urlencode({
+            'email': fake_sheets.email(i), 'password': fake_sheets.password(i)
+        }).encode())
+        for _ in range(10):
+            pedir('/dashboard')
+        n += 1
+        if n % 5 == 0:
+            pedir('/refresh')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga con Sheets lento')
+    parser.add_argument('--filas', type=int, default=5_000)
+    parser.add_argument('--latencia', type=float, default=2.0, help='Segundos por llamada a la API')
+    parser.add_argument('--clientes', type=int, default=20)
+    parser.add_argument('--duracion', type=float, default=10.0)
+    args = parser.parse_args()
+
+    resultados, usuarios = fake_sheets.crear(args.filas, latencia=args.latencia)
+    fake_sheets.instalar(resultados, usuarios)
+
+    from werkzeug.serving import make_server
+    import app
+
+    app.warm_up()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    servidor = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_port}"
+
+    latencias = defaultdict(list)
+    hasta = time.perf_counter() + args.duracion
+    with ThreadPoolExecutor(max_workers=args.clientes) as pool:
+        for i in range(args.clientes):
+            pool.submit(cliente, base, i, hasta, latencias)
+    servidor.shutdown()
+
+    print(f"\nLatencia inyectada por llamada a Sheets: {args.latencia:.1f} s, "
+          f"llamadas realizadas: {resultados.llamadas + usuarios.llamadas}")
+    print(f"{'ruta':<12} {'peticiones':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'máx (ms)':>10}")
+    for ruta, valores in sorted(latencias.items()):
+        valores.sort()
+        p95 = valores[int(len(valores) * 0.95) - 1] if len(valores) > 1 else valores[0]
+        print(f"{ruta:<12} {len(valores):>10} {statistics.median(valores) * 1000:>10.1f} "
+              f"{p95 * 1000:>10.1f} {valores[-1] * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: resultados de un envío recién hecho sin recargar toda la hoja.
+
+Con el snapshot ya cargado se añade a la hoja falsa la respuesta de un
+email nuevo y se mide cuánto tarda en aparecer su resultado, y cuánto
+tarda la búsqueda de un email que no existe la primera vez y la segunda
+(que ya no llega a la API). Las comprobaciones están en
+tests/test_envio_reciente.py.
+
+Uso:
+    python benchmarks/bench_envio_reciente.py --filas 100000
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+os.environ['SHEETS_CACHE_DIR'] = tempfile.mkdtemp(prefix='bench_envio_')
+os.environ['SHEETS_REFRESH_TTL'] = '0'
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+
+import sheets  # noqa: E402
+
+
+def llamadas(hoja):
+    return hoja.llamadas + hoja.spreadsheet.consultas_drive
+
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        resultado = funcion(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Búsqueda de envíos recientes')
+    parser.add_argument('--filas', type=int, default=100_000)
+    args = parser.parse_args()
+
+    resultados, usuarios = fake_sheets.crear(args.filas)
+    fake_sheets.instalar(resultados, usuarios)
+    _, t_completa = cronometrar(sheets.refrescar_datos, True)
+    sheets.inicializar()
+
+    print(f"\n{args.filas} filas; carga completa: {t_completa:.1f} ms")
+    nuevo = args.filas
+    resultados.append_rows([fake_sheets.fila_resultado(nuevo)])
+
+    antes = llamadas(resultados)
+    resultado, t_reciente = cronometrar(sheets.obtener_resultados_completos, fake_sheets.email(nuevo))
+    print(f"  envío recién hecho {'encontrado' if resultado else 'NO encontrado'} en {t_reciente:.1f} ms "
+          f"({llamadas(resultados) - antes} llamadas a la API; espera máxima {sheets.BUSQUEDA_ESPERA:.0f} s)")
+
+    inexistente = 'nadie@correo.com'
+    antes = llamadas(resultados)
+    _, t_primera = cronometrar(sheets.obtener_resultados_completos, inexistente)
+    _, t_segunda = cronometrar(sheets.obtener_resultados_completos, inexistente)
+    print(f"  email inexistente: {t_primera:.1f} ms la primera vez, {t_segunda:.3f} ms la segunda "
+          f"({llamadas(resultados) - antes} llamadas a la API)")
+
+
+if __name__ == '__main__':
+    main()
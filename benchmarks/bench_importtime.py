@@ -0,0 +1,74 @@
+"""
+Benchmark: costo de `import app`.
+
+Ejecuta `python -X importtime -c "import app"` y reporta el tiempo total
+y los módulos más costosos. Con --ref se mide además otra revisión del
+repositorio (p. ej. la anterior a la carga diferida) en un worktree temporal.
+
+Uso:
+    python benchmarks/bench_importtime.py
+    python benchmarks/bench_importtime.py --ref HEAD~1
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(directorio, repeticiones):
+    """Devuelve (segundos de pared, [(µs acumulados, módulo)]) de la mejor repetición"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import app'],
+            cwd=directorio, capture_output=True, text=True,
+            # Sin credenciales: la versión anterior falla rápido en vez de ir a la red
+            env={**os.environ, 'GOOGLE_CREDENTIALS_JSON': ''},
+        )
+        total = time.perf_counter() - inicio
+        modulos = []
+        for linea in proceso.stderr.splitlines():
+            if not linea.startswith('import time:') or 'cumulative' in linea:
+                continue
+            _, acumulado, modulo = linea[len('import time:'):].split('|')
+            modulos.append((int(acumulado), modulo.strip()))
+        if mejor is None or total < mejor[0]:
+            mejor = (total, modulos)
+    return mejor
+
+
+def reportar(etiqueta, resultado, top):
+    total, modulos = resultado
+    print(f"\n{etiqueta}: {total * 1000:.0f} ms de pared")
+    for acumulado, modulo in sorted(modulos, reverse=True)[:top]:
+        print(f"  {acumulado / 1000:>9.1f} ms  {modulo}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ref', help='Revisión de git con la que comparar')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    reportar('Árbol actual', medir(RAIZ, args.repeticiones), args.top)
+
+    if args.ref:
+        with tempfile.TemporaryDirectory() as temporal:
+            worktree = os.path.join(temporal, 'ref')
+            subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.ref],
+                           cwd=RAIZ, check=True, capture_output=True)
+            try:
+                reportar(args.ref, medir(worktree, args.repeticiones), args.top)
+            finally:
+                subprocess.run(['git', 'worktree', 'remove', '--force', worktree],
+                               cwd=RAIZ, capture_output=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: throughput de login en AuthManager.
+
+Compara el filtrado del DataFrame completo en cada intento (implementación
+anterior) contra el índice de credenciales compilado por AuthManager.build_index.
+
+Uso:
+    python benchmarks/bench_login.py
+"""
+import hmac
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth import AuthManager  # noqa: E402
+
+TAMANOS = [1_000, 10_000, 100_000]
+INTENTOS = 500
+
+
+def generar_usuarios(n):
+    df = pd.DataFrame({
+        'Dirección de correo electrónico': [f"Usuario{i}@correo.com" for i in range(n)],
+        'Contraseña': [100000 + i for i in range(n)],
+        'Nombre completo': [f"Usuario {i}" for i in range(n)],
+    })
+    df['email_normalized'] = df['Dirección de correo electrónico'].str.lower().str.strip()
+    return df
+
+
+def login_escaneo(users_df, email, password):
+    user = users_df[
+        (users_df['email_normalized'] == email.lower().strip()) &
+        (users_df['Contraseña'].astype(str) == str(password))
+    ]
+    return user.iloc[0] if len(user) else None
+
+
+def login_indice(index, email, password):
+    entry = index.get(email.lower().strip())
+    expected = entry[1] if entry is not None else b'\x00'
+    ok = hmac.compare_digest(expected, str(password).encode('utf-8'))
+    return entry[0] if entry is not None and ok else None
+
+
+def medir(funcion, intentos):
+    inicio = time.perf_counter()
+    for email, password in intentos:
+        funcion(email, password)
+    return len(intentos) / (time.perf_counter() - inicio)
+
+
+def main():
+    print(f"{'usuarios':>10} {'escaneo (login/s)':>18} {'índice (login/s)':>18} {'speedup':>10}")
+    for n in TAMANOS:
+        df = generar_usuarios(n)
+        index = AuthManager.build_index(df)
+        # Mitad de intentos correctos, mitad con contraseña equivocada
+        intentos = []
+        for k in range(INTENTOS):
+            i = random.randrange(n)
+            intentos.append((f"usuario{i}@correo.com", 100000 + i if k % 2 else 'incorrecta'))
+
+        escaneo = medir(lambda e, p: login_escaneo(df, e, p), intentos)
+        indice = medir(lambda e, p: login_indice(index, e, p), intentos)
+        print(f"{n:>10} {escaneo:>18.0f} {indice:>18.0f} {indice / escaneo:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: memoria del DataFrame en caché antes y después de compactarlo.
+
+Reporta memory_usage(deep=True) del DataFrame tal como llega de la hoja y
+del resultado de sheets.compactar_dataframe, por columna y en total.
+
+Uso:
+    python benchmarks/bench_memoria.py --filas 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+import sheets  # noqa: E402
+
+MB = 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memoria del DataFrame antes y después de compactar')
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--columnas-extra', type=int, default=20,
+                        help='Columnas de respuestas que la aplicación no lee')
+    args = parser.parse_args()
+
+    hoja, _ = fake_sheets.crear(args.filas, n_usuarios=0)
+    df = pd.DataFrame(hoja.get_all_records())
+    # Las respuestas crudas del formulario que también trae la hoja
+    for i in range(args.columnas_extra):
+        df[f'Pregunta {i + 1}'] = [('Sí', 'No', 'A veces')[(fila + i) % 3] for fila in range(len(df))]
+    df = sheets.normalizar_emails(df)
+
+    inicio = time.perf_counter()
+    compacto = sheets.compactar_dataframe(df)
+    t_compactar = time.perf_counter() - inicio
+
+    antes = df.memory_usage(deep=True)
+    despues = compacto.memory_usage(deep=True)
+    print(f"{'columna':<40} {'antes (MB)':>11} {'después (MB)':>13} {'tipo':>10}")
+    for columna in df.columns:
+        tipo = str(compacto[columna].dtype) if columna in compacto.columns else 'descartada'
+        print(f"{columna:<40} {antes[columna] / MB:>11.2f} {despues.get(columna, 0) / MB:>13.2f} {tipo:>10}")
+    print(f"\n{'TOTAL':<40} {antes.sum() / MB:>11.2f} {despues.sum() / MB:>13.2f}"
+          f"   ({antes.sum() / despues.sum():.1f}x menos, compactado en {t_compactar:.2f} s)")
+
+
+if __name__ == '__main__':
+    main()
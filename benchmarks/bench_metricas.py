@@ -0,0 +1,70 @@
+"""
+Benchmark: costo de la instrumentación de metricas.
+
+Mide cuánto añade cada observación a un histograma (con y sin hilos
+compitiendo por el lock) y cuánto tarda en generarse /metrics, para
+comprobar que la instrumentación puede quedar activa en producción.
+
+Uso:
+    python benchmarks/bench_metricas.py --observaciones 1000000 --hilos 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metricas  # noqa: E402
+
+
+@metricas.cronometrado('bench_seconds', operacion='decorada')
+def funcion_vacia():
+    pass
+
+
+def sin_instrumentar():
+    pass
+
+
+def observar(n):
+    for _ in range(n):
+        metricas.observar('bench_seconds', 0.003, operacion='directa')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Costo de la instrumentación')
+    parser.add_argument('--observaciones', type=int, default=1_000_000)
+    parser.add_argument('--hilos', type=int, default=8)
+    args = parser.parse_args()
+    n = args.observaciones
+
+    inicio = time.perf_counter()
+    for _ in range(n):
+        sin_instrumentar()
+    t_base = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(n):
+        funcion_vacia()
+    t_decorada = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+        for _ in range(args.hilos):
+            pool.submit(observar, n // args.hilos)
+    t_hilos = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    texto = metricas.exponer()
+    t_exponer = time.perf_counter() - inicio
+
+    print(f"{n} observaciones")
+    print(f"  costo por llamada decorada:            {(t_decorada - t_base) / n * 1e6:8.2f} µs")
+    print(f"  observación con {args.hilos} hilos (promedio):   {t_hilos / n * 1e6:8.2f} µs")
+    print(f"  /metrics ({len(texto.splitlines())} líneas):             {t_exponer * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: materialización de resultados fila por fila vs. en lote.
+
+Compara el camino anterior (construir_resultado sobre cada fila) con
+sheets.materializar_resultados, que procesa cada texto distinto una sola vez.
+
+Uso:
+    python benchmarks/bench_procesamiento.py --filas 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+import sheets  # noqa: E402
+
+
+def por_fila(df, indice):
+    filas = df.loc[list(indice.values())].to_dict('records')
+    return {email: sheets.construir_resultado(fila) for email, fila in zip(indice.keys(), filas)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Materialización por fila vs. en lote')
+    parser.add_argument('--filas', type=int, default=100_000)
+    args = parser.parse_args()
+
+    hoja, _ = fake_sheets.crear(args.filas, n_usuarios=0)
+    df = sheets.normalizar_emails(pd.DataFrame(hoja.get_all_records()))
+    indice = sheets.construir_indice_email(df)
+
+    inicio = time.perf_counter()
+    esperado = por_fila(df, indice)
+    t_fila = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtenido = sheets.materializar_resultados(df, indice)
+    t_lote = time.perf_counter() - inicio
+
+    assert obtenido == esperado, "El procesamiento en lote no coincide con el de fila por fila"
+    textos = {id(valor) for resultado in obtenido.values() for valor in resultado[7:]}
+    print(f"{args.filas} filas")
+    print(f"  fila por fila: {t_fila:8.3f} s")
+    print(f"  en lote:       {t_lote:8.3f} s  ({t_fila / t_lote:.1f}x)")
+    print(f"  tuplas de descripciones/carreras distintas en memoria: {len(textos)}")
+
+
+if __name__ == '__main__':
+    main()
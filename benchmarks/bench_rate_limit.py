@@ -0,0 +1,71 @@
+"""
+Benchmark: costo por petición del límite de intentos de login.
+
+Mide RateLimiter.hit con el backend en memoria (con desalojo LRU, usando
+más claves distintas que el límite) y con el backend SQLite compartido,
+y lo compara con un login rechazado completo a través de Flask.
+
+Uso:
+    python benchmarks/bench_rate_limit.py --operaciones 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ['SHEETS_CACHE_DIR'] = ''
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+
+from rate_limit import RateLimiter, MemoryBackend, SQLiteBackend  # noqa: E402
+
+
+def por_operacion(funcion, claves):
+    inicio = time.perf_counter()
+    for clave in claves:
+        funcion(clave)
+    return (time.perf_counter() - inicio) / len(claves) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Costo del límite de intentos de login')
+    parser.add_argument('--operaciones', type=int, default=200_000)
+    parser.add_argument('--claves', type=int, default=50_000, help='Claves distintas (IPs simuladas)')
+    args = parser.parse_args()
+
+    claves = [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(args.claves)]
+    claves = (claves * (args.operaciones // len(claves) + 1))[:args.operaciones]
+
+    memoria = RateLimiter(10, 20, MemoryBackend(max_keys=args.claves // 2))
+    t_memoria = por_operacion(memoria.hit, claves)
+
+    ruta = os.path.join(tempfile.mkdtemp(prefix='bench_rate_'), 'limites.sqlite3')
+    sqlite = RateLimiter(10, 20, SQLiteBackend(ruta))
+    t_sqlite = por_operacion(sqlite.hit, claves[:args.operaciones // 10])
+
+    # Un login rechazado por el límite, de extremo a extremo
+    resultados, usuarios = fake_sheets.crear(10_000)
+    fake_sheets.instalar(resultados, usuarios)
+    import app
+    app.login_por_ip = RateLimiter(1, 1, MemoryBackend())
+    cliente = app.app.test_client()
+    datos = {'email': fake_sheets.email(1), 'password': 'incorrecta'}
+    cliente.post('/login', data=datos)
+    n = 2_000
+    inicio = time.perf_counter()
+    for _ in range(n):
+        assert cliente.post('/login', data=datos).status_code == 429
+    t_peticion = (time.perf_counter() - inicio) / n * 1e6
+
+    print(f"{args.operaciones} operaciones, {args.claves} claves distintas")
+    print(f"  memoria (LRU de {args.claves // 2} claves): {t_memoria:8.2f} µs por intento")
+    print(f"  SQLite compartido:               {t_sqlite:8.2f} µs por intento")
+    print(f"  POST /login rechazado (429):     {t_peticion:8.2f} µs por petición")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: refresco periódico cuando la hoja no cambió.
+
+Sobre las hojas falsas de fake_sheets (que simulan también la fecha de
+modificación de Drive) mide refrescos periódicos (incrementales) de
+resultados y usuarios cuando la hoja no cambió (solo se consulta Drive),
+el de un worker que adopta la verificación reciente de otro (ni eso) y el
+refresco que incorpora una fila nueva. Las comprobaciones están en
+tests/test_refresco.py.
+
+Uso:
+    python benchmarks/bench_refresco.py --filas 100000 --refrescos 50
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+os.environ['SHEETS_CACHE_DIR'] = tempfile.mkdtemp(prefix='bench_refresco_')
+os.environ['SHEETS_REFRESH_TTL'] = '0'
+# Cada revalidación de usuarios consulta Drive (se mide aparte la que no)
+os.environ['SHEETS_USERS_VERIFIED_TTL'] = '0'
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+
+import auth as modulo_auth  # noqa: E402
+import sheets  # noqa: E402
+from auth import AuthManager  # noqa: E402
+
+
+def refrescar(n, funcion):
+    inicio = time.perf_counter()
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        for _ in range(n):
+            funcion()
+    return (time.perf_counter() - inicio) / n * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresco condicional sin cambios en la hoja')
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--refrescos', type=int, default=50)
+    args = parser.parse_args()
+
+    resultados, usuarios = fake_sheets.crear(args.filas)
+    fake_sheets.instalar(resultados, usuarios)
+    drives = (resultados.spreadsheet, usuarios.spreadsheet)
+
+    inicio = time.perf_counter()
+    sheets.refrescar_datos(esperar=True)
+    t_carga = (time.perf_counter() - inicio) * 1000
+    auth = AuthManager()
+
+    lecturas = resultados.llamadas + usuarios.llamadas
+    consultas = sum(drive.consultas_drive for drive in drives)
+
+    print(f"\n{args.filas} filas; carga inicial: {t_carga:.1f} ms")
+    print(f"\nRefrescos sin cambios en la hoja ({args.refrescos} de cada uno):")
+    t_resultados = refrescar(args.refrescos, lambda: sheets.solicitar_refresco(forzar=True).join())
+    t_usuarios = refrescar(args.refrescos, auth.revalidate)
+    print(f"  resultados: {t_resultados:8.3f} ms por refresco")
+    print(f"  usuarios:   {t_usuarios:8.3f} ms por refresco")
+    print(f"  lecturas de la hoja: {resultados.llamadas + usuarios.llamadas - lecturas}, "
+          f"consultas a Drive: {sum(drive.consultas_drive for drive in drives) - consultas}")
+
+    # Con la verificación compartida vigente la revalidación no sale del proceso
+    modulo_auth.VERIFIED_TTL = 60
+    t_seguidor = refrescar(args.refrescos, auth.revalidate)
+    print(f"  usuarios con verificación reciente de otro worker: {t_seguidor:8.3f} ms")
+
+    print("\nSe añade una fila:")
+    resultados.append_rows([fake_sheets.fila_resultado(args.filas)])
+    t_fila = refrescar(1, lambda: sheets.solicitar_refresco(forzar=True).join())
+    print(f"  refresco con una fila nueva: {t_fila:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: generación de informes descargables en un pool de procesos.
+
+Construye un snapshot con las filas sintéticas de fake_sheets y genera
+los informes de todos los usuarios desde cero con distinto número de
+procesos (informes por segundo). Después mide una segunda generación
+sobre los mismos datos (no renderiza nada), la que sigue a cambiar y
+añadir filas (solo esos informes) y la lectura de un informe con
+reportes.obtener. Las comprobaciones están en tests/test_reportes.py.
+
+Uso:
+    python benchmarks/bench_reportes.py --filas 20000 --trabajadores 1,2,4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ['SHEETS_CACHE_DIR'] = ''
+os.environ['REPORTS_DIR'] = tempfile.mkdtemp(prefix='bench_reportes_')
+
+import pandas as pd  # noqa: E402
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+
+import reportes  # noqa: E402
+import sheets  # noqa: E402
+
+
+def vaciar():
+    """Borra los informes en disco y las huellas recordadas: la próxima generación parte de cero"""
+    shutil.rmtree(reportes.DIRECTORIO, ignore_errors=True)
+    os.makedirs(reportes.DIRECTORIO)
+    reportes._huellas = {}
+
+
+def tamano_directorio():
+    return sum(
+        entrada.stat().st_size
+        for subdirectorio in os.scandir(reportes.DIRECTORIO)
+        for entrada in os.scandir(subdirectorio.path)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generación de informes en un pool de procesos')
+    parser.add_argument('--filas', type=int, default=20_000)
+    parser.add_argument('--trabajadores', default='1,2,4', help='Procesos a probar, separados por comas')
+    args = parser.parse_args()
+
+    resultados_hoja, _ = fake_sheets.crear(args.filas)
+    snapshot = sheets.construir_snapshot(pd.DataFrame(resultados_hoja.get_all_records()))
+    resultados = snapshot.resultados
+    print(f"\n{args.filas} filas, {len(resultados)} informes (CPUs disponibles: {os.cpu_count()})")
+
+    print(f"\nGeneración completa (lotes de {reportes.LOTE}):")
+    print(f"  {'procesos':>8} {'segundos':>9} {'informes/s':>11}")
+    for trabajadores in [int(n) for n in args.trabajadores.split(',')]:
+        vaciar()
+        inicio = time.perf_counter()
+        generados = reportes.generar(resultados, trabajadores=trabajadores)
+        segundos = time.perf_counter() - inicio
+        print(f"  {trabajadores:>8} {segundos:>9.2f} {generados / segundos:>11.0f}")
+    print(f"  {len(reportes._listar())} informes en disco ({tamano_directorio() / 1024 ** 2:.1f} MB comprimidos)")
+
+    print("\nGeneración sin cambios en los datos:")
+    inicio = time.perf_counter()
+    generados = reportes.generar(resultados)
+    print(f"  {generados} informes regenerados en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    print("\nUna fila corregida y otra nueva:")
+    email = fake_sheets.email(1)
+    corregida = dict(zip(fake_sheets.COLUMNAS_RESULTADOS, fake_sheets.fila_resultado(1)))
+    corregida['Nombre'] = 'Nombre corregido'
+    nueva = dict(zip(fake_sheets.COLUMNAS_RESULTADOS, fake_sheets.fila_resultado(args.filas)))
+    snapshot = sheets.anexar_filas(snapshot, pd.DataFrame([corregida, nueva]))
+    inicio = time.perf_counter()
+    generados = reportes.generar(snapshot.resultados)
+    print(f"  {generados} informes regenerados en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    inicio = time.perf_counter()
+    reportes.obtener(snapshot.resultados[email])
+    print(f"  informe servido por reportes.obtener en {(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+    shutil.rmtree(reportes.DIRECTORIO, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
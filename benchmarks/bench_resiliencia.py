@@ -0,0 +1,94 @@
+"""
+Escenarios de fallos de la API: reintentos, circuit breaker y cuota.
+
+Sobre las hojas falsas de fake_sheets se inyectan respuestas 429 y 5xx y
+se mide:
+
+    1. cuánto tarda la carga inicial en superar errores transitorios;
+    2. cuántas peticiones se atienden con la API caída (circuito abierto)
+       y cuántas llamadas a la API generan;
+    3. cuánto tarda en recuperarse la siguiente carga al volver la API;
+    4. las esperas que impone la cuota por minuto.
+
+Las comprobaciones están en tests/test_resiliencia.py.
+
+Uso:
+    python benchmarks/bench_resiliencia.py
+"""
+import os
+import sys
+import time
+
+# Esperas cortas para que los escenarios duren segundos
+os.environ['SHEETS_CACHE_DIR'] = ''
+os.environ['SHEETS_REFRESH_TTL'] = '1'
+os.environ['SHEETS_BACKOFF_BASE'] = '0.05'
+os.environ['SHEETS_BACKOFF_MAX'] = '0.2'
+os.environ['SHEETS_RETRIES'] = '3'
+os.environ['SHEETS_BREAKER_FAILURES'] = '4'
+os.environ['SHEETS_BREAKER_TIMEOUT'] = '2'
+os.environ['SHEETS_QUOTA_PER_MINUTE'] = '0'
+
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import fake_sheets  # noqa: E402
+
+import google_client  # noqa: E402
+import sheets  # noqa: E402
+from resiliencia import QuotaTracker  # noqa: E402
+
+
+def esperar_refresco():
+    hilo = sheets._hilo_refresco
+    if hilo is not None:
+        hilo.join()
+
+
+def main():
+    resultados, usuarios = fake_sheets.crear(2_000)
+    fake_sheets.instalar(resultados, usuarios)
+    email = fake_sheets.email(7)
+
+    print("\n1. Errores transitorios (429, 503) en la carga inicial")
+    resultados.fallos = [429, 503]
+    inicio = time.perf_counter()
+    sheets.inicializar()
+    esperar_refresco()
+    print(f"  carga completa tras {resultados.errores} errores en {time.perf_counter() - inicio:.2f} s")
+
+    print("\n2. API caída (503 en todas las llamadas)")
+    resultados.tasa_error = 1.0
+    resultados.append_rows([fake_sheets.fila_resultado(2_000)])
+    time.sleep(1.1)  # el snapshot vence
+    sheets.obtener_snapshot()
+    esperar_refresco()
+    print(f"  circuito {'abierto' if google_client.circuito_abierto() else 'cerrado'} "
+          f"tras {google_client.circuito.failures} fallos")
+    llamadas = resultados.llamadas
+    inicio = time.perf_counter()
+    atendidas = 0
+    while time.perf_counter() - inicio < 1.0:
+        atendidas += sheets.obtener_resultados_completos(email) is not None
+    esperar_refresco()
+    print(f"  {atendidas} peticiones/s atendidas con el snapshot anterior, "
+          f"{resultados.llamadas - llamadas} llamadas a la API")
+
+    print("\n3. La API se recupera")
+    resultados.tasa_error = 0.0
+    time.sleep(google_client.circuito.retry_in() + 0.05)
+    inicio = time.perf_counter()
+    sheets.obtener_snapshot()
+    esperar_refresco()
+    print(f"  filas nuevas cargadas en {time.perf_counter() - inicio:.2f} s tras reabrirse el circuito")
+
+    print("\n4. Cuota por minuto (ventana reducida a 1 s)")
+    cuota = QuotaTracker(per_minute=5, window=1.0)
+    esperas = [cuota.reserve() for _ in range(12)]
+    print(f"  esperas (s) de 12 llamadas con cuota de 5: {', '.join(f'{espera:.2f}' for espera in esperas)}")
+
+    print(f"\nLlamadas totales a la hoja de resultados: {resultados.llamadas} ({resultados.errores} con error)")
+
+
+if __name__ == '__main__':
+    main()
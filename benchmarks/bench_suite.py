@@ -0,0 +1,135 @@
+"""
+Suite de benchmarks de extremo a extremo sobre hojas falsas (pytest-benchmark).
+
+Para cada tamaño de datos genera hojas sintéticas de resultados y usuarios
+(tests/fake_sheets.py, con los nombres de columna reales) y mide:
+
+    carga         descarga + construcción del snapshot (conectar_google_sheets)
+    procesamiento materializar_resultados sobre el DataFrame ya cargado
+    busqueda      obtener_resultados_completos de un email
+    login         AuthManager.authenticate con credenciales válidas
+    dashboard     GET /dashboard completo (con y sin la caché de renderizado)
+
+Los tamaños se eligen con BENCH_SIZES (separados por comas); las consultas
+por medición y las repeticiones de carga, con BENCH_QUERIES y BENCH_LOADS.
+pytest-benchmark guarda los resultados en JSON y compara contra una
+ejecución anterior marcando las regresiones.
+
+Uso:
+    pytest benchmarks/bench_suite.py --benchmark-json benchmarks/resultados/suite.json
+    BENCH_SIZES=1000,10000 pytest benchmarks/bench_suite.py --benchmark-autosave
+    pytest benchmarks/bench_suite.py --benchmark-compare --benchmark-compare-fail=median:25%
+"""
+import os
+import random
+import sys
+
+# Sin copias locales ni recargas automáticas: cada medición parte de cero
+os.environ['SHEETS_CACHE_DIR'] = ''
+os.environ['SHEETS_REFRESH_TTL'] = '0'
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+# Las hojas falsas se comparten con las pruebas
+sys.path.insert(0, os.path.join(RAIZ, 'tests'))
+
+import pytest  # noqa: E402
+
+import fake_sheets  # noqa: E402
+
+import app  # noqa: E402
+import google_client  # noqa: E402
+import sheets  # noqa: E402
+from auth import AuthManager  # noqa: E402
+
+TAMANOS = [int(n) for n in os.getenv('BENCH_SIZES', '1000,10000,100000').split(',')]
+CONSULTAS = int(os.getenv('BENCH_QUERIES', '200'))
+CARGAS = int(os.getenv('BENCH_LOADS', '3'))
+
+
+@pytest.fixture(scope='module', params=TAMANOS, ids=lambda n: f'{n}_filas')
+def filas(request):
+    """Hojas falsas con n filas instaladas y ya cargadas en sheets"""
+    resultados, usuarios = fake_sheets.crear(request.param)
+    fake_sheets.instalar(resultados, usuarios)
+    sheets.reiniciar()
+    sheets.conectar_google_sheets()
+    sheets._inicializado = True
+    yield request.param
+    sheets.reiniciar()
+    google_client.reset()
+
+
+@pytest.fixture(scope='module')
+def usuarios(filas):
+    return AuthManager()
+
+
+def muestra(n):
+    """Filas al azar que se consultan, las mismas en cada ejecución"""
+    azar = random.Random(n)
+    return [azar.randrange(n) for _ in range(CONSULTAS)]
+
+
+def test_carga(benchmark, filas):
+    def descartar():
+        sheets._snapshot = None
+        sheets._sync.reset()
+
+    benchmark.pedantic(sheets.conectar_google_sheets, setup=descartar, rounds=CARGAS)
+    sheets._inicializado = True
+
+
+def test_procesamiento(benchmark, filas):
+    snapshot = sheets.obtener_snapshot()
+    benchmark.pedantic(sheets.materializar_resultados, args=(snapshot.df, snapshot.indice_email), rounds=CARGAS)
+
+
+def test_busqueda(benchmark, filas):
+    consultas = iter(muestra(filas))
+    benchmark.pedantic(
+        sheets.obtener_resultados_completos,
+        setup=lambda: ((fake_sheets.email(next(consultas)),), {}), rounds=CONSULTAS
+    )
+
+
+def test_login(benchmark, filas, usuarios):
+    consultas = iter(muestra(filas))
+
+    def credenciales():
+        i = next(consultas)
+        return (fake_sheets.email(i), fake_sheets.password(i)), {}
+
+    assert benchmark.pedantic(usuarios.authenticate, setup=credenciales, rounds=CONSULTAS) is not None
+
+
+@pytest.mark.parametrize('con_cache', [False, True], ids=['sin_cache', 'con_cache'])
+def test_dashboard(benchmark, filas, usuarios, con_cache, monkeypatch):
+    monkeypatch.setattr(app, '_auth_manager', usuarios)
+    app.dashboard_cache.clear()
+    cliente = app.app.test_client()
+    emails = [fake_sheets.email(i) for i in muestra(filas)]
+
+    def iniciar_sesion(email):
+        with cliente.session_transaction() as sesion:
+            sesion['user_email'] = email
+
+    if con_cache:
+        # Cada dashboard medido ya se renderizó una vez
+        for email in emails:
+            iniciar_sesion(email)
+            cliente.get('/dashboard')
+    consultas = iter(emails)
+
+    def preparar():
+        # Solo se cronometra la petición; preparar la sesión no cuenta
+        if not con_cache:
+            app.dashboard_cache.clear()
+        iniciar_sesion(next(consultas))
+        return (), {}
+
+    def pedir():
+        respuesta = cliente.get('/dashboard')
+        assert respuesta.status_code == 200, respuesta.status_code
+
+    benchmark.pedantic(pedir, setup=preparar, rounds=CONSULTAS)
@@ -0,0 +1,179 @@
+import sqlite3
+import time
+import os
+import snapshot_cache
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Coordina a los workers de gunicorn que comparten el directorio de copias
+# locales (snapshot_cache): cada conjunto de datos tiene un contador de
+# generación que sube con cada descarga, un "líder" temporal que es el
+# único proceso autorizado para descargar de Google Sheets, y el instante
+# de la última vez que el líder confirmó los datos contra la hoja (así los
+# demás no repiten la consulta).
+
+DB_NAME = 'coordinacion.sqlite3'
+
+# Segundos que dura el liderazgo si el proceso muere sin liberarlo
+LIDERAZGO_TTL = int(os.getenv('SHEETS_LEADER_TTL', '120'))
+
+# ============================================
+# CONEXIÓN
+# ============================================
+
+def _habilitado():
+    return bool(snapshot_cache.CACHE_DIR)
+
+def _conectar():
+    snapshot_cache.crear_directorio()
+    conexion = sqlite3.connect(
+        os.path.join(snapshot_cache.CACHE_DIR, DB_NAME), timeout=10, isolation_level=None
+    )
+    conexion.execute('PRAGMA journal_mode=WAL')
+    conexion.execute(
+        'CREATE TABLE IF NOT EXISTS generaciones (nombre TEXT PRIMARY KEY, generacion INTEGER NOT NULL)'
+    )
+    conexion.execute(
+        'CREATE TABLE IF NOT EXISTS lideres (nombre TEXT PRIMARY KEY, pid INTEGER NOT NULL, expira REAL NOT NULL)'
+    )
+    conexion.execute(
+        'CREATE TABLE IF NOT EXISTS verificaciones (nombre TEXT PRIMARY KEY, verificado REAL NOT NULL)'
+    )
+    return conexion
+
+# ============================================
+# GENERACIONES
+# ============================================
+
+def obtener_generacion(nombre):
+    """Devuelve la generación publicada de un conjunto de datos (0 si nunca se publicó)"""
+    if not _habilitado():
+        return 0
+    try:
+        conexion = _conectar()
+        try:
+            fila = conexion.execute(
+                'SELECT generacion FROM generaciones WHERE nombre = ?', (nombre,)
+            ).fetchone()
+        finally:
+            conexion.close()
+        return fila[0] if fila else 0
+    except sqlite3.Error as e:
+        print(f"⚠️ No se pudo leer la generación de '{nombre}': {e}")
+        return 0
+
+def incrementar_generacion(nombre):
+    """
+    Publica una nueva generación; los demás workers recargarán su copia local
+
+    Returns:
+        int: Nueva generación
+    """
+    if not _habilitado():
+        return 0
+    try:
+        conexion = _conectar()
+        try:
+            conexion.execute(
+                'INSERT INTO generaciones (nombre, generacion) VALUES (?, 1) '
+                'ON CONFLICT(nombre) DO UPDATE SET generacion = generacion + 1',
+                (nombre,)
+            )
+            return conexion.execute(
+                'SELECT generacion FROM generaciones WHERE nombre = ?', (nombre,)
+            ).fetchone()[0]
+        finally:
+            conexion.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ No se pudo publicar la generación de '{nombre}': {e}")
+        return 0
+
+# ============================================
+# VERIFICACIONES
+# ============================================
+
+def registrar_verificacion(nombre):
+    """Anota que este proceso acaba de confirmar los datos contra Google Sheets"""
+    if not _habilitado():
+        return
+    try:
+        conexion = _conectar()
+        try:
+            conexion.execute(
+                'INSERT INTO verificaciones (nombre, verificado) VALUES (?, ?) '
+                'ON CONFLICT(nombre) DO UPDATE SET verificado = MAX(verificado, excluded.verificado)',
+                (nombre, time.time())
+            )
+        finally:
+            conexion.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ No se pudo registrar la verificación de '{nombre}': {e}")
+
+def obtener_verificacion(nombre):
+    """
+    Devuelve cuándo se confirmaron por última vez los datos contra Google Sheets
+
+    Returns:
+        float: Instante (time.time()) de la última verificación, o None si no hay
+    """
+    if not _habilitado():
+        return None
+    try:
+        conexion = _conectar()
+        try:
+            fila = conexion.execute(
+                'SELECT verificado FROM verificaciones WHERE nombre = ?', (nombre,)
+            ).fetchone()
+        finally:
+            conexion.close()
+        return fila[0] if fila else None
+    except sqlite3.Error as e:
+        print(f"⚠️ No se pudo leer la verificación de '{nombre}': {e}")
+        return None
+
+# ============================================
+# LIDERAZGO
+# ============================================
+
+def adquirir_liderazgo(nombre):
+    """
+    Intenta convertirse en el único proceso que descarga un conjunto de datos
+
+    Returns:
+        bool: True si este proceso es el líder (o la coordinación está desactivada)
+    """
+    if not _habilitado():
+        return True
+    ahora = time.time()
+    pid = os.getpid()
+    try:
+        conexion = _conectar()
+        try:
+            conexion.execute(
+                'INSERT INTO lideres (nombre, pid, expira) VALUES (?, ?, ?) '
+                'ON CONFLICT(nombre) DO UPDATE SET pid = excluded.pid, expira = excluded.expira '
+                'WHERE lideres.expira < ? OR lideres.pid = excluded.pid',
+                (nombre, pid, ahora + LIDERAZGO_TTL, ahora)
+            )
+            fila = conexion.execute('SELECT pid FROM lideres WHERE nombre = ?', (nombre,)).fetchone()
+        finally:
+            conexion.close()
+        return fila is not None and fila[0] == pid
+    except sqlite3.Error as e:
+        # Sin coordinación es preferible descargar de más que no descargar
+        print(f"⚠️ No se pudo coordinar la descarga de '{nombre}': {e}")
+        return True
+
+def liberar_liderazgo(nombre):
+    if not _habilitado():
+        return
+    try:
+        conexion = _conectar()
+        try:
+            conexion.execute('DELETE FROM lideres WHERE nombre = ? AND pid = ?', (nombre, os.getpid()))
+        finally:
+            conexion.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ No se pudo liberar el liderazgo de '{nombre}': {e}")
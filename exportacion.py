@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+
+# Registros por bloque entregado al cliente
+TAMANO_BLOQUE = 500
+
+CAMPOS = ['fecha', 'nombre', 'email', 'edad', 'genero', 'escolaridad', 'areas',
+          'aptitudes', 'inteligencias', 'kuder', 'carreras']
+CAMPOS_LISTA = ('aptitudes', 'inteligencias', 'kuder', 'carreras')
+
+# Excel y otras hojas de cálculo interpretan como fórmula una celda que empieza así
+INICIOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+def _en_bloques(resultados, serializar):
+    bloque = []
+    for resultado in resultados:
+        bloque.append(serializar(resultado))
+        if len(bloque) >= TAMANO_BLOQUE:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+def celda_segura(valor):
+    """Antepone ' a un texto que una hoja de cálculo ejecutaría como fórmula (p. ej. =HYPERLINK(...))"""
+    valor = str(valor)
+    return "'" + valor if valor.startswith(INICIOS_FORMULA) else valor
+
+def a_csv(resultados):
+    """
+    Serializa resultados como CSV, bloque a bloque. Los textos que una hoja
+    de cálculo tomaría por fórmulas se neutralizan (ver celda_segura)
+
+    Args:
+        resultados: Iterable de ResultadoUsuario
+
+    Yields:
+        str: Fragmentos de CSV (el primero incluye la cabecera)
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def serializar(resultado):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerow([
+            celda_segura(' | '.join(valor.strip() for valor in resultado[i]) if campo in CAMPOS_LISTA else resultado[i])
+            for i, campo in enumerate(CAMPOS)
+        ])
+        return buffer.getvalue()
+
+    # BOM para que Excel abra correctamente los acentos
+    yield '\ufeff' + ','.join(CAMPOS) + '\r\n'
+    yield from _en_bloques(resultados, serializar)
+
+def a_jsonl(resultados):
+    """
+    Serializa resultados como JSON Lines (un objeto por línea), bloque a bloque
+
+    Args:
+        resultados: Iterable de ResultadoUsuario
+
+    Yields:
+        str: Fragmentos de JSONL
+    """
+    def serializar(resultado):
+        return json.dumps(resultado._asdict(), ensure_ascii=False) + '\n'
+
+    yield from _en_bloques(resultados, serializar)
@@ -0,0 +1,169 @@
+import threading
+import time
+import os
+import json
+import metricas
+from resiliencia import CircuitBreaker, QuotaTracker, es_reintentable, estado_http, retry_after, espera_backoff
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+CREDENTIALS_FILE = 'drive-python-446800-fe3f38b5a4b3.json'
+
+# Tiempo máximo (segundos) de cada llamada HTTP a Google; ninguna descarga queda colgada
+TIMEOUT = float(os.getenv('SHEETS_TIMEOUT', '30'))
+
+# Reintentos de una llamada ante errores transitorios (429, 5xx, red) y su backoff (segundos)
+REINTENTOS = int(os.getenv('SHEETS_RETRIES', '4'))
+BACKOFF_BASE = float(os.getenv('SHEETS_BACKOFF_BASE', '1'))
+BACKOFF_MAXIMO = float(os.getenv('SHEETS_BACKOFF_MAX', '32'))
+
+# Fallos consecutivos que abren el circuito y segundos que permanece abierto
+CIRCUITO_FALLOS = int(os.getenv('SHEETS_BREAKER_FAILURES', '5'))
+CIRCUITO_ESPERA = float(os.getenv('SHEETS_BREAKER_TIMEOUT', '60'))
+
+# Llamadas de lectura por minuto que se permiten a este proceso (0 = sin límite)
+CUOTA_POR_MINUTO = int(os.getenv('SHEETS_QUOTA_PER_MINUTE', '60'))
+
+circuito = CircuitBreaker(CIRCUITO_FALLOS, CIRCUITO_ESPERA)
+cuota = QuotaTracker(CUOTA_POR_MINUTO)
+
+class SheetsNoDisponible(Exception):
+    """Google Sheets no respondió: circuito abierto o reintentos agotados"""
+
+# Un único cliente autorizado para todo el proceso. gspread lo construye
+# sobre una AuthorizedSession (requests.Session): las conexiones HTTPS se
+# reutilizan (keep-alive) y el token solo se renueva cuando expira.
+_credentials = None
+_client = None
+_worksheets = {}
+_lock = threading.RLock()
+
+# ============================================
+# CREDENCIALES Y CLIENTE
+# ============================================
+
+def get_credentials():
+    """Obtiene (una sola vez) las credenciales desde variable de entorno (Render) o archivo local"""
+    global _credentials
+    with _lock:
+        if _credentials is None:
+            from oauth2client.service_account import ServiceAccountCredentials
+            creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
+            if creds_json:
+                # Producción (Render)
+                print("🔐 Usando credenciales desde variable de entorno")
+                credentials_dict = json.loads(creds_json)
+                _credentials = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, SCOPE)
+            else:
+                # Desarrollo local
+                print("🔐 Usando credenciales desde archivo local")
+                _credentials = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, SCOPE)
+        return _credentials
+
+def get_client():
+    """Devuelve el cliente de gspread compartido, autorizándolo la primera vez"""
+    global _client
+    with _lock:
+        if _client is None:
+            import gspread
+            _client = gspread.authorize(get_credentials())
+            _client.set_timeout(TIMEOUT)
+        return _client
+
+def get_worksheet(spreadsheet_key=None, spreadsheet_name=None, sheet_name=None, index=0):
+    """
+    Devuelve una worksheet reutilizando el handle ya abierto
+
+    Args:
+        spreadsheet_key: ID del spreadsheet (alternativa a spreadsheet_name)
+        spreadsheet_name: Título del spreadsheet
+        sheet_name: Nombre de la hoja; si se omite se usa la posición index
+        index: Posición de la hoja cuando no se indica sheet_name
+
+    Returns:
+        gspread.Worksheet: Hoja solicitada
+    """
+    clave = (spreadsheet_key, spreadsheet_name, sheet_name, index)
+    with _lock:
+        worksheet = _worksheets.get(clave)
+        if worksheet is None:
+            client = get_client()
+            with metricas.medir('sheets_api_seconds', operacion='open', hoja=sheet_name or index):
+                if spreadsheet_key:
+                    spreadsheet = llamar('open', client.open_by_key, spreadsheet_key)
+                else:
+                    spreadsheet = llamar('open', client.open, spreadsheet_name)
+                if sheet_name:
+                    worksheet = llamar('open', spreadsheet.worksheet, sheet_name)
+                else:
+                    worksheet = llamar('open', spreadsheet.get_worksheet, index)
+            _worksheets[clave] = worksheet
+        return worksheet
+
+# ============================================
+# LLAMADAS A LA API
+# ============================================
+
+def llamar(operacion, funcion, *args, **kwargs):
+    """
+    Ejecuta una llamada a la API respetando la cuota, con reintentos
+    (backoff exponencial con jitter) y a través del circuit breaker
+
+    Args:
+        operacion: Nombre de la operación para métricas y mensajes (p. ej. 'get')
+        funcion: Método de gspread a invocar
+        *args, **kwargs: Argumentos de la llamada
+
+    Returns:
+        object: Lo que devuelva la llamada
+
+    Raises:
+        SheetsNoDisponible: Si el circuito está abierto o se agotaron los reintentos
+        Exception: Los errores no transitorios (p. ej. 403, 404) se propagan tal cual
+    """
+    for intento in range(REINTENTOS + 1):
+        if not circuito.allow():
+            metricas.contar('sheets_rechazos_total', operacion=operacion)
+            raise SheetsNoDisponible(
+                f"circuito abierto, próximo intento en {circuito.retry_in():.0f} s"
+            )
+        espera = cuota.reserve()
+        if espera > 0:
+            metricas.contar('sheets_esperas_cuota_total', operacion=operacion)
+            print(f"⏳ Cuota de Sheets agotada; esperando {espera:.1f} s")
+            time.sleep(espera)
+        try:
+            resultado = funcion(*args, **kwargs)
+        except Exception as e:
+            if not es_reintentable(e):
+                # El servicio respondió: el error es de la petición, no de disponibilidad
+                circuito.record_success()
+                raise
+            circuito.record_failure()
+            motivo = estado_http(e) or type(e).__name__
+            metricas.contar('sheets_errores_total', operacion=operacion, motivo=motivo)
+            if intento == REINTENTOS:
+                raise SheetsNoDisponible(f"{operacion}: {e}") from e
+            espera = max(espera_backoff(intento, BACKOFF_BASE, BACKOFF_MAXIMO), retry_after(e) or 0)
+            print(f"🔁 {operacion} falló ({motivo}); reintento {intento + 1}/{REINTENTOS} en {espera:.1f} s")
+            time.sleep(espera)
+        else:
+            circuito.record_success()
+            return resultado
+
+def circuito_abierto():
+    """True mientras las llamadas a Sheets se rechazan sin intentarse"""
+    return circuito.state == CircuitBreaker.OPEN
+
+metricas.registrar_valor('sheets_circuito_abierto', lambda: int(circuito.state != CircuitBreaker.CLOSED))
+metricas.registrar_valor('sheets_cuota_usada', cuota.used)
+
+def reset():
+    """Descarta el cliente y los handles abiertos (p. ej. tras un error de conexión)"""
+    global _client
+    with _lock:
+        _client = None
+        _worksheets.clear()
@@ -0,0 +1,31 @@
+import os
+import threading
+
+# gunicorn lee este archivo automáticamente desde el directorio de trabajo.
+
+# Workers con hilos: una petición que espera E/S (p. ej. la carga inicial
+# desde Google Sheets) ocupa un hilo, no el worker completo
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+# La app se importa una vez en el proceso maestro y los workers la heredan
+# (importarla no hace E/S; la carga de datos ocurre en post_worker_init)
+preload_app = True
+
+# Todos los workers deben firmar las sesiones con la misma clave. Con
+# preload_app heredan la que genera app.py en el maestro si falta SECRET_KEY,
+# pero las sesiones se pierden en cada reinicio o despliegue; sin preload
+# cada worker generaría la suya y una cookie firmada por uno sería inválida
+# en los demás
+if not os.getenv('SECRET_KEY'):
+    ayuda = 'define la variable de entorno SECRET_KEY (p. ej. python -c "import secrets; print(secrets.token_hex(32))")'
+    if workers > 1 and not preload_app:
+        raise RuntimeError(f'Con varios workers sin preload_app {ayuda}')
+    print(f"⚠️ SECRET_KEY no definida: las sesiones se pierden en cada reinicio; {ayuda} en el entorno del servicio")
+
+def post_worker_init(worker):
+    """Precarga usuarios y resultados en segundo plano al arrancar cada worker"""
+    from app import warm_up
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
@@ -0,0 +1,185 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+import threading
+import time
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Métricas en memoria del proceso, expuestas en formato de texto de
+# Prometheus (/metrics). Con varios workers de gunicorn cada uno publica
+# las suyas; Prometheus las distingue por instancia o las suma.
+
+PREFIJO = 'icathi_'
+
+# Límites superiores (segundos) de las cubetas de los histogramas
+CUBETAS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Texto de ayuda (# HELP) de las métricas conocidas
+AYUDAS = {
+    'http_request_seconds': 'Duración de las peticiones HTTP por endpoint',
+    'plantilla_render_seconds': 'Duración del renderizado de plantillas',
+    'autenticacion_seconds': 'Duración de AuthManager.authenticate',
+    'autenticaciones_total': 'Intentos de login por resultado',
+    'login_limitados_total': 'Intentos de login rechazados por el límite de intentos (429)',
+    'busqueda_resultados_seconds': 'Duración de la búsqueda de resultados de un usuario',
+    'busquedas_resultados_total': 'Búsquedas de resultados por resultado',
+    'busqueda_hoja_seconds': 'Espera de la sincronización lanzada por un email sin resultados',
+    'busquedas_hoja_total': 'Búsquedas en la hoja de emails sin resultados, por resultado',
+    'sheets_api_seconds': 'Duración de las llamadas a la API de Google Sheets',
+    'sheets_errores_total': 'Errores transitorios de la API de Sheets (cada uno se reintenta)',
+    'sheets_rechazos_total': 'Llamadas no realizadas por tener el circuito abierto',
+    'sheets_esperas_cuota_total': 'Llamadas demoradas para respetar la cuota por minuto',
+    'sheets_circuito_abierto': '1 si el circuit breaker de Sheets está abierto o semiabierto',
+    'sheets_cuota_usada': 'Llamadas a Sheets en el último minuto',
+    'carga_seconds': 'Duración de una sincronización completa con Google Sheets',
+    'dashboard_cache_total': 'Consultas a la caché de dashboards renderizados',
+    'reportes_generacion_seconds': 'Duración de la generación de informes tras una carga',
+    'reportes_generados_total': 'Informes generados tras las cargas de la hoja',
+    'reportes_bajo_demanda_total': 'Informes renderizados al pedirlos por no estar generados',
+    'snapshot_edad_seconds': 'Segundos desde la descarga de los datos vigentes',
+    'snapshot_filas': 'Filas de la hoja en los datos vigentes',
+    'snapshot_usuarios': 'Usuarios distintos en los datos vigentes',
+}
+
+_histogramas = {}   # nombre -> {etiquetas: [conteos por cubeta..., suma, total]}
+_contadores = {}    # nombre -> {etiquetas: valor}
+_valores = {}       # nombre -> {etiquetas: función que devuelve el valor actual}
+_tipos = {}
+_lock = threading.Lock()
+
+def _etiquetas(etiquetas):
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+# ============================================
+# REGISTRO
+# ============================================
+
+def observar(nombre, segundos, **etiquetas):
+    """Registra una duración en el histograma `nombre`"""
+    cubeta = bisect_left(CUBETAS, segundos)
+    clave = _etiquetas(etiquetas)
+    with _lock:
+        series = _histogramas.setdefault(nombre, {})
+        datos = series.get(clave)
+        if datos is None:
+            datos = series[clave] = [0] * (len(CUBETAS) + 1) + [0.0, 0]
+        datos[cubeta] += 1
+        datos[-2] += segundos
+        datos[-1] += 1
+
+def contar(nombre, cantidad=1, **etiquetas):
+    """Incrementa el contador `nombre`"""
+    clave = _etiquetas(etiquetas)
+    with _lock:
+        series = _contadores.setdefault(nombre, {})
+        series[clave] = series.get(clave, 0) + cantidad
+
+def registrar_valor(nombre, funcion, tipo='gauge', **etiquetas):
+    """
+    Registra una métrica que se lee en el momento de exponerla
+
+    Args:
+        nombre: Nombre de la métrica
+        funcion: Función sin argumentos; devuelve un número o None (se omite)
+        tipo: 'gauge' o 'counter'
+        etiquetas: Etiquetas de la serie
+    """
+    with _lock:
+        _tipos[nombre] = tipo
+        _valores.setdefault(nombre, {})[_etiquetas(etiquetas)] = funcion
+
+@contextmanager
+def medir(nombre, **etiquetas):
+    """Mide la duración del bloque (también si termina con una excepción)"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+def cronometrado(nombre, **etiquetas):
+    """Decorador equivalente a envolver la función en medir(nombre)"""
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                observar(nombre, time.perf_counter() - inicio, **etiquetas)
+        return envoltura
+    return decorador
+
+# ============================================
+# EXPOSICIÓN
+# ============================================
+
+def _formatear_etiquetas(clave, extra=()):
+    pares = list(clave) + list(extra)
+    if not pares:
+        return ''
+    texto = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pares
+    )
+    return '{' + texto + '}'
+
+def _cabecera(lineas, nombre, tipo):
+    if nombre in AYUDAS:
+        lineas.append(f'# HELP {PREFIJO}{nombre} {AYUDAS[nombre]}')
+    lineas.append(f'# TYPE {PREFIJO}{nombre} {tipo}')
+
+def exponer():
+    """
+    Genera el texto de todas las métricas
+
+    Returns:
+        str: Métricas en formato de texto de Prometheus (versión 0.0.4)
+    """
+    with _lock:
+        histogramas = {nombre: {clave: list(datos) for clave, datos in series.items()}
+                       for nombre, series in _histogramas.items()}
+        contadores = {nombre: dict(series) for nombre, series in _contadores.items()}
+        valores = {nombre: dict(series) for nombre, series in _valores.items()}
+
+    lineas = []
+    for nombre, series in sorted(histogramas.items()):
+        _cabecera(lineas, nombre, 'histogram')
+        for clave, datos in sorted(series.items()):
+            acumulado = 0
+            for limite, n in zip(CUBETAS, datos):
+                acumulado += n
+                lineas.append(f'{PREFIJO}{nombre}_bucket{_formatear_etiquetas(clave, [("le", limite)])} {acumulado}')
+            lineas.append(f'{PREFIJO}{nombre}_bucket{_formatear_etiquetas(clave, [("le", "+Inf")])} {datos[-1]}')
+            lineas.append(f'{PREFIJO}{nombre}_sum{_formatear_etiquetas(clave)} {datos[-2]}')
+            lineas.append(f'{PREFIJO}{nombre}_count{_formatear_etiquetas(clave)} {datos[-1]}')
+
+    for nombre, series in sorted(contadores.items()):
+        _cabecera(lineas, nombre, 'counter')
+        for clave, valor in sorted(series.items()):
+            lineas.append(f'{PREFIJO}{nombre}{_formatear_etiquetas(clave)} {valor}')
+
+    for nombre, series in sorted(valores.items()):
+        leidos = []
+        for clave, funcion in sorted(series.items()):
+            try:
+                valor = funcion()
+            except Exception as e:
+                print(f"⚠️ No se pudo leer la métrica '{nombre}': {e}")
+                continue
+            if valor is not None:
+                leidos.append(f'{PREFIJO}{nombre}{_formatear_etiquetas(clave)} {valor}')
+        if leidos:
+            _cabecera(lineas, nombre, _tipos[nombre])
+            lineas.extend(leidos)
+
+    return '\n'.join(lineas) + '\n'
+
+def reiniciar():
+    """Borra histogramas y contadores (las métricas registradas con registrar_valor se conservan)"""
+    with _lock:
+        _histogramas.clear()
+        _contadores.clear()
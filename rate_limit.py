@@ -0,0 +1,165 @@
+from collections import OrderedDict
+import sqlite3
+import threading
+import time
+import os
+import snapshot_cache
+
+# ============================================
+# BACKENDS
+# ============================================
+
+# Un backend guarda, por clave, el estado de su cubeta de tokens
+# (tokens disponibles, instante de la última actualización) y aplica
+# take() y refund() de forma atómica. MemoryBackend vale para un solo
+# proceso; SQLiteBackend comparte los límites entre los workers de un servidor.
+
+def _take(state, now, rate, capacity):
+    """Recarga la cubeta y consume un token; devuelve (estado nuevo, (permitido, espera))"""
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), (True, 0.0)
+    return (tokens, now), (False, (1 - tokens) / rate)
+
+def _refund(state, now, rate, capacity):
+    """Recarga la cubeta y devuelve un token consumido; devuelve (estado nuevo, None)"""
+    tokens, updated = state if state is not None else (capacity, now)
+    return (min(capacity, tokens + (now - updated) * rate + 1), now), None
+
+
+class MemoryBackend:
+    """Cubetas en memoria con desalojo LRU: como mucho `max_keys` claves"""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, capacity):
+        return self._apply(_take, key, rate, capacity)
+
+    def refund(self, key, rate, capacity):
+        self._apply(_refund, key, rate, capacity)
+
+    def _apply(self, operation, key, rate, capacity):
+        now = time.monotonic()
+        with self._lock:
+            state, result = operation(self._buckets.get(key), now, rate, capacity)
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            # Una cubeta desalojada vuelve llena: se descartan las de uso más antiguo
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return result
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """
+    Cubetas en una base SQLite compartida (modo WAL) por los workers que
+    usan el mismo archivo. Las claves sin uso se purgan periódicamente.
+    """
+
+    def __init__(self, path, max_idle=3600.0, purge_every=1000):
+        self.path = path
+        self.max_idle = max_idle
+        self.purge_every = purge_every
+        self._ops = 0
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            snapshot_cache.crear_directorio(os.path.dirname(self.path) or '.')
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cubetas (clave TEXT PRIMARY KEY, tokens REAL NOT NULL, actualizado REAL NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, rate, capacity):
+        return self._apply(_take, key, rate, capacity)
+
+    def refund(self, key, rate, capacity):
+        self._apply(_refund, key, rate, capacity)
+
+    def _apply(self, operation, key, rate, capacity):
+        # time.time(): el reloj tiene que ser comparable entre procesos
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT tokens, actualizado FROM cubetas WHERE clave = ?', (key,)
+            ).fetchone()
+            state, result = operation(row, now, rate, capacity)
+            connection.execute(
+                'INSERT INTO cubetas (clave, tokens, actualizado) VALUES (?, ?, ?) '
+                'ON CONFLICT(clave) DO UPDATE SET tokens = excluded.tokens, actualizado = excluded.actualizado',
+                (key, state[0], state[1])
+            )
+            self._ops += 1
+            if self._ops % self.purge_every == 0:
+                connection.execute('DELETE FROM cubetas WHERE actualizado < ?', (now - self.max_idle,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return result
+
+# ============================================
+# LIMITADOR
+# ============================================
+
+class RateLimiter:
+    """
+    Limitador por cubeta de tokens: cada clave admite ráfagas de hasta
+    `capacity` intentos y recupera `per_minute` intentos por minuto
+    """
+
+    def __init__(self, per_minute, capacity, backend=None, prefix=''):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.prefix = prefix
+
+    def hit(self, key):
+        """
+        Registra un intento para `key`
+
+        Args:
+            key: Identificador (IP, email normalizado...)
+
+        Returns:
+            tuple: (permitido, segundos hasta el próximo intento permitido)
+        """
+        if self.rate <= 0:
+            return True, 0.0
+        try:
+            return self.backend.take(self.prefix + key, self.rate, self.capacity)
+        except sqlite3.Error as e:
+            # Si el backend compartido falla se deja pasar: el login sigue funcionando
+            print(f"⚠️ No se pudo aplicar el límite de intentos: {e}")
+            return True, 0.0
+
+    def refund(self, key):
+        """
+        Devuelve el token de un intento que no debe contar (p. ej. un login
+        correcto): así el límite solo lo agotan los intentos fallidos, sin
+        dejar de frenar una ráfaga de intentos simultáneos
+
+        Args:
+            key: Identificador usado en hit()
+        """
+        if self.rate <= 0:
+            return
+        try:
+            self.backend.refund(self.prefix + key, self.rate, self.capacity)
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo devolver el intento: {e}")
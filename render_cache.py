@@ -0,0 +1,48 @@
+from collections import OrderedDict
+import threading
+
+class RenderCache:
+    """Caché LRU, segura entre hilos, de páginas ya renderizadas"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Obtiene una página cacheada
+
+        Args:
+            key: Clave hashable (p. ej. (email, versión de los datos))
+
+        Returns:
+            str: HTML cacheado o None si no está
+        """
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def set(self, key, body):
+        """Guarda una página, descartando la usada hace más tiempo si se supera el límite"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,304 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import multiprocessing
+import hashlib
+import json
+import zlib
+import threading
+import time
+import os
+import assets
+import metricas
+import snapshot_cache
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Informe imprimible de cada usuario: un HTML autónomo (estilos incrustados)
+# con el mismo contenido que su dashboard. Tras cada carga de la hoja se
+# generan en un pool de procesos solo los informes que cambiaron. Cada
+# archivo se nombra con el hash de su contenido, así que un informe ya
+# generado se reconoce por el nombre y los workers comparten el directorio
+# sin coordinarse.
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+PLANTILLA = 'reporte.html'
+PLANTILLAS = ('reporte.html', '_resultados.html')
+ESTILOS = ('styles.css', 'dashboard.css', 'reporte.css')
+
+# Directorio de los informes; vacío desactiva la generación (se renderizan al pedirlos)
+DIRECTORIO = os.getenv(
+    'REPORTS_DIR', os.path.join(snapshot_cache.CACHE_DIR, 'reportes') if snapshot_cache.CACHE_DIR else ''
+)
+
+# Procesos que generan los informes tras cada carga (0 = solo bajo demanda)
+TRABAJADORES = int(os.getenv('REPORTS_WORKERS', str(os.cpu_count() or 1)))
+
+# Informes por tarea enviada al pool, y pendientes a partir de los cuales
+# compensa arrancarlo (con menos se generan en el propio hilo de fondo)
+LOTE = int(os.getenv('REPORTS_BATCH', '200'))
+MINIMO_POOL = int(os.getenv('REPORTS_POOL_MIN', '50'))
+
+# Segundos que se conserva un informe que ya no corresponde a ningún
+# resultado vigente de este worker: otro worker con datos más nuevos (o con
+# otra versión de las plantillas, durante un despliegue) puede seguir
+# sirviéndolo, así que solo se borran los que llevan ese tiempo en disco
+EDAD_MAXIMA = float(os.getenv('REPORTS_MAX_AGE', '3600'))
+
+# 'spawn' arranca procesos limpios: no heredan los hilos ni los locks del worker
+METODO_ARRANQUE = os.getenv('REPORTS_START_METHOD', 'spawn')
+
+EXTENSION = '.html.gz'
+
+_plantilla = None
+_version = None
+_compresor = None    # (compresor, bytes ya emitidos, inicio común de los informes)
+_lock_plantilla = threading.Lock()
+
+_huellas = {}        # email -> (ResultadoUsuario, hash) de la última generación
+_procesados = None   # resultados de la última generación
+_pendientes = None   # resultados de la carga más reciente aún sin procesar
+_hilo = None
+_lock = threading.Lock()
+
+# ============================================
+# RENDERIZADO
+# ============================================
+
+def _obtener_plantilla():
+    global _plantilla
+    with _lock_plantilla:
+        if _plantilla is None:
+            import jinja2
+            entorno = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATES_DIR), autoescape=True)
+            entorno.globals['estilos'] = ''.join(assets.obtener(nombre).contenido.decode('utf-8') for nombre in ESTILOS)
+            _plantilla = entorno.get_template(PLANTILLA)
+        return _plantilla
+
+def renderizar(datos):
+    """
+    Renderiza el informe de un usuario
+
+    Args:
+        datos: dict con los campos de ResultadoUsuario
+
+    Returns:
+        str: HTML autónomo del informe
+    """
+    return _obtener_plantilla().render(data=datos)
+
+def version_plantilla():
+    """Hash de las plantillas y estilos del informe: si cambian, cambian todos los hashes"""
+    global _version
+    if _version is None:
+        huella = hashlib.sha256()
+        for nombre in PLANTILLAS:
+            with open(os.path.join(TEMPLATES_DIR, nombre), 'rb') as archivo:
+                huella.update(archivo.read())
+        for nombre in ESTILOS:
+            huella.update(assets.obtener(nombre).contenido)
+        _version = huella.hexdigest()
+    return _version
+
+def huella(resultado):
+    """Hash del contenido del informe de un ResultadoUsuario"""
+    contenido = version_plantilla() + json.dumps(resultado, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+# ============================================
+# ALMACENAMIENTO
+# ============================================
+
+def ruta(hash_informe, directorio=None):
+    return os.path.join(directorio or DIRECTORIO, hash_informe[:2], hash_informe + EXTENSION)
+
+def _comprimir(html):
+    """
+    Comprime un informe con gzip. Todos empiezan igual (los estilos
+    incrustados son la mayor parte del archivo): ese inicio se comprime una
+    vez por proceso y cada informe continúa desde una copia del compresor.
+    """
+    global _compresor
+    contenido = html.encode('utf-8')
+    if _compresor is None:
+        inicio = renderizar({}).encode('utf-8')
+        inicio = inicio[:inicio.index(b'</style>') + len(b'</style>')]
+        compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        _compresor = (compresor, compresor.compress(inicio), inicio)
+    compresor, emitido, inicio = _compresor
+    if not contenido.startswith(inicio):
+        compresor, emitido, inicio = zlib.compressobj(6, zlib.DEFLATED, 31), b'', b''
+    compresor = compresor.copy()
+    return emitido + compresor.compress(contenido[len(inicio):]) + compresor.flush()
+
+def _guardar(directorio, hash_informe, contenido):
+    """Escribe un informe comprimido de forma atómica y legible solo por el propietario"""
+    destino = ruta(hash_informe, directorio)
+    temporal = f'{destino}.{os.getpid()}.{threading.get_ident()}.tmp'
+    banderas = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    try:
+        try:
+            descriptor = os.open(temporal, banderas, 0o600)
+        except FileNotFoundError:
+            # Primer informe de su subdirectorio
+            snapshot_cache.crear_directorio(os.path.dirname(destino))
+            descriptor = os.open(temporal, banderas, 0o600)
+        with os.fdopen(descriptor, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, destino)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+def _listar():
+    """Hashes de los informes que ya están en disco"""
+    existentes = set()
+    if not os.path.isdir(DIRECTORIO):
+        return existentes
+    for subdirectorio in os.scandir(DIRECTORIO):
+        if subdirectorio.is_dir():
+            for entrada in os.scandir(subdirectorio.path):
+                if entrada.name.endswith(EXTENSION):
+                    existentes.add(entrada.name[:-len(EXTENSION)])
+    return existentes
+
+def _generar_lote(directorio, lote):
+    """Tarea de cada proceso del pool: renderiza y guarda una lista de (hash, datos)"""
+    for hash_informe, datos in lote:
+        _guardar(directorio, hash_informe, _comprimir(renderizar(datos)))
+    return len(lote)
+
+# ============================================
+# GENERACIÓN
+# ============================================
+
+def generar(resultados, trabajadores=None):
+    """
+    Genera los informes que faltan para los resultados de una carga y
+    borra los que ya no corresponden a ningún resultado vigente y tienen
+    más de EDAD_MAXIMA segundos.
+
+    Args:
+        resultados: dict email -> ResultadoUsuario (Snapshot.resultados)
+        trabajadores: Procesos del pool (por defecto TRABAJADORES)
+
+    Returns:
+        int: Informes generados
+    """
+    global _huellas
+    trabajadores = trabajadores or TRABAJADORES
+    anteriores = _huellas
+    huellas = {}
+    for email, resultado in resultados.items():
+        # Las cargas incrementales conservan los ResultadoUsuario que no
+        # cambiaron: si es el mismo objeto no se recalcula su hash
+        previo = anteriores.get(email)
+        huellas[email] = previo if previo is not None and previo[0] is resultado else (resultado, huella(resultado))
+    _huellas = huellas
+
+    existentes = _listar()
+    faltantes = [(hash_informe, resultado._asdict())
+                 for resultado, hash_informe in huellas.values() if hash_informe not in existentes]
+    if faltantes:
+        with metricas.medir('reportes_generacion_seconds'):
+            if len(faltantes) < MINIMO_POOL:
+                _generar_lote(DIRECTORIO, faltantes)
+            else:
+                lotes = [faltantes[i:i + LOTE] for i in range(0, len(faltantes), LOTE)]
+                contexto = multiprocessing.get_context(METODO_ARRANQUE)
+                with ProcessPoolExecutor(max_workers=trabajadores, mp_context=contexto) as pool:
+                    for _ in pool.map(partial(_generar_lote, DIRECTORIO), lotes):
+                        pass
+        metricas.contar('reportes_generados_total', len(faltantes))
+
+    vigentes = {hash_informe for _, hash_informe in huellas.values()}
+    _purgar(existentes - vigentes)
+    return len(faltantes)
+
+def _purgar(obsoletos):
+    """
+    Borra los informes obsoletos para este worker que llevan más de
+    EDAD_MAXIMA segundos en disco. Los más recientes pueden ser de otro
+    worker que ya cargó datos nuevos; si alguno borrado aún se pide, se
+    vuelve a renderizar (ver obtener).
+    """
+    limite = time.time() - EDAD_MAXIMA
+    for hash_informe in obsoletos:
+        destino = ruta(hash_informe)
+        try:
+            if os.stat(destino).st_mtime < limite:
+                os.remove(destino)
+        except FileNotFoundError:
+            pass
+
+def _procesar_pendientes():
+    global _pendientes, _procesados, _hilo
+    while True:
+        with _lock:
+            resultados, _pendientes = _pendientes, None
+            if resultados is None:
+                _hilo = None
+                return
+        try:
+            print(f"🖨️ Generados {generar(resultados)} informes de {len(resultados)} resultados")
+            _procesados = resultados
+        except Exception as e:
+            # Los informes que falten se generan al pedirlos
+            print(f"⚠️ No se pudieron generar los informes: {e}")
+
+def programar(resultados):
+    """
+    Encola la generación de informes para los resultados de una carga.
+    Corre en un hilo de fondo; si ya hay una en curso, al terminar se
+    procesan solo los resultados más recientes.
+
+    Args:
+        resultados: dict email -> ResultadoUsuario (Snapshot.resultados)
+    """
+    global _pendientes, _hilo
+    if not DIRECTORIO or TRABAJADORES <= 0 or resultados is _procesados:
+        return
+    with _lock:
+        _pendientes = resultados
+        if _hilo is None:
+            _hilo = threading.Thread(target=_procesar_pendientes, name='reportes', daemon=True)
+            _hilo.start()
+
+def esperar():
+    """Bloquea hasta que termine la generación en curso (p. ej. en benchmarks)"""
+    hilo = _hilo
+    if hilo is not None:
+        hilo.join()
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def obtener(resultado):
+    """
+    Devuelve el informe de un usuario: el pregenerado si existe o, si no,
+    se renderiza en el momento (y se guarda para los siguientes).
+
+    Args:
+        resultado: ResultadoUsuario
+
+    Returns:
+        tuple: (HTML comprimido con gzip, hash del contenido)
+    """
+    hash_informe = huella(resultado)
+    if DIRECTORIO:
+        try:
+            with open(ruta(hash_informe), 'rb') as archivo:
+                return archivo.read(), hash_informe
+        except FileNotFoundError:
+            pass
+    metricas.contar('reportes_bajo_demanda_total')
+    contenido = _comprimir(renderizar(resultado._asdict()))
+    if DIRECTORIO:
+        try:
+            _guardar(DIRECTORIO, hash_informe, contenido)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el informe: {e}")
+    return contenido, hash_informe
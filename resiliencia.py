@@ -0,0 +1,168 @@
+from collections import deque
+import random
+import threading
+import time
+
+# ============================================
+# CLASIFICACIÓN DE ERRORES
+# ============================================
+
+# Respuestas HTTP de Google que vale la pena reintentar
+ESTADOS_REINTENTABLES = {408, 429, 500, 502, 503, 504}
+
+def estado_http(error):
+    """Código HTTP de un error de gspread/requests, o None si no viene de una respuesta"""
+    respuesta = getattr(error, 'response', None)
+    return getattr(respuesta, 'status_code', None)
+
+def es_reintentable(error):
+    """
+    Indica si un error es transitorio (cuota, error del servidor o de red)
+
+    Args:
+        error: Excepción lanzada por la llamada
+
+    Returns:
+        bool: True si conviene reintentar
+    """
+    estado = estado_http(error)
+    if estado is not None:
+        return estado in ESTADOS_REINTENTABLES
+    try:
+        import requests
+    except ImportError:
+        return False
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+def retry_after(error):
+    """Segundos indicados por la cabecera Retry-After de la respuesta, si los hay"""
+    respuesta = getattr(error, 'response', None)
+    valor = getattr(respuesta, 'headers', {}).get('Retry-After') if respuesta is not None else None
+    try:
+        return float(valor) if valor is not None else None
+    except ValueError:
+        return None
+
+def espera_backoff(intento, base, maximo, azar=random):
+    """Backoff exponencial con jitter completo: uniforme entre 0 y base·2^intento (acotado)"""
+    return azar.uniform(0, min(maximo, base * (2 ** intento)))
+
+# ============================================
+# CIRCUIT BREAKER
+# ============================================
+
+class CircuitBreaker:
+    """
+    Corta las llamadas a un servicio que está fallando.
+
+    Tras `max_failures` fallos consecutivos el circuito se abre y las
+    llamadas se rechazan sin intentarse durante `reset_timeout` segundos.
+    Después se deja pasar una sola llamada de prueba (semiabierto): si
+    funciona el circuito se cierra, si falla vuelve a abrirse.
+    """
+
+    CLOSED = 'cerrado'
+    OPEN = 'abierto'
+    HALF_OPEN = 'semiabierto'
+
+    def __init__(self, max_failures=5, reset_timeout=60.0):
+        self.max_failures = max_failures
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self.opened_at is None:
+            return self.CLOSED
+        if now - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """
+        Indica si se puede intentar una llamada ahora
+
+        Returns:
+            bool: False mientras el circuito está abierto o ya hay una llamada de prueba en curso
+        """
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def retry_in(self):
+        """Segundos que faltan para la próxima llamada de prueba (0 si el circuito está cerrado)"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.max_failures:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+# ============================================
+# CUOTA POR MINUTO
+# ============================================
+
+class QuotaTracker:
+    """
+    Cuenta las llamadas de la última ventana (60 s) para no exceder la
+    cuota de la API: reserve() indica cuánto esperar antes de la siguiente.
+    """
+
+    def __init__(self, per_minute=60, window=60.0):
+        self.per_minute = per_minute
+        self.window = window
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        while self._calls and now - self._calls[0] >= self.window:
+            self._calls.popleft()
+
+    def used(self):
+        """Llamadas hechas en la ventana actual"""
+        with self._lock:
+            self._purge(time.monotonic())
+            return len(self._calls)
+
+    def reserve(self):
+        """
+        Reserva un lugar para una llamada
+
+        Returns:
+            float: Segundos que hay que esperar antes de hacerla (0 si hay cuota)
+        """
+        if self.per_minute <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._purge(now)
+            if len(self._calls) < self.per_minute:
+                self._calls.append(now)
+                return 0.0
+            # La llamada ocupa el lugar que libera la más antigua de la ventana
+            start = self._calls[len(self._calls) - self.per_minute] + self.window
+            self._calls.append(start)
+            return start - now
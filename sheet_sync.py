@@ -0,0 +1,144 @@
+import os
+import metricas
+import google_client
+
+# Sincronización incremental activada por defecto; SHEETS_SYNC_INCREMENTAL=0 la desactiva
+INCREMENTAL = os.getenv('SHEETS_SYNC_INCREMENTAL', '1') != '0'
+
+# Antes de leer la hoja se consulta la fecha de modificación del archivo en
+# Drive; SHEETS_CHANGE_PROBE=0 deja solo la comprobación de cabecera y filas
+SONDEO_DRIVE = os.getenv('SHEETS_CHANGE_PROBE', '1') != '0'
+
+
+def _recortar(fila):
+    """Quita las celdas vacías del final para comparar filas sin importar el relleno"""
+    fila = [str(valor) for valor in (fila or [])]
+    while fila and fila[-1] == '':
+        fila.pop()
+    return fila
+
+
+class SheetSync:
+    """
+    Sincroniza una hoja de solo-anexado (respuestas de formulario)
+    descargando únicamente las filas nuevas desde la última carga.
+
+    Recuerda la cabecera, el número de filas de datos ya cargadas y la
+    última fila leída. En cada sincronización pide la cabecera y el rango
+    que empieza en esa última fila: si alguna de las dos cambió (columnas
+    nuevas, filas borradas o editadas) se hace una recarga completa.
+
+    Con el sondeo de Drive activo se consulta primero la fecha de
+    modificación del archivo: si no cambió no se lee la hoja, y si cambió
+    sin filas nuevas es que se editaron filas anteriores (recarga completa).
+    Una edición hecha a la vez que llegan filas nuevas, o sin el sondeo de
+    Drive, solo se detecta si toca la última fila; la recarga forzada
+    (completa=True) lo cubre siempre.
+    """
+
+    def __init__(self, incremental=INCREMENTAL, drive_probe=SONDEO_DRIVE):
+        self.incremental = incremental
+        self.drive_probe = drive_probe
+        self.reset()
+
+    def reset(self):
+        """Olvida el estado; la siguiente sincronización será completa"""
+        self.header = None
+        self.row_count = 0
+        self.last_row = None
+        self.modified_time = None
+
+    def get_state(self):
+        """Estado serializable para retomar la sincronización tras reiniciar"""
+        return {
+            'header': self.header, 'row_count': self.row_count, 'last_row': self.last_row,
+            'modified_time': self.modified_time
+        }
+
+    def set_state(self, state):
+        self.header = state['header']
+        self.row_count = state['row_count']
+        self.last_row = state['last_row']
+        self.modified_time = state.get('modified_time')
+
+    def _modified_time(self, worksheet):
+        """Fecha de modificación del archivo según Drive, o None si no se puede consultar"""
+        if not self.drive_probe:
+            return None
+        try:
+            with metricas.medir('sheets_api_seconds', operacion='modified_time', hoja=worksheet.title):
+                return google_client.llamar('modified_time', worksheet.spreadsheet.get_lastUpdateTime)
+        except google_client.SheetsNoDisponible:
+            raise
+        except Exception as e:
+            # Sin acceso a la API de Drive se sigue con la comprobación de filas
+            print(f"⚠️ No se pudo consultar la fecha de modificación en Drive; se desactiva el sondeo: {e}")
+            self.drive_probe = False
+            return None
+
+    def fetch(self, worksheet, completa=False):
+        """
+        Descarga los registros pendientes de la hoja
+
+        Args:
+            worksheet: Worksheet de gspread
+            completa: Descarga la hoja entera aunque se pudiera sincronizar solo lo nuevo
+
+        Returns:
+            tuple: (registros, completa) donde registros es una lista de dicts
+                   como los de get_all_records y completa indica si son todas
+                   las filas de la hoja (True) o solo las nuevas (False).
+                   ([], False) significa que la hoja no cambió.
+        """
+        # La fecha se consulta antes de leer: un cambio durante la lectura se verá la próxima vez
+        if completa or not self.incremental or self.header is None or self.row_count == 0:
+            return self._fetch_full(worksheet, self._modified_time(worksheet)), True
+
+        modificado = self._modified_time(worksheet)
+        if modificado is not None and modificado == self.modified_time:
+            return [], False
+
+        from gspread.utils import rowcol_to_a1
+        ultima_columna = rowcol_to_a1(1, len(self.header))[:-1]
+        with metricas.medir('sheets_api_seconds', operacion='batch_get', hoja=worksheet.title):
+            cabecera, filas = google_client.llamar(
+                'batch_get', worksheet.batch_get, ['1:1', f'A{self.row_count + 1}:{ultima_columna}']
+            )
+        cabecera = cabecera[0] if cabecera else []
+
+        if _recortar(cabecera) != _recortar(self.header):
+            print("🔁 La cabecera de la hoja cambió; recarga completa")
+            return self._fetch_full(worksheet, modificado), True
+        if not filas or _recortar(filas[0]) != _recortar(self.last_row):
+            print("🔁 La hoja tiene menos filas o fue editada; recarga completa")
+            return self._fetch_full(worksheet, modificado), True
+
+        nuevas = filas[1:]
+        if not nuevas and modificado is not None:
+            print("🔁 La hoja se modificó sin filas nuevas (edición); recarga completa")
+            return self._fetch_full(worksheet, modificado), True
+        if nuevas:
+            self.row_count += len(nuevas)
+            self.last_row = nuevas[-1]
+        self.modified_time = modificado
+        return self._to_records(nuevas), False
+
+    def _fetch_full(self, worksheet, modificado=None):
+        with metricas.medir('sheets_api_seconds', operacion='get', hoja=worksheet.title):
+            valores = google_client.llamar('get', worksheet.get, pad_values=True)
+        if not valores or valores == [[]]:
+            self.reset()
+            return []
+        self.header = valores[0]
+        self.modified_time = modificado
+        filas = valores[1:]
+        self.row_count = len(filas)
+        self.last_row = filas[-1] if filas else None
+        return self._to_records(filas)
+
+    def _to_records(self, filas):
+        """Mismo formato que get_all_records: filas rellenadas y valores numéricos convertidos"""
+        from gspread.utils import numericise_all, to_records
+        ancho = len(self.header)
+        filas = [list(fila[:ancho]) + [''] * (ancho - len(fila)) for fila in filas]
+        return to_records(self.header, [numericise_all(fila) for fila in filas])
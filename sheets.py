@@ -1,94 +1,587 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import pandas as pd
 from datetime import datetime
+from collections import OrderedDict, namedtuple
+import threading
+import time
 import os
-import json
+import google_client
+import snapshot_cache
+import coordinacion
+import analitica
+import metricas
+import reportes
+from sheet_sync import SheetSync
 
 # ============================================
 # CONFIGURACIÓN
 # ============================================
 
 SPREADSHEET_NAME = 'Resultados de Orientación vocacional'
-SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+SCOPE = google_client.SCOPE
+SNAPSHOT_LOCAL = 'resultados'
 
-_cached_df = None
-_last_update = None
+# Segundos que un snapshot se considera fresco; <= 0 desactiva el refresco automático
+REFRESH_TTL = int(os.getenv('SHEETS_REFRESH_TTL', '300'))
+
+# Segundos que la primera petición espera la descarga inicial si no hay copia local
+INICIO_ESPERA = float(os.getenv('SHEETS_INIT_WAIT', '10'))
+
+# Cada cuántos segundos se consulta si otro worker publicó una generación nueva
+GENERACION_INTERVALO = float(os.getenv('SHEETS_GENERATION_CHECK', '2'))
+
+# ...y cada cuántos mientras una búsqueda espera la descarga de otro worker
+GENERACION_SONDEO = 0.1
+
+# Ante un email sin resultados (p. ej. alguien que acaba de enviar el
+# formulario) se sincronizan las filas nuevas esperando como mucho
+# BUSQUEDA_ESPERA segundos a que se publiquen; si sigue sin aparecer no se
+# vuelve a buscar durante AUSENTE_TTL segundos
+BUSQUEDA_ESPERA = float(os.getenv('SHEETS_MISS_WAIT', '5'))
+AUSENTE_TTL = float(os.getenv('SHEETS_MISS_TTL', '60'))
+AUSENTES_MAXIMO = 10000
+
+# Formato de la marca temporal de Google Forms en la columna 'Fecha'
+FORMATO_FECHA = '%d/%m/%Y %H:%M:%S'
+
+# Todo lo derivado de una carga de la hoja viaja junto en un solo objeto,
+# de modo que reemplazarlo es una única asignación atómica
+# actualizado es la versión de los datos (cambia solo si cambian); verificado,
+# la última vez que se confirmó contra la hoja que siguen vigentes; conteos,
+# los conteos completos de los que salen las estadísticas (ver analitica)
+Snapshot = namedtuple('Snapshot', [
+    'df', 'indice_email', 'resultados', 'estadisticas', 'conteos', 'actualizado', 'verificado', 'cargado_en'
+])
+
+class Recarga:
+    """
+    Resultado de una recarga en segundo plano, visible antes de que termine:
+    publicada se activa en cuanto publica sus datos (o acaba sin publicar),
+    descargada indica si llegó a leer la hoja y sin_liderazgo si no lo hizo
+    porque otro worker estaba descargando
+    """
+
+    def __init__(self):
+        self.publicada = threading.Event()
+        self.descargada = False
+        self.sin_liderazgo = False
+
+_snapshot = None
+_hilo_refresco = None
+_refresco_forzado = False   # el hilo de _hilo_refresco descarga aunque el snapshot no esté vencido
+_refresco_completo = False  # ...y descarga la hoja entera, no solo las filas nuevas
+_recarga = None             # Recarga de _hilo_refresco
+_lock_refresco = threading.Lock()
+_lock_descarga = threading.Lock()
+_sync = SheetSync()
+_generacion = 0
+_proxima_consulta_generacion = 0.0
+_inicializado = False
+_lock_inicializacion = threading.Lock()
+_ausentes = OrderedDict()   # email -> instante (monotonic) hasta el que no se vuelve a buscar
+_lock_ausentes = threading.Lock()
+
+# Registro inmutable con los resultados ya procesados de un usuario
+ResultadoUsuario = namedtuple('ResultadoUsuario', [
+    'fecha', 'nombre', 'email', 'edad', 'genero', 'escolaridad', 'areas',
+    'aptitudes', 'inteligencias', 'kuder', 'carreras'
+])
 
 # ============================================
 # CREDENCIALES
 # ============================================
 
 def get_credentials():
-    """Obtiene credenciales desde variable de entorno (Render) o archivo local"""
-    creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
-    
-    if creds_json:
-        # Producción (Render)
-        print("🔐 Usando credenciales desde variable de entorno")
-        credentials_dict = json.loads(creds_json)
-        return ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, SCOPE)
-    else:
-        # Desarrollo local
-        print("🔐 Usando credenciales desde archivo local")
-        return ServiceAccountCredentials.from_json_keyfile_name(
-            'drive-python-446800-fe3f38b5a4b3.json', 
-            SCOPE
-        )
+    """Obtiene las credenciales compartidas (ver google_client)"""
+    return google_client.get_credentials()
 
 # ============================================
 # CONEXIÓN
 # ============================================
 
-def conectar_google_sheets():
-    global _cached_df, _last_update
+def conectar_google_sheets(completa=False, recarga=None):
+    """
+    Sincroniza la hoja, construye un snapshot nuevo y lo publica de forma atómica.
+    Tras la primera carga solo se descargan las filas añadidas desde la anterior.
+
+    Args:
+        completa: Descarga la hoja entera (recoge ediciones de cualquier fila)
+        recarga: Recarga que se marca como descargada y publicada en cuanto
+            el snapshot se publica, antes de guardar la copia local
+    """
+    import pandas as pd
+    global _snapshot, _generacion
+    with _lock_descarga, metricas.medir('carga_seconds', datos=SNAPSHOT_LOCAL):
+        try:
+            print("📊 Conectando con Google Sheets...")
+            sheet = google_client.get_worksheet(spreadsheet_name=SPREADSHEET_NAME, index=0)
+            data, completa = _sync.fetch(sheet, completa=completa)
+
+            if not completa and not data and _snapshot is not None:
+                # La hoja no cambió: no se reconstruye, ni se guarda, ni se avisa a otros workers
+                _snapshot = _snapshot._replace(verificado=datetime.now(), cargado_en=time.monotonic())
+                _marcar_publicada(recarga)
+                coordinacion.registrar_verificacion(SNAPSHOT_LOCAL)
+                print(f"✅ Sin cambios en Google Sheets: {len(_snapshot.df)} registros")
+                # Solo hace algo si los informes aún no se generaron para estos resultados
+                reportes.programar(_snapshot.resultados)
+                return _snapshot.df
+
+            if completa or _snapshot is None:
+                _snapshot = construir_snapshot(pd.DataFrame(data))
+            else:
+                _snapshot = anexar_filas(_snapshot, pd.DataFrame(data))
+            _marcar_publicada(recarga)
+            df = _snapshot.df
+            print(f"✅ Conectado exitosamente: {len(df)} registros encontrados")
+            guardar_snapshot_local(_snapshot)
+            _generacion = coordinacion.incrementar_generacion(SNAPSHOT_LOCAL)
+            coordinacion.registrar_verificacion(SNAPSHOT_LOCAL)
+            reportes.programar(_snapshot.resultados)
+            return df
+        except google_client.SheetsNoDisponible as e:
+            # Error transitorio ya reintentado: se sigue sirviendo el snapshot
+            # anterior y el estado de sincronización sigue siendo válido
+            print(f"⚠️ Google Sheets no disponible, se conservan los datos anteriores: {e}")
+            return None
+        except Exception as e:
+            # Si falla se conserva el snapshot anterior y la próxima carga será completa
+            _sync.reset()
+            google_client.reset()
+            print(f"❌ Error al conectar con Google Sheets: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+def guardar_snapshot_local(snapshot):
+    """Persiste el snapshot y el estado de sincronización para el próximo arranque"""
+    datos = snapshot._asdict()
+    del datos['cargado_en']
+    snapshot_cache.guardar(SNAPSHOT_LOCAL, {'snapshot': datos, 'sync': _sync.get_state()})
+
+def cargar_snapshot_local():
+    """
+    Publica la copia local guardada por la última carga exitosa, si existe.
+
+    Returns:
+        bool: True si se cargó un snapshot
+    """
+    global _snapshot, _generacion
+    # La generación se lee antes que el archivo: como mucho se recargará de nuevo
+    generacion = coordinacion.obtener_generacion(SNAPSHOT_LOCAL)
+    datos = snapshot_cache.cargar(SNAPSHOT_LOCAL)
+    if datos is None:
+        return False
+    # La antigüedad de la copia se conserva para que el TTL siga contando desde la descarga
+    antiguedad = max(0.0, (datetime.now() - datos['snapshot']['verificado']).total_seconds())
+    with _lock_descarga:
+        _sync.set_state(datos['sync'])
+        _snapshot = Snapshot(cargado_en=time.monotonic() - antiguedad, **datos['snapshot'])
+        _generacion = generacion
+    print(f"💾 Copia local cargada: {len(_snapshot.df)} registros del {_snapshot.actualizado:%Y-%m-%d %H:%M:%S}")
+    return True
+
+def normalizar_emails(df):
+    if 'Dirección de correo electrónico' in df.columns:
+        df['email_normalized'] = df['Dirección de correo electrónico'].str.lower().str.strip()
+    return df
+
+def compactar_dataframe(df):
+    """
+    Reduce la memoria del DataFrame en caché: descarta las columnas que la
+    aplicación no lee y convierte en categóricas las columnas de texto muy
+    repetidas (género, escolaridad, áreas, descripciones, carreras), de modo
+    que cada texto distinto se guarda una sola vez.
+    """
+    df = df[[columna for columna in df.columns if columna in COLUMNAS_USADAS]].copy()
+    for columna in df.columns:
+        serie = df[columna]
+        if serie.dtype == object and serie.nunique(dropna=False) <= len(serie) * UMBRAL_CATEGORICA:
+            df[columna] = serie.astype('category')
+    return df
+
+def unir_filas_nuevas(df, nuevas):
+    """
+    Añade filas nuevas a un DataFrame ya compactado sin volver a compactarlo:
+    las nuevas se recortan a sus columnas y, en las categóricas, sus textos se
+    codifican con las categorías existentes (más las que falten). Solo se
+    recorren las filas nuevas; las anteriores se copian tal cual.
+    """
+    import numpy as np
+    import pandas as pd
+    if len(df.columns) == 0:
+        return compactar_dataframe(nuevas.reset_index(drop=True))
+    nuevas = nuevas.reindex(columns=df.columns)
+    indice = pd.RangeIndex(len(df) + len(nuevas))
+    columnas = {}
+    for columna in df.columns:
+        anterior, nueva = df[columna], nuevas[columna]
+        if isinstance(anterior.dtype, pd.CategoricalDtype):
+            categorias = anterior.cat.categories
+            faltantes = pd.Index(nueva.dropna().unique())
+            faltantes = faltantes[~faltantes.isin(categorias)]
+            if len(faltantes):
+                categorias = categorias.append(faltantes)
+            codigos = np.concatenate([anterior.cat.codes.to_numpy(), categorias.get_indexer(nueva)])
+            valores = pd.Categorical.from_codes(codigos, dtype=pd.CategoricalDtype(categorias))
+            columnas[columna] = pd.Series(valores, index=indice)
+        else:
+            columnas[columna] = pd.concat([anterior, nueva], ignore_index=True)
+    # Sin consolidar bloques: cada columna queda en su propio array
+    return pd.concat(columnas, axis=1, copy=False)
+
+def construir_snapshot(df):
+    df = compactar_dataframe(normalizar_emails(df))
+    indice = construir_indice_email(df)
+    conteos = analitica.contar(df, indice)
+    ahora = datetime.now()
+    return Snapshot(
+        df=df,
+        indice_email=indice,
+        resultados=materializar_resultados(df, indice),
+        estadisticas=analitica.resumir(conteos),
+        conteos=conteos,
+        actualizado=ahora,
+        verificado=ahora,
+        cargado_en=time.monotonic()
+    )
+
+def anexar_filas(snapshot, nuevas):
+    """
+    Incorpora filas recién añadidas a un snapshot existente. Solo se
+    compactan las filas nuevas y se recalculan el índice, los resultados y
+    los conteos de los emails afectados.
+    """
+    if nuevas.empty:
+        return snapshot._replace(verificado=datetime.now(), cargado_en=time.monotonic())
+
+    df = unir_filas_nuevas(snapshot.df, normalizar_emails(nuevas))
+    nuevas = df.iloc[len(snapshot.df):]
+
+    # Para cada email afectado compiten su fila vigente y las nuevas
+    emails = set(nuevas['email_normalized']) if 'email_normalized' in nuevas.columns else set()
+    vigentes = [snapshot.indice_email[email] for email in emails if email in snapshot.indice_email]
+    cambios = construir_indice_email(df.loc[vigentes + list(nuevas.index)])
+
+    # Los conteos restan las filas que dejan de ser vigentes y suman las que pasan a serlo
+    anteriores = snapshot.indice_email
+    retiradas = [anteriores[email] for email, fila in cambios.items() if anteriores.get(email, fila) != fila]
+    agregadas = [fila for email, fila in cambios.items() if anteriores.get(email) != fila]
+    conteos = analitica.actualizar(snapshot.conteos, df, retiradas, agregadas, len(snapshot.df))
+
+    indice = dict(snapshot.indice_email)
+    indice.update(cambios)
+    resultados = dict(snapshot.resultados)
+    resultados.update(materializar_resultados(df, cambios))
+    ahora = datetime.now()
+    return Snapshot(
+        df=df,
+        indice_email=indice,
+        resultados=resultados,
+        estadisticas=analitica.resumir(conteos),
+        conteos=conteos,
+        actualizado=ahora,
+        verificado=ahora,
+        cargado_en=time.monotonic()
+    )
+
+def vencido(snapshot):
+    return REFRESH_TTL > 0 and time.monotonic() - snapshot.cargado_en > REFRESH_TTL
+
+def hay_generacion_nueva():
+    """Consulta (como mucho cada GENERACION_INTERVALO segundos) si otro worker publicó datos"""
+    global _proxima_consulta_generacion
+    ahora = time.monotonic()
+    if ahora < _proxima_consulta_generacion:
+        return False
+    _proxima_consulta_generacion = ahora + GENERACION_INTERVALO
+    return coordinacion.obtener_generacion(SNAPSHOT_LOCAL) > _generacion
+
+def adoptar_verificacion():
+    """
+    Si otro worker confirmó contra Sheets hace menos de REFRESH_TTL segundos
+    que los datos de la generación actual siguen vigentes, se da el snapshot
+    por verificado en ese instante en lugar de volver a consultar Drive.
+
+    Returns:
+        bool: True si el snapshot quedó fresco con la verificación compartida
+    """
+    global _snapshot
+    verificado = coordinacion.obtener_verificacion(SNAPSHOT_LOCAL)
+    if verificado is None:
+        return False
+    antiguedad = max(0.0, time.time() - verificado)
+    with _lock_descarga:
+        if _snapshot is None or antiguedad >= REFRESH_TTL or coordinacion.obtener_generacion(SNAPSHOT_LOCAL) != _generacion:
+            return False
+        _snapshot = _snapshot._replace(
+            verificado=datetime.fromtimestamp(verificado), cargado_en=time.monotonic() - antiguedad
+        )
+    return True
+
+def _marcar_publicada(recarga):
+    if recarga is not None:
+        recarga.descargada = True
+        recarga.publicada.set()
+
+def revalidar(forzar=False, completa=False, recarga=None):
+    """
+    Trae la versión más reciente de los datos: desde la copia local si otro
+    worker ya la descargó, o desde Sheets si este worker obtiene el liderazgo.
+    Sin forzar, una verificación reciente de otro worker evita la consulta.
+
+    Args:
+        forzar: Descarga de Sheets aunque el snapshot no esté vencido
+        completa: Descarga la hoja entera en lugar de solo las filas nuevas
+        recarga: Recarga donde se anota el resultado (ver conectar_google_sheets)
+    """
+    forzar = forzar or completa
+    if coordinacion.obtener_generacion(SNAPSHOT_LOCAL) > _generacion:
+        cargar_snapshot_local()
+    if not forzar and _snapshot is not None and (not vencido(_snapshot) or adoptar_verificacion()):
+        return
+    if not coordinacion.adquirir_liderazgo(SNAPSHOT_LOCAL):
+        # Otro worker está descargando; su generación se verá en la próxima consulta
+        if recarga is not None:
+            recarga.sin_liderazgo = True
+        return
     try:
-        print("📊 Conectando con Google Sheets...")
-        creds = get_credentials()
-        client = gspread.authorize(creds)
-        sheet = client.open(SPREADSHEET_NAME).get_worksheet(0)
-        data = sheet.get_all_records() 
-        df = pd.DataFrame(data)
-        
-        if 'Dirección de correo electrónico' in df.columns:
-            df['email_normalized'] = df['Dirección de correo electrónico'].str.lower().str.strip()
-        
-        _cached_df = df
-        _last_update = datetime.now()
-        print(f"✅ Conectado exitosamente: {len(df)} registros encontrados")
-        return df
-    except Exception as e:
-        print(f"❌ Error al conectar con Google Sheets: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+        conectar_google_sheets(completa=completa, recarga=recarga)
+    finally:
+        coordinacion.liberar_liderazgo(SNAPSHOT_LOCAL)
+
+def solicitar_refresco(forzar=False, completa=False):
+    """
+    Lanza la recarga en un hilo de fondo. Si ya hay una en curso no se
+    inicia otra: las peticiones concurrentes comparten la misma descarga.
+    Una recarga forzada no se conforma con una normal en curso (que puede
+    terminar sin descargar), ni una completa con una incremental, ni
+    ninguna con una que ya publicó sus datos (solo le falta guardar la
+    copia local): se encadenan detrás de ella.
+
+    Returns:
+        threading.Thread: Hilo que realiza (o ya realizaba) la recarga
+    """
+    return _solicitar_refresco(forzar, completa)[0]
+
+def _solicitar_refresco(forzar=False, completa=False):
+    """
+    Como solicitar_refresco, pero devuelve también su Recarga: quien solo
+    necesita los datos no espera a que se guarde la copia local
+    """
+    global _hilo_refresco, _refresco_forzado, _refresco_completo, _recarga
+    forzar = forzar or completa
+    with _lock_refresco:
+        anterior = _hilo_refresco
+        if anterior is not None and anterior.is_alive():
+            cubre = (_refresco_forzado or not forzar) and (_refresco_completo or not completa)
+            if cubre and not _recarga.publicada.is_set():
+                return anterior, _recarga
+        else:
+            anterior = None
+        recarga = Recarga()
+
+        def tarea():
+            try:
+                if anterior is not None:
+                    anterior.join()
+                revalidar(forzar, completa, recarga)
+            finally:
+                recarga.publicada.set()
+
+        _hilo_refresco = threading.Thread(target=tarea, name='sheets-refresco', daemon=True)
+        _refresco_forzado = forzar
+        _refresco_completo = completa
+        _recarga = recarga
+        _hilo_refresco.start()
+        return _hilo_refresco, recarga
+
+def inicializar():
+    """
+    Carga inicial de los datos (warm-up). Importar el módulo no hace E/S:
+    esto se ejecuta una sola vez, en el primer uso o al arrancar el servidor.
+    """
+    global _inicializado
+    with _lock_inicializacion:
+        if _inicializado:
+            return
+        print("🚀 Inicializando módulo de Google Sheets...")
+        if cargar_snapshot_local():
+            # Se sirve la copia local y se revalida contra Sheets en segundo plano
+            solicitar_refresco()
+        else:
+            # Sin copia local la descarga también corre en segundo plano; se
+            # espera un tiempo acotado y después se responde con lo que haya
+            solicitar_refresco(forzar=True).join(INICIO_ESPERA)
+        _inicializado = True
+
+def obtener_snapshot():
+    """
+    Devuelve el snapshot vigente sin bloquear nunca en la API de Sheets.
+    Si está vencido, no existe u otro worker publicó una generación nueva
+    se solicita una recarga en segundo plano y mientras tanto se sigue
+    sirviendo el anterior.
+    """
+    if not _inicializado:
+        inicializar()
+    snapshot = _snapshot
+    # Con el circuito abierto un snapshot vencido se sigue sirviendo sin lanzar descargas
+    if snapshot is None or hay_generacion_nueva() or (vencido(snapshot) and not google_client.circuito_abierto()):
+        solicitar_refresco()
+    return snapshot
 
 def obtener_dataframe():
-    global _cached_df
-    if _cached_df is None:
-        _cached_df = conectar_google_sheets()
-    return _cached_df
+    snapshot = obtener_snapshot()
+    return snapshot.df if snapshot is not None else None
+
+def refrescar_datos(esperar=False):
+    """
+    Solicita una recarga completa de la hoja (incluye ediciones de filas
+    anteriores). Al publicarse la nueva generación todos los workers
+    recargan su copia.
 
-def refrescar_datos():
-    global _cached_df
-    _cached_df = None
-    df = conectar_google_sheets()
-    return df is not None
+    Args:
+        esperar: Si es True bloquea hasta que termine la descarga
+
+    Returns:
+        bool: True si la recarga quedó en curso (o terminó bien con esperar=True)
+    """
+    anterior = _snapshot
+    hilo = solicitar_refresco(completa=True)
+    if not esperar:
+        return True
+    hilo.join()
+    return _snapshot is not anterior
 
 # ============================================
 # BÚSQUEDA
 # ============================================
 
+def parsear_fechas(fechas):
+    """
+    Convierte una columna 'Fecha' a datetime. Primero se prueba el formato
+    fijo de Google Forms, que es mucho más rápido; solo las filas que no lo
+    siguen (editadas a mano, sin hora...) se parsean con format='mixed'.
+
+    Args:
+        fechas: Serie de textos
+
+    Returns:
+        pd.Series: datetime con el mismo índice (NaT si no se reconoce)
+    """
+    import pandas as pd
+    resultado = pd.to_datetime(fechas, errors='coerce', format=FORMATO_FECHA)
+    restantes = resultado.isna() & fechas.notna()
+    if restantes.any():
+        resultado[restantes] = pd.to_datetime(fechas[restantes], errors='coerce', dayfirst=True, format='mixed')
+    return resultado
+
+def construir_indice_email(df):
+    """
+    Construye un índice email_normalized -> etiqueta de fila.
+    Si un email aparece varias veces gana la 'Fecha' más reciente;
+    en empate (o fecha ilegible) gana la última fila de la hoja.
+    """
+    if df is None or df.empty or 'email_normalized' not in df.columns:
+        return {}
+    emails = df['email_normalized']
+    emails = emails[emails.notna() & (emails != '')]
+    # dict() conserva el último valor de cada clave: la última fila de la hoja
+    indice = dict(zip(emails, emails.index))
+    if 'Fecha' in df.columns:
+        # Solo se parsean las fechas de los emails repetidos
+        repetidos = emails[emails.duplicated(keep=False)]
+        if not repetidos.empty:
+            fechas = parsear_fechas(df.loc[repetidos.index, 'Fecha'])
+            orden = fechas.sort_values(kind='stable', na_position='first').index
+            indice.update(zip(repetidos.loc[orden], orden))
+    return indice
+
 def buscar_usuario_por_email(email):
-    df = obtener_dataframe()
-    if df is None or df.empty:
+    snapshot = obtener_snapshot()
+    if snapshot is None or snapshot.df.empty:
         return None
     email_normalized = email.lower().strip()
-    resultado = df[df['email_normalized'] == email_normalized]
-    if len(resultado) == 0:
-        print(f"⚠️ No se encontraron resultados para: {email}")
+    fila = snapshot.indice_email.get(email_normalized)
+    if fila is None:
+        snapshot = buscar_envio_reciente(email_normalized)
+        if snapshot is None:
+            print(f"⚠️ No se encontraron resultados para: {email}")
+            return None
+        fila = snapshot.indice_email[email_normalized]
+    return snapshot.df.loc[fila]
+
+def buscar_envio_reciente(email_normalized):
+    """
+    Busca en la hoja un email que no está en el snapshot, para quien acaba de
+    enviar el formulario. Las respuestas se anexan al final de la hoja, así
+    que basta la sincronización incremental (solo las filas nuevas, o nada
+    si Drive indica que el archivo no cambió); la fila queda en el snapshot
+    y sus índices para todos. Si otro worker tiene el liderazgo se espera a
+    que publique su generación. Solo las búsquedas que leyeron la hoja sin
+    éxito se recuerdan durante AUSENTE_TTL segundos, para no repetir
+    llamadas a la API.
+
+    Args:
+        email_normalized: Email en minúsculas y sin espacios
+
+    Returns:
+        Snapshot: Snapshot que ya contiene el email, o None si no se encontró
+    """
+    if not email_normalized:
         return None
-    return resultado.iloc[0]
+    if _ausente_reciente(email_normalized):
+        metricas.contar('busquedas_hoja_total', resultado='omitida')
+        return None
+    if google_client.circuito_abierto():
+        return None
+
+    limite = time.monotonic() + BUSQUEDA_ESPERA
+    with metricas.medir('busqueda_hoja_seconds'):
+        _, recarga = _solicitar_refresco(forzar=True)
+        recarga.publicada.wait(BUSQUEDA_ESPERA)
+        if recarga.sin_liderazgo:
+            _esperar_generacion(email_normalized, limite)
+    snapshot = _snapshot
+    if snapshot is not None and email_normalized in snapshot.indice_email:
+        metricas.contar('busquedas_hoja_total', resultado='encontrado')
+        return snapshot
+    metricas.contar('busquedas_hoja_total', resultado='no_encontrado')
+    if recarga.descargada:
+        # Sin descarga propia (otro líder, Sheets no disponible) no se sabe si
+        # el email está en la hoja: la próxima petición vuelve a buscarlo
+        _recordar_ausente(email_normalized)
+    return None
+
+def _esperar_generacion(email_normalized, limite):
+    """
+    Espera hasta `limite` (time.monotonic()) a que otro worker publique una
+    generación con el email, cargando cada generación nueva de la copia local
+    """
+    while time.monotonic() < limite:
+        if coordinacion.obtener_generacion(SNAPSHOT_LOCAL) > _generacion:
+            cargar_snapshot_local()
+        snapshot = _snapshot
+        if snapshot is not None and email_normalized in snapshot.indice_email:
+            return
+        time.sleep(min(GENERACION_SONDEO, max(0.0, limite - time.monotonic())))
+
+def _ausente_reciente(email_normalized):
+    """True si el email se buscó sin éxito hace menos de AUSENTE_TTL segundos"""
+    with _lock_ausentes:
+        expira = _ausentes.get(email_normalized)
+        if expira is None:
+            return False
+        if time.monotonic() < expira:
+            return True
+        del _ausentes[email_normalized]
+        return False
+
+def _recordar_ausente(email_normalized):
+    """Anota una búsqueda sin éxito; se olvidan las más antiguas pasado AUSENTES_MAXIMO"""
+    with _lock_ausentes:
+        _ausentes[email_normalized] = time.monotonic() + AUSENTE_TTL
+        _ausentes.move_to_end(email_normalized)
+        while len(_ausentes) > AUSENTES_MAXIMO:
+            _ausentes.popitem(last=False)
 
 def obtener_datos_basicos(usuario):
     if usuario is None:
@@ -108,6 +601,7 @@ def obtener_datos_basicos(usuario):
 # ============================================
 
 def formatear_carreras(a1, a2, a3, a4):
+    import pandas as pd
     carreras = []
     def procesar_columna(columna):
         if pd.notna(columna) and str(columna).strip():
@@ -137,6 +631,7 @@ def obtener_carreras_usuario(usuario):
 # ============================================
 
 def procesar_descripcion(texto):
+    import pandas as pd
     if pd.isna(texto) or not str(texto).strip():
         return ['Sin información disponible']
     texto_str = str(texto).strip()
@@ -172,42 +667,227 @@ def obtener_descripciones_usuario(usuario):
 # FUNCIÓN PRINCIPAL
 # ============================================
 
-def obtener_resultados_completos(email):
-    usuario = buscar_usuario_por_email(email)
-    if usuario is None:
-        return None
+def construir_resultado(usuario):
     datos_basicos = obtener_datos_basicos(usuario)
     descripciones = obtener_descripciones_usuario(usuario)
     carreras = obtener_carreras_usuario(usuario)
+    return ResultadoUsuario(
+        fecha=datos_basicos['fecha'],
+        nombre=datos_basicos['nombre'],
+        email=datos_basicos['email'],
+        edad=datos_basicos['edad'],
+        genero=datos_basicos['genero'],
+        escolaridad=datos_basicos['escolaridad'],
+        areas=datos_basicos['areas'],
+        aptitudes=tuple(descripciones['aptitudes']),
+        inteligencias=tuple(descripciones['inteligencias']),
+        kuder=tuple(descripciones['kuder']),
+        carreras=tuple(carreras)
+    )
+
+# ============================================
+# PROCESAMIENTO EN LOTE
+# ============================================
+
+COLUMNAS_BASICAS = ['Fecha', 'Nombre', 'Dirección de correo electrónico', 'Edad', 'Genero', 'Escolaridad', 'Areas']
+COLUMNAS_DESCRIPCION = ['Descripción_Aptitudes_intereses', 'Descripción_Inteligencias_Multiples', 'Descripción_Test_de_Kuder']
+COLUMNAS_CARRERAS = ['A1', 'A2', 'A3', 'A4']
+SIN_CARRERAS = ('No se especificaron carreras',)
+COLUMNAS_USADAS = ['email_normalized'] + COLUMNAS_BASICAS + COLUMNAS_DESCRIPCION + COLUMNAS_CARRERAS
+
+# Una columna de texto pasa a categórica si tiene a lo sumo esta proporción de valores distintos
+UMBRAL_CATEGORICA = 0.5
+
+def _tiene_texto(valor):
+    import pandas as pd
+    return pd.notna(valor) and bool(str(valor).strip())
+
+def _items_carrera(valor):
+    """Carreras de una sola columna A1-A4 (tupla vacía si no hay)"""
+    return tuple(formatear_carreras(valor, None, None, None)) if _tiene_texto(valor) else ()
+
+def procesar_columna_en_lote(columna, procesar):
+    """
+    Aplica `procesar` una sola vez por cada valor distinto de la columna.
+    Las filas con el mismo texto comparten la misma tupla resultante, de
+    modo que las descripciones repetidas se guardan una sola vez.
+
+    Returns:
+        list: Una tupla por fila, en el orden de la columna
+    """
+    import pandas as pd
+    codigos, unicos = pd.factorize(columna, use_na_sentinel=False)
+    procesados = [tuple(procesar(valor)) for valor in unicos]
+    return [procesados[codigo] for codigo in codigos]
+
+def materializar_resultados(df, indice):
+    """
+    Procesa una sola vez (por carga de la hoja) la fila vigente de cada email.
+    Trabaja por columnas: cada texto distinto de descripciones y carreras se
+    procesa una vez y el resultado se comparte entre todas las filas.
+    """
+    if df is None or not indice:
+        return {}
+    filas = df.loc[list(indice.values())]
+    n = len(filas)
+
+    def columna(nombre, procesar=None, faltante=''):
+        if nombre not in filas.columns:
+            return [faltante] * n
+        if procesar is None:
+            return filas[nombre].astype(object).astype(str).tolist()
+        return procesar_columna_en_lote(filas[nombre], procesar)
+
+    basicos = [columna(nombre) for nombre in COLUMNAS_BASICAS]
+    sin_informacion = tuple(procesar_descripcion(''))
+    descripciones = [
+        columna(nombre, procesar_descripcion, sin_informacion) for nombre in COLUMNAS_DESCRIPCION
+    ]
+
+    # Las combinaciones A1-A4 también se repiten: se reutiliza la misma tupla
+    carreras = []
+    combinaciones = {}
+    for partes in zip(*[columna(nombre, _items_carrera, ()) for nombre in COLUMNAS_CARRERAS]):
+        total = sum(partes, ()) or SIN_CARRERAS
+        carreras.append(combinaciones.setdefault(total, total))
+
     return {
-        'fecha': datos_basicos['fecha'],
-        'nombre': datos_basicos['nombre'],
-        'email': datos_basicos['email'],
-        'edad': datos_basicos['edad'],
-        'genero': datos_basicos['genero'],
-        'escolaridad': datos_basicos['escolaridad'],
-        'areas': datos_basicos['areas'],
-        'aptitudes': descripciones['aptitudes'],
-        'inteligencias': descripciones['inteligencias'],
-        'kuder': descripciones['kuder'],
-        'carreras': carreras
+        email: ResultadoUsuario._make(campos)
+        for email, campos in zip(indice.keys(), zip(*basicos, *descripciones, carreras))
     }
 
+@metricas.cronometrado('busqueda_resultados_seconds')
+def obtener_resultados_con_version(email):
+    """
+    Devuelve el resultado de un usuario junto con la fecha del snapshot del
+    que proviene, leídos del mismo snapshot (sirve como versión para cachés).
+
+    Returns:
+        tuple: (ResultadoUsuario o None, datetime o None)
+    """
+    snapshot = obtener_snapshot()
+    if snapshot is None:
+        return None, None
+    email_normalized = email.lower().strip()
+    resultado = snapshot.resultados.get(email_normalized)
+    if resultado is None:
+        reciente = buscar_envio_reciente(email_normalized)
+        if reciente is not None:
+            snapshot = reciente
+            resultado = snapshot.resultados[email_normalized]
+    if resultado is None:
+        metricas.contar('busquedas_resultados_total', resultado='no_encontrado')
+        print(f"⚠️ No se encontraron resultados para: {email}")
+    else:
+        metricas.contar('busquedas_resultados_total', resultado='encontrado')
+    return resultado, snapshot.actualizado
+
+def obtener_resultados_completos(email):
+    return obtener_resultados_con_version(email)[0]
+
+# ============================================
+# EXPORTACIÓN
+# ============================================
+
+def _igual(columna, valor):
+    return columna.astype(str).str.strip().str.casefold() == valor.strip().casefold()
+
+def filtrar_resultados(escolaridad=None, genero=None, desde=None, hasta=None, areas=None):
+    """
+    Recorre los resultados vigentes (uno por email) que cumplen los filtros.
+    Los filtros se evalúan sobre columnas completas del DataFrame y los
+    registros se entregan uno a uno, sin construir la lista completa.
+
+    Args:
+        escolaridad: Escolaridad exacta (sin distinguir mayúsculas)
+        genero: Género exacto (sin distinguir mayúsculas)
+        desde: datetime; solo envíos con 'Fecha' >= desde
+        hasta: datetime; solo envíos con 'Fecha' < hasta
+        areas: Texto que debe contener la columna 'Areas'
+
+    Yields:
+        ResultadoUsuario: Resultado de cada usuario que cumple los filtros
+    """
+    import pandas as pd
+    snapshot = obtener_snapshot()
+    if snapshot is None or snapshot.df.empty or not snapshot.indice_email:
+        return
+    df = snapshot.df
+
+    mascara = pd.Series(False, index=df.index)
+    mascara[list(snapshot.indice_email.values())] = True
+    if escolaridad and 'Escolaridad' in df.columns:
+        mascara &= _igual(df['Escolaridad'], escolaridad)
+    if genero and 'Genero' in df.columns:
+        mascara &= _igual(df['Genero'], genero)
+    if areas and 'Areas' in df.columns:
+        mascara &= df['Areas'].astype(str).str.contains(areas.strip(), case=False, regex=False)
+    if (desde or hasta) and 'Fecha' in df.columns:
+        # Solo se parsean las fechas de las filas que siguen en la máscara
+        fechas = parsear_fechas(df.loc[mascara, 'Fecha'])
+        dentro = fechas.notna()
+        if desde:
+            dentro &= fechas >= desde
+        if hasta:
+            dentro &= fechas < hasta
+        mascara.loc[fechas.index] = dentro
+
+    resultados = snapshot.resultados
+    for email in df.loc[mascara, 'email_normalized']:
+        yield resultados[email]
+
 # ============================================
 # UTILIDADES
 # ============================================
 
+def datos_cargados():
+    """True cuando ya hay un snapshot que servir; antes, 'sin resultados' no significa nada"""
+    return obtener_snapshot() is not None
+
 def obtener_total_registros():
     df = obtener_dataframe()
     return len(df) if df is not None else 0
 
+def obtener_estadisticas():
+    """Estadísticas agregadas precalculadas en la última carga (ver analitica)"""
+    snapshot = obtener_snapshot()
+    return snapshot.estadisticas if snapshot is not None else analitica.ESTADISTICAS_VACIAS
+
 def obtener_ultima_actualizacion():
-    return _last_update
+    """Última vez que se confirmó contra Google Sheets que los datos están al día"""
+    return _snapshot.verificado if _snapshot is not None else None
+
+def reiniciar():
+    """Descarta el snapshot en memoria y el estado de sincronización (p. ej. entre pruebas)"""
+    global _snapshot, _hilo_refresco, _generacion, _proxima_consulta_generacion, _inicializado
+    hilo = _hilo_refresco
+    if hilo is not None:
+        hilo.join()
+    with _lock_descarga:
+        _snapshot = None
+        _hilo_refresco = None
+        _sync.reset()
+        _generacion = 0
+        _proxima_consulta_generacion = 0.0
+        _inicializado = False
+    with _lock_ausentes:
+        _ausentes.clear()
 
 def listar_columnas():
     df = obtener_dataframe()
     return list(df.columns) if df is not None else []
 
+def _leer_snapshot(funcion):
+    """Lee un valor del snapshot vigente para /metrics sin disparar cargas"""
+    def leer():
+        snapshot = _snapshot
+        return funcion(snapshot) if snapshot is not None else None
+    return leer
+
+metricas.registrar_valor('snapshot_edad_seconds', _leer_snapshot(lambda s: time.monotonic() - s.cargado_en), datos=SNAPSHOT_LOCAL)
+metricas.registrar_valor('snapshot_filas', _leer_snapshot(lambda s: len(s.df)), datos=SNAPSHOT_LOCAL)
+metricas.registrar_valor('snapshot_usuarios', _leer_snapshot(lambda s: len(s.resultados)), datos=SNAPSHOT_LOCAL)
+
 def diagnostico():
     print("\n" + "="*60)
     print("🔍 DIAGNÓSTICO DE GOOGLE SHEETS")
@@ -219,10 +899,6 @@ def diagnostico():
     print(f"\n✅ Conexión exitosa")
     print(f"📊 Total de registros: {len(df)}")
     print(f"📋 Total de columnas: {len(df.columns)}")
-    print(f"🕐 Última actualización: {_last_update}")
+    print(f"🗜️ Memoria del DataFrame: {df.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB")
+    print(f"🕐 Última actualización: {obtener_ultima_actualizacion()}")
     print("\n" + "="*60 + "\n")
-
-# Inicialización
-print("🚀 Inicializando módulo de Google Sheets...")
-conectar_google_sheets()
-
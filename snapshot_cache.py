@@ -0,0 +1,103 @@
+import pickle
+import stat
+import os
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Directorio donde se guardan las copias locales; SHEETS_CACHE_DIR vacío las desactiva
+CACHE_DIR = os.getenv('SHEETS_CACHE_DIR', '.sheets_cache')
+
+# Se incrementa cuando cambia la estructura de lo que se guarda;
+# los archivos con otra versión se ignoran
+FORMAT_VERSION = 4
+MAGIC = 'icathi-snapshot'
+
+# ============================================
+# LECTURA / ESCRITURA
+# ============================================
+
+def crear_directorio(ruta=None):
+    """
+    Crea un directorio de datos privado (por defecto CACHE_DIR): tanto él
+    como los padres que falten quedan accesibles solo para el usuario del
+    proceso. Si ya existía con otros permisos se corrigen; el directorio de
+    trabajo no se toca.
+
+    Args:
+        ruta: Directorio a crear (por defecto CACHE_DIR)
+    """
+    ruta = os.path.abspath(ruta or CACHE_DIR)
+    if ruta == os.getcwd():
+        return
+    if not os.path.isdir(ruta):
+        padre = os.path.dirname(ruta)
+        if padre != ruta and not os.path.isdir(padre):
+            crear_directorio(padre)
+        os.makedirs(ruta, mode=0o700, exist_ok=True)
+    if stat.S_IMODE(os.stat(ruta).st_mode) != 0o700:
+        try:
+            os.chmod(ruta, 0o700)
+        except OSError as e:
+            print(f"⚠️ No se pudieron restringir los permisos de {ruta}: {e}")
+
+def _ruta(nombre):
+    return os.path.join(CACHE_DIR, f'{nombre}.pkl')
+
+def guardar(nombre, datos):
+    """
+    Guarda una copia local de los datos de forma atómica. El archivo solo
+    lo puede leer el usuario del proceso: la copia de usuarios incluye
+    las contraseñas
+
+    Args:
+        nombre: Identificador del archivo (sin extensión)
+        datos: Objeto serializable con pickle
+
+    Returns:
+        bool: True si se guardó correctamente
+    """
+    if not CACHE_DIR:
+        return False
+    ruta = _ruta(nombre)
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    try:
+        crear_directorio()
+        descriptor = os.open(temporal, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'wb') as archivo:
+            # La cabecera va en un pickle aparte para validarla sin leer los datos
+            pickle.dump((MAGIC, FORMAT_VERSION), archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(datos, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+        return True
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar la copia local '{nombre}': {e}")
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        return False
+
+def cargar(nombre):
+    """
+    Lee una copia local guardada con guardar()
+
+    Args:
+        nombre: Identificador del archivo (sin extensión)
+
+    Returns:
+        object: Los datos guardados, o None si no existe o no es compatible
+    """
+    if not CACHE_DIR:
+        return None
+    ruta = _ruta(nombre)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, 'rb') as archivo:
+            if pickle.load(archivo) != (MAGIC, FORMAT_VERSION):
+                print(f"⚠️ Copia local '{nombre}' con versión incompatible; se ignora")
+                return None
+            return pickle.load(archivo)
+    except Exception as e:
+        print(f"⚠️ No se pudo leer la copia local '{nombre}': {e}")
+        return None
@@ -0,0 +1,65 @@
+"""
+Configuración compartida de las pruebas.
+
+La configuración de los módulos se lee de variables de entorno al
+importarlos, así que se fija aquí antes de cualquier import de la
+aplicación. Las hojas de Google se sustituyen por las hojas en memoria de
+fake_sheets.py, que comparten los benchmarks.
+"""
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+os.environ['SHEETS_CACHE_DIR'] = tempfile.mkdtemp(prefix='icathi_pruebas_')
+os.environ['SHEETS_REFRESH_TTL'] = '0'
+os.environ['SHEETS_QUOTA_PER_MINUTE'] = '0'
+os.environ['SHEETS_BACKOFF_BASE'] = '0.01'
+os.environ['SHEETS_BACKOFF_MAX'] = '0.05'
+os.environ['REPORTS_WORKERS'] = '0'
+
+import pytest  # noqa: E402
+
+import fake_sheets  # noqa: E402
+
+import google_client  # noqa: E402
+import sheets  # noqa: E402
+import snapshot_cache  # noqa: E402
+from resiliencia import CircuitBreaker  # noqa: E402
+
+FILAS = 50
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Directorio de copias locales y coordinación vacío para cada prueba"""
+    directorio = str(tmp_path / 'cache')
+    monkeypatch.setattr(snapshot_cache, 'CACHE_DIR', directorio)
+    return directorio
+
+
+@pytest.fixture
+def circuito(monkeypatch):
+    """Circuit breaker nuevo (4 fallos, 0.5 s abierto) para que una prueba no herede el de otra"""
+    nuevo = CircuitBreaker(4, 0.5)
+    monkeypatch.setattr(google_client, 'circuito', nuevo)
+    return nuevo
+
+
+@pytest.fixture
+def hojas(cache_dir, circuito):
+    """
+    Hojas falsas de resultados y usuarios con FILAS filas, instaladas en
+    google_client, y el módulo sheets sin datos cargados
+
+    Returns:
+        tuple: (FakeWorksheet de resultados, FakeWorksheet de usuarios)
+    """
+    resultados, usuarios = fake_sheets.crear(FILAS)
+    fake_sheets.instalar(resultados, usuarios)
+    sheets.reiniciar()
+    yield resultados, usuarios
+    sheets.reiniciar()
+    google_client.reset()
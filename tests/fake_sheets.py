@@ -0,0 +1,232 @@
+"""
+Google Sheets falso, en memoria, para benchmarks y pruebas locales.
+
+Reproduce la parte de la API de gspread que usa la aplicación
+(get, batch_get, get_all_records, y la fecha de modificación de Drive)
+sobre filas sintéticas con los nombres de columna reales, con latencia
+opcional por llamada y errores de la API (429, 5xx) inyectables. instalar() lo
+conecta a google_client, de modo que sheets.py y AuthManager lo usan sin
+credenciales ni red.
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Los benchmarks no generan informes en segundo plano (salvo que se pida):
+# no compiten por la CPU con lo que se mide. Se fija antes de importar la app
+os.environ.setdefault('REPORTS_WORKERS', '0')
+
+import google_client  # noqa: E402
+
+COLUMNAS_RESULTADOS = [
+    'Fecha', 'Nombre', 'Dirección de correo electrónico', 'Edad', 'Genero', 'Escolaridad', 'Areas',
+    'A1', 'A2', 'A3', 'A4',
+    'Descripción_Aptitudes_intereses', 'Descripción_Inteligencias_Multiples', 'Descripción_Test_de_Kuder',
+]
+COLUMNAS_USUARIOS = ['Dirección de correo electrónico', 'Contraseña', 'Nombre completo']
+
+ESCOLARIDADES = ['Secundaria', 'Preparatoria', 'Licenciatura', 'Bachillerato técnico']
+AREAS = ['Ciencias exactas', 'Ciencias sociales', 'Humanidades', 'Artes', 'Ciencias de la salud']
+CARRERAS = [
+    'Ingeniería en sistemas\nDesarrollo de software', 'Medicina\nEnfermería', 'Derecho',
+    'Diseño gráfico\nAnimación digital', 'Contaduría\nAdministración', 'Electricidad\nMecatrónica',
+    'Psicología', 'Gastronomía\nTurismo',
+]
+DESCRIPCIONES = [
+    'Tienes facilidad para el razonamiento lógico. Disfrutas resolver problemas',
+    '• Inteligencia lógico-matemática\n• Inteligencia interpersonal',
+    'Prefieres actividades al aire libre. Te interesa el trabajo con personas. Eres creativo',
+    'Interés científico y de cálculo',
+    '• Inteligencia verbal/lingüística\n• Inteligencia musical/rítmica\n• Inteligencia intrapersonal',
+]
+
+
+def error_api(estado, retry_after=None):
+    """APIError de gspread como el que produce una respuesta HTTP `estado` de Google"""
+    from gspread.exceptions import APIError
+    from requests import Response
+    respuesta = Response()
+    respuesta.status_code = estado
+    respuesta._content = json.dumps({'error': {
+        'code': estado, 'message': f'Error simulado {estado}', 'status': 'SIMULADO'
+    }}).encode()
+    if retry_after is not None:
+        respuesta.headers['Retry-After'] = str(retry_after)
+    return APIError(respuesta)
+
+
+def email(i):
+    return f"usuario{i}@correo.com"
+
+
+def fila_resultado(i, semilla=0):
+    """Fila sintética de la hoja de resultados (valores como los devuelve la API: texto)"""
+    azar = random.Random(i * 7919 + semilla)
+    return [
+        time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(1_700_000_000 + i * 60)),
+        f"Usuario {i}",
+        email(i).capitalize(),
+        str(azar.randint(14, 40)),
+        azar.choice(['Masculino', 'Femenino']),
+        azar.choice(ESCOLARIDADES),
+        azar.choice(AREAS),
+        azar.choice(CARRERAS), azar.choice(CARRERAS), azar.choice(CARRERAS + ['']), azar.choice(CARRERAS + ['']),
+        azar.choice(DESCRIPCIONES), azar.choice(DESCRIPCIONES), azar.choice(DESCRIPCIONES),
+    ]
+
+
+def fila_usuario(i):
+    return [email(i), str(100000 + i), f"Usuario {i}"]
+
+
+def password(i):
+    return str(100000 + i)
+
+
+class FakeWorksheet:
+    """
+    Worksheet en memoria; cada llamada a la "API" espera `latencia` segundos.
+
+    Para simular fallos: `fallos` es una lista de códigos HTTP que se lanzan,
+    en orden, en las próximas llamadas; `tasa_error` es la probabilidad de
+    que cualquier otra llamada falle con `estado_error`.
+    """
+
+    def __init__(self, header, rows, latencia=0.0, title='Hoja 1'):
+        self.header = list(header)
+        self.rows = [list(fila) for fila in rows]
+        self.latencia = latencia
+        self.title = title
+        self.llamadas = 0
+        self.errores = 0
+        self.fallos = []
+        self.tasa_error = 0.0
+        self.estado_error = 503
+        self.spreadsheet = None
+        self._azar = random.Random(0)
+        self._lock = threading.Lock()
+
+    def _llamada(self):
+        with self._lock:
+            self.llamadas += 1
+            estado = self.fallos.pop(0) if self.fallos else None
+            if estado is None and self.tasa_error and self._azar.random() < self.tasa_error:
+                estado = self.estado_error
+            if estado is not None:
+                self.errores += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        if estado is not None:
+            raise error_api(estado)
+
+    def _valores(self):
+        return [list(self.header)] + [list(fila) for fila in self.rows]
+
+    def _rango(self, rango):
+        valores = self._valores()
+        fila_unica = re.fullmatch(r'(\d+):(\d+)', rango)
+        if fila_unica:
+            return valores[int(fila_unica.group(1)) - 1:int(fila_unica.group(2))]
+        m = re.fullmatch(r'[A-Z]+(\d+):[A-Z]+(\d*)', rango)
+        inicio = int(m.group(1))
+        fin = int(m.group(2)) if m.group(2) else None
+        return valores[inicio - 1:fin]
+
+    # --- API de gspread usada por la aplicación ---
+
+    @property
+    def row_count(self):
+        return len(self.rows) + 1
+
+    def get(self, range_name=None, pad_values=False, **kwargs):
+        self._llamada()
+        return self._rango(range_name) if range_name else self._valores()
+
+    def batch_get(self, ranges, **kwargs):
+        self._llamada()
+        return [self._rango(rango) for rango in ranges]
+
+    def get_all_records(self, **kwargs):
+        self._llamada()
+        return [dict(zip(self.header, fila)) for fila in self.rows]
+
+    # --- Utilidades para simular cambios en la hoja ---
+
+    def append_rows(self, filas):
+        self.rows.extend(list(fila) for fila in filas)
+        self._modificada()
+
+    def update_cell(self, fila, columna, valor):
+        """Edita una celda (fila y columna desde 1; la fila 1 es la cabecera)"""
+        if fila == 1:
+            self.header[columna - 1] = valor
+        else:
+            self.rows[fila - 2][columna - 1] = valor
+        self._modificada()
+
+    def _modificada(self):
+        if self.spreadsheet is not None:
+            self.spreadsheet.modificado += 1
+
+
+class FakeSpreadsheet:
+    """Archivo con sus hojas; `modificado` avanza con cada cambio (como modifiedTime en Drive)"""
+
+    def __init__(self, *hojas):
+        self.hojas = hojas
+        self.modificado = 0
+        self.consultas_drive = 0
+        for hoja in hojas:
+            hoja.spreadsheet = self
+
+    def get_lastUpdateTime(self):
+        self.consultas_drive += 1
+        return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(1_700_000_000 + self.modificado)) + '.000Z'
+
+    def get_worksheet(self, index):
+        return self.hojas[index]
+
+    def worksheet(self, nombre):
+        return next(hoja for hoja in self.hojas if hoja.title == nombre)
+
+
+class FakeClient:
+    """Como en producción, resultados y usuarios están en archivos distintos"""
+
+    def __init__(self, resultados, usuarios):
+        self.resultados = FakeSpreadsheet(resultados)
+        self.usuarios = FakeSpreadsheet(usuarios)
+
+    def open(self, nombre):
+        return self.resultados
+
+    def open_by_key(self, key):
+        return self.usuarios
+
+    def set_timeout(self, timeout):
+        pass
+
+
+def crear(n_resultados, n_usuarios=None, latencia=0.0):
+    """Crea hojas de resultados y usuarios con n filas sintéticas"""
+    n_usuarios = n_resultados if n_usuarios is None else n_usuarios
+    resultados = FakeWorksheet(
+        COLUMNAS_RESULTADOS, (fila_resultado(i) for i in range(n_resultados)), latencia
+    )
+    usuarios = FakeWorksheet(
+        COLUMNAS_USUARIOS, (fila_usuario(i) for i in range(n_usuarios)), latencia, title='Usuarios'
+    )
+    return resultados, usuarios
+
+
+def instalar(resultados, usuarios):
+    """Hace que google_client entregue las hojas falsas en lugar de conectarse a Google"""
+    google_client.reset()
+    google_client._credentials = object()
+    google_client._client = FakeClient(resultados, usuarios)
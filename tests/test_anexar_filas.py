@@ -0,0 +1,58 @@
+import pandas as pd
+
+import fake_sheets
+
+import sheets
+
+
+def registros(filas):
+    return pd.DataFrame([dict(zip(fake_sheets.COLUMNAS_RESULTADOS, fila)) for fila in filas])
+
+
+def anexar(total, nuevas):
+    """Snapshot de total filas más las filas nuevas, incremental y desde cero"""
+    anteriores = [fake_sheets.fila_resultado(i) for i in range(total)]
+    snapshot = sheets.anexar_filas(sheets.construir_snapshot(registros(anteriores)), registros(nuevas))
+    return snapshot, sheets.construir_snapshot(registros(anteriores + nuevas))
+
+
+def test_anexar_equivale_a_cargar_desde_cero():
+    corregida = fake_sheets.fila_resultado(3)
+    corregida[1] = 'Nombre corregido'
+    snapshot, completo = anexar(200, [corregida, fake_sheets.fila_resultado(200)])
+    assert snapshot.indice_email == completo.indice_email
+    assert snapshot.resultados == completo.resultados
+    assert snapshot.estadisticas == completo.estadisticas
+    assert snapshot.df.astype(object).equals(completo.df.astype(object))
+
+
+def test_anexar_actualiza_estadisticas_como_carga_completa():
+    # Reenvío más antiguo que el vigente (no cuenta), escolaridad y carrera
+    # nuevas, y la única fila de una escolaridad reemplazada por otra
+    antiguo = fake_sheets.fila_resultado(5)
+    antiguo[0], antiguo[5] = '01/01/2020 00:00:00', 'Posgrado'
+    unica = fake_sheets.fila_resultado(7)
+    unica[5], unica[7] = 'Doctorado', 'Astronomía'
+    reemplazo = fake_sheets.fila_resultado(300)
+    reemplazo[2] = unica[2]
+    snapshot, completo = anexar(100, [antiguo, unica])
+    assert snapshot.estadisticas == completo.estadisticas
+    assert ('Astronomía', 1) in dict(completo.estadisticas.carreras_por_escolaridad)['Doctorado']
+
+    filas = [fake_sheets.fila_resultado(i) for i in range(100)] + [antiguo, unica]
+    siguiente = sheets.anexar_filas(snapshot, registros([reemplazo]))
+    completo = sheets.construir_snapshot(registros(filas + [reemplazo]))
+    assert siguiente.estadisticas == completo.estadisticas
+    assert 'Doctorado' not in dict(siguiente.estadisticas.carreras_por_escolaridad)
+    assert siguiente.estadisticas.total_usuarios == 100
+
+
+def test_anexar_conserva_categoricas_y_agrega_textos_nuevos():
+    nueva = dict(zip(fake_sheets.COLUMNAS_RESULTADOS, fake_sheets.fila_resultado(200)))
+    nueva['Genero'] = 'No binario'
+    snapshot, _ = anexar(200, [list(nueva.values())])
+    genero = snapshot.df['Genero']
+    assert isinstance(genero.dtype, pd.CategoricalDtype)
+    assert genero.iloc[-1] == 'No binario'
+    assert list(snapshot.df.index) == list(range(201))
+    assert snapshot.resultados[fake_sheets.email(200)].genero == 'No binario'
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+import fake_sheets
+
+import app as aplicacion
+import auth
+import sheets
+
+
+@pytest.fixture
+def carga_lenta(hojas, monkeypatch):
+    """La primera carga tarda más que la espera inicial: la app empieza a responder sin datos"""
+    for hoja in hojas:
+        hoja.latencia = 0.5
+    monkeypatch.setattr(sheets, 'INICIO_ESPERA', 0.05)
+    monkeypatch.setattr(auth, 'INITIAL_LOAD_WAIT', 0.05)
+    monkeypatch.setattr(aplicacion, '_auth_manager', None)
+    return hojas
+
+
+def esperar_carga(limite=10):
+    fin = time.monotonic() + limite
+    while not (aplicacion.get_auth_manager().loaded and sheets.datos_cargados()):
+        assert time.monotonic() < fin, 'la carga inicial no terminó'
+        time.sleep(0.05)
+
+
+def test_login_durante_la_carga_inicial_responde_503(carga_lenta):
+    cliente = aplicacion.app.test_client()
+    credenciales = {'email': fake_sheets.email(1), 'password': fake_sheets.password(1)}
+
+    respuesta = cliente.post('/login', data=credenciales)
+    assert respuesta.status_code == 503
+    assert respuesta.headers['Retry-After'] == str(aplicacion.REINTENTO_CARGA)
+    assert 'incorrectos' not in respuesta.get_data(as_text=True)
+
+    esperar_carga()
+    respuesta = cliente.post('/login', data=credenciales)
+    assert respuesta.status_code == 302 and respuesta.location.endswith('/dashboard')
+
+
+def test_dashboard_durante_la_carga_inicial_responde_503(carga_lenta):
+    cliente = aplicacion.app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['user_email'] = fake_sheets.email(1)
+
+    respuesta = cliente.get('/dashboard')
+    assert respuesta.status_code == 503
+    assert 'Retry-After' in respuesta.headers
+    assert 'Sin resultados' not in respuesta.get_data(as_text=True)
+
+    esperar_carga()
+    respuesta = cliente.get('/dashboard')
+    assert respuesta.status_code == 200
+    assert 'Usuario 1' in respuesta.get_data(as_text=True)
@@ -0,0 +1,36 @@
+from datetime import timezone
+
+import pytest
+
+import fake_sheets
+
+import app as aplicacion
+import sheets
+
+
+@pytest.fixture
+def cliente(hojas):
+    sheets.refrescar_datos(esperar=True)
+    cliente = aplicacion.app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['user_email'] = fake_sheets.email(1)
+        sesion['user_name'] = 'Usuario 1'
+    return cliente
+
+
+def test_last_modified_en_utc(cliente):
+    respuesta = cliente.get('/dashboard')
+    _, version = sheets.obtener_resultados_con_version(fake_sheets.email(1))
+    assert respuesta.status_code == 200
+    assert respuesta.last_modified == version.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def test_etag_cambia_con_las_plantillas(cliente, monkeypatch):
+    etag = cliente.get('/dashboard').headers['ETag']
+    assert cliente.get('/dashboard', headers={'If-None-Match': etag}).status_code == 304
+
+    # Un despliegue que cambia plantillas o estáticos invalida las copias del navegador
+    monkeypatch.setattr(aplicacion, '_huella_dashboard', 'otro-despliegue')
+    respuesta = cliente.get('/dashboard', headers={'If-None-Match': etag})
+    assert respuesta.status_code == 200
+    assert respuesta.headers['ETag'] != etag
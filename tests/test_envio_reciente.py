@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import fake_sheets
+
+import coordinacion
+import sheets
+import snapshot_cache
+
+
+def llamadas(hoja):
+    return hoja.llamadas + hoja.spreadsheet.consultas_drive
+
+
+@pytest.fixture
+def cargadas(hojas):
+    """Hojas falsas con el snapshot ya cargado"""
+    sheets.refrescar_datos(esperar=True)
+    sheets.inicializar()
+    return hojas
+
+
+def test_envio_reciente_trae_solo_filas_nuevas(cargadas):
+    resultados, _ = cargadas
+    nuevo = len(resultados.rows)
+    resultados.append_rows([fake_sheets.fila_resultado(nuevo)])
+
+    antes = llamadas(resultados)
+    assert sheets.obtener_resultados_completos(fake_sheets.email(nuevo)) is not None
+    # Fecha de modificación en Drive + filas nuevas
+    assert llamadas(resultados) - antes == 2
+    assert sheets.buscar_usuario_por_email(fake_sheets.email(nuevo)) is not None
+
+
+def test_email_inexistente_no_se_busca_dos_veces(cargadas):
+    resultados, _ = cargadas
+    antes = llamadas(resultados)
+    assert sheets.obtener_resultados_completos('nadie@correo.com') is None
+    assert sheets.obtener_resultados_completos('nadie@correo.com') is None
+    assert llamadas(resultados) - antes == 1
+
+
+def test_busqueda_no_espera_a_guardar_la_copia_local(cargadas, monkeypatch):
+    resultados, _ = cargadas
+    guardar = sheets.guardar_snapshot_local
+
+    def guardar_lento(snapshot):
+        time.sleep(1)
+        guardar(snapshot)
+
+    monkeypatch.setattr(sheets, 'guardar_snapshot_local', guardar_lento)
+    nuevo = len(resultados.rows)
+    resultados.append_rows([fake_sheets.fila_resultado(nuevo)])
+
+    inicio = time.monotonic()
+    assert sheets.obtener_resultados_completos(fake_sheets.email(nuevo)) is not None
+    assert time.monotonic() - inicio < 0.5
+
+    # La recarga anterior sigue guardando la copia local, pero sus datos ya
+    # se publicaron: un envío posterior necesita una recarga nueva
+    resultados.append_rows([fake_sheets.fila_resultado(nuevo + 1)])
+    assert sheets.obtener_resultados_completos(fake_sheets.email(nuevo + 1)) is not None
+
+
+@pytest.fixture
+def otro_lider(cargadas, monkeypatch):
+    """Otro worker tiene el liderazgo de la descarga de resultados"""
+    monkeypatch.setattr(sheets, 'BUSQUEDA_ESPERA', 0.5)
+    conexion = coordinacion._conectar()
+    try:
+        conexion.execute(
+            'INSERT INTO lideres (nombre, pid, expira) VALUES (?, ?, ?)',
+            (sheets.SNAPSHOT_LOCAL, os.getpid() + 1, time.time() + 60)
+        )
+    finally:
+        conexion.close()
+    return cargadas
+
+
+def test_sin_liderazgo_no_recuerda_el_email_como_ausente(otro_lider):
+    resultados, _ = otro_lider
+    nuevo = len(resultados.rows)
+    resultados.append_rows([fake_sheets.fila_resultado(nuevo)])
+
+    assert sheets.obtener_resultados_completos(fake_sheets.email(nuevo)) is None
+    assert not sheets._ausente_reciente(fake_sheets.email(nuevo))
+
+
+def test_sin_liderazgo_espera_la_generacion_del_lider(otro_lider):
+    resultados, _ = otro_lider
+    nuevo = len(resultados.rows)
+    fila = fake_sheets.fila_resultado(nuevo)
+    resultados.append_rows([fila])
+
+    def publicar():
+        # Lo que hace el líder al terminar: guarda su copia y sube la generación
+        time.sleep(0.1)
+        snapshot = sheets.anexar_filas(
+            sheets._snapshot, pd.DataFrame([dict(zip(fake_sheets.COLUMNAS_RESULTADOS, fila))])
+        )
+        datos = snapshot._asdict()
+        del datos['cargado_en']
+        snapshot_cache.guardar(sheets.SNAPSHOT_LOCAL, {'snapshot': datos, 'sync': sheets._sync.get_state()})
+        coordinacion.incrementar_generacion(sheets.SNAPSHOT_LOCAL)
+
+    lider = threading.Thread(target=publicar)
+    lider.start()
+    assert sheets.obtener_resultados_completos(fake_sheets.email(nuevo)) is not None
+    lider.join()
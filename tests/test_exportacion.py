@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import fake_sheets
+
+import exportacion
+import sheets
+from sheets import ResultadoUsuario
+
+
+def resultado(**campos):
+    base = dict(
+        fecha='01/02/2025 10:00:00', nombre='Ana', email='ana@correo.com', edad='17', genero='Femenino',
+        escolaridad='Preparatoria', areas='Artes', aptitudes=('Creativa',), inteligencias=('Musical',),
+        kuder=('Artística',), carreras=('Diseño gráfico',)
+    )
+    base.update(campos)
+    return ResultadoUsuario(**base)
+
+
+def filas_csv(resultados):
+    texto = ''.join(exportacion.a_csv(resultados)).lstrip('﻿')
+    return list(csv.DictReader(io.StringIO(texto)))
+
+
+@pytest.mark.parametrize('peligroso', [
+    '=HYPERLINK("http://ejemplo.com","clic")', '+1+1', '-2+3', '@SUM(A1:A2)', '\t=1+1', '\r=1+1',
+])
+def test_csv_neutraliza_formulas(peligroso):
+    fila, = filas_csv([resultado(nombre=peligroso, carreras=(peligroso,))])
+    assert fila['nombre'] == "'" + peligroso
+    # Los elementos de las listas se recortan antes de unirse
+    assert fila['carreras'] == "'" + peligroso.strip()
+
+
+def test_csv_conserva_textos_normales():
+    fila, = filas_csv([resultado(nombre='María José', carreras=('Medicina', 'Enfermería'))])
+    assert fila['nombre'] == 'María José'
+    assert fila['carreras'] == 'Medicina | Enfermería'
+    assert fila['edad'] == '17'
+
+
+def test_jsonl_no_modifica_valores():
+    linea = ''.join(exportacion.a_jsonl([resultado(nombre='=1+1')]))
+    assert json.loads(linea)['nombre'] == '=1+1'
+
+
+def test_parsear_fechas_acepta_formatos_editados_a_mano():
+    fechas = sheets.parsear_fechas(pd.Series(['14/11/2023 22:13:20', '15/11/2023', 'no es fecha', None]))
+    assert list(fechas[:2]) == [pd.Timestamp(2023, 11, 14, 22, 13, 20), pd.Timestamp(2023, 11, 15)]
+    assert fechas[2:].isna().all()
+
+
+def test_filtrar_por_fecha(hojas):
+    resultados, _ = hojas
+    # Una fila editada a mano con otro formato también se filtra
+    resultados.rows[3][0] = '2/1/2030'
+    sheets.refrescar_datos(esperar=True)
+    fechas = sheets.parsear_fechas(pd.Series([fila[0] for fila in resultados.rows]))
+    desde, hasta = fechas[10], fechas[20]
+
+    emails = [r.email for r in sheets.filtrar_resultados(desde=desde, hasta=hasta)]
+    assert emails == [fake_sheets.email(i).capitalize() for i in range(10, 20)]
+    assert [r.email for r in sheets.filtrar_resultados(desde=datetime(2030, 1, 1))] == [fake_sheets.email(3).capitalize()]
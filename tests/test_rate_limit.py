@@ -0,0 +1,90 @@
+import time
+
+import pytest
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import fake_sheets
+
+import app as aplicacion
+from rate_limit import MemoryBackend, RateLimiter, SQLiteBackend
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteBackend(str(tmp_path / 'limites.sqlite3'))
+    return MemoryBackend()
+
+
+def test_cubeta_se_agota_y_devuelve_tokens(backend):
+    # Un intento por minuto: durante la prueba la cubeta prácticamente no se recarga
+    limite = RateLimiter(per_minute=1, capacity=3, backend=backend)
+    assert [limite.hit('a')[0] for _ in range(4)] == [True, True, True, False]
+    assert limite.hit('b')[0]
+
+    limite.refund('a')
+    assert limite.hit('a')[0]
+    assert not limite.hit('a')[0]
+
+
+def test_devolver_no_supera_la_capacidad(backend):
+    limite = RateLimiter(per_minute=1, capacity=2, backend=backend)
+    for _ in range(5):
+        limite.refund('a')
+    assert [limite.hit('a')[0] for _ in range(3)] == [True, True, False]
+
+
+@pytest.fixture
+def login(hojas, monkeypatch):
+    """Cliente de la app con usuarios cargados y límites de 3 intentos por IP y por email"""
+    monkeypatch.setattr(aplicacion, '_auth_manager', None)
+    monkeypatch.setattr(aplicacion, 'login_por_ip', RateLimiter(per_minute=1, capacity=3, prefix='ip:'))
+    monkeypatch.setattr(aplicacion, 'login_por_email', RateLimiter(per_minute=1, capacity=3, prefix='email:'))
+    fin = time.monotonic() + 10
+    while not aplicacion.get_auth_manager().loaded:
+        assert time.monotonic() < fin, 'los usuarios no se cargaron'
+        time.sleep(0.05)
+    cliente = aplicacion.app.test_client()
+
+    def intentar(i, password=None):
+        return cliente.post('/login', data={
+            'email': fake_sheets.email(i), 'password': password or fake_sheets.password(i)
+        }).status_code
+
+    return intentar
+
+
+def test_logins_correctos_no_agotan_el_limite(login):
+    assert [login(i % 2) for i in range(10)] == [302] * 10
+
+
+def test_logins_fallidos_agotan_el_limite(login):
+    assert [login(1, 'incorrecta') for _ in range(3)] == [200] * 3
+    assert login(1, 'incorrecta') == 429
+    # El límite por IP también quedó agotado: ni un login correcto pasa
+    assert login(2) == 429
+
+
+def test_en_render_se_confia_en_su_balanceador(monkeypatch):
+    monkeypatch.delenv('PROXY_COUNT', raising=False)
+    monkeypatch.delenv('RENDER', raising=False)
+    assert aplicacion.contar_proxies() == 0
+    monkeypatch.setenv('RENDER', 'true')
+    assert aplicacion.contar_proxies() == 1
+    monkeypatch.setenv('PROXY_COUNT', '2')
+    assert aplicacion.contar_proxies() == 2
+
+
+def test_clientes_tras_el_proxy_tienen_limites_separados(login, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'PROXY_COUNT', 1)
+    monkeypatch.setattr(aplicacion.app, 'wsgi_app', ProxyFix(aplicacion.app.wsgi_app, x_for=1))
+    cliente = aplicacion.app.test_client()
+
+    def intentar(ip):
+        return cliente.post('/login', data={'email': fake_sheets.email(1), 'password': 'incorrecta'},
+                            headers={'X-Forwarded-For': ip}).status_code
+
+    # Agota el límite por IP de un cliente sin llegar al de su email
+    monkeypatch.setattr(aplicacion, 'login_por_email', RateLimiter(per_minute=1, capacity=10, prefix='email:'))
+    assert [intentar('203.0.113.1') for _ in range(4)] == [200, 200, 200, 429]
+    assert intentar('203.0.113.2') == 200
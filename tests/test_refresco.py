@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+import fake_sheets
+
+import auth
+import coordinacion
+import sheets
+
+
+def consultas_drive(hojas):
+    return sum(hoja.spreadsheet.consultas_drive for hoja in hojas)
+
+
+def lecturas(hojas):
+    return sum(hoja.llamadas for hoja in hojas)
+
+
+@pytest.fixture
+def cargadas(hojas, monkeypatch):
+    """Resultados y usuarios cargados; cada revalidación de usuarios consulta Drive"""
+    monkeypatch.setattr(auth, 'VERIFIED_TTL', 0)
+    sheets.refrescar_datos(esperar=True)
+    return hojas, auth.AuthManager()
+
+
+def test_refresco_sin_cambios_no_reconstruye(cargadas):
+    hojas, usuarios = cargadas
+    version = sheets.obtener_resultados_con_version(fake_sheets.email(1))[1]
+    verificado = sheets.obtener_ultima_actualizacion()
+    generacion = coordinacion.obtener_generacion(sheets.SNAPSHOT_LOCAL)
+    antes_lecturas, antes_consultas = lecturas(hojas), consultas_drive(hojas)
+
+    for _ in range(3):
+        sheets.solicitar_refresco(forzar=True).join()
+        assert usuarios.revalidate() is False
+    assert usuarios.load_users() is False
+
+    # Solo se consulta la fecha de modificación en Drive: una vez por refresco
+    assert lecturas(hojas) == antes_lecturas
+    assert consultas_drive(hojas) - antes_consultas == 7
+    # La versión (y las cachés de dashboards que dependen de ella) no cambia
+    assert sheets.obtener_resultados_con_version(fake_sheets.email(1))[1] == version
+    assert coordinacion.obtener_generacion(sheets.SNAPSHOT_LOCAL) == generacion
+    assert sheets.obtener_ultima_actualizacion() > verificado
+    assert usuarios.last_checked is not None
+
+
+def test_refresco_con_fila_nueva_publica_generacion(cargadas):
+    (resultados, _), _ = cargadas
+    version = sheets.obtener_resultados_con_version(fake_sheets.email(1))[1]
+    generacion = coordinacion.obtener_generacion(sheets.SNAPSHOT_LOCAL)
+    nuevo = len(resultados.rows)
+    resultados.append_rows([fake_sheets.fila_resultado(nuevo)])
+
+    sheets.solicitar_refresco(forzar=True).join()
+    assert sheets.buscar_usuario_por_email(fake_sheets.email(nuevo)) is not None
+    assert sheets.obtener_resultados_con_version(fake_sheets.email(1))[1] != version
+    assert coordinacion.obtener_generacion(sheets.SNAPSHOT_LOCAL) == generacion + 1
+
+
+def test_refresh_users_devuelve_bool(cargadas):
+    (_, hoja_usuarios), usuarios = cargadas
+    assert usuarios.refresh_users() is True
+    hoja_usuarios.append_rows([fake_sheets.fila_usuario(len(hoja_usuarios.rows))])
+    assert usuarios.revalidate() is True
+    assert usuarios.revalidate() is False
+
+
+def test_seguidor_adopta_la_verificacion_del_lider(cargadas, monkeypatch):
+    hojas, _ = cargadas
+    monkeypatch.setattr(sheets, 'REFRESH_TTL', 60)
+    # Snapshot vencido en este worker; otro worker (el líder) acaba de verificar
+    sheets._snapshot = sheets._snapshot._replace(cargado_en=time.monotonic() - 120)
+    coordinacion.registrar_verificacion(sheets.SNAPSHOT_LOCAL)
+    antes = consultas_drive(hojas)
+
+    sheets.revalidar()
+    assert consultas_drive(hojas) == antes
+    assert not sheets.vencido(sheets._snapshot)
+
+    # Sin verificación reciente sí se consulta Drive
+    sheets._snapshot = sheets._snapshot._replace(cargado_en=time.monotonic() - 120)
+    monkeypatch.setattr(sheets, 'REFRESH_TTL', 0.01)
+    time.sleep(0.02)
+    sheets.revalidar()
+    assert consultas_drive(hojas) == antes + 1
+
+
+def test_seguidor_de_usuarios_no_consulta_drive(cargadas, monkeypatch):
+    hojas, lider = cargadas
+    monkeypatch.setattr(auth, 'VERIFIED_TTL', 60)
+    assert lider.revalidate(force=True) is True
+
+    # Un worker que arranca desde la copia local no repite la consulta del líder
+    antes = consultas_drive(hojas)
+    seguidor = auth.AuthManager()
+    time.sleep(0.1)
+    assert seguidor.loaded and seguidor.last_checked is not None
+    assert seguidor.revalidate() is False
+    assert consultas_drive(hojas) == antes
+
+
+def test_refrescos_de_usuarios_se_agrupan(cargadas, monkeypatch):
+    _, usuarios = cargadas
+    liberar = threading.Event()
+    recargas = []
+
+    def refresh_users():
+        recargas.append(threading.current_thread())
+        liberar.wait(5)
+        return True
+
+    monkeypatch.setattr(usuarios, 'refresh_users', refresh_users)
+    en_curso = usuarios.request_refresh()
+    while not recargas:
+        time.sleep(0.01)
+    # Con una recarga en curso, los clics siguientes comparten una sola pendiente
+    pendientes = {usuarios.request_refresh() for _ in range(5)}
+    assert len(pendientes) == 1 and en_curso not in pendientes
+
+    liberar.set()
+    for hilo in pendientes | {en_curso}:
+        hilo.join()
+    assert len(recargas) == 2
@@ -0,0 +1,109 @@
+import gzip
+import os
+import stat
+import time
+
+import pandas as pd
+import pytest
+
+import fake_sheets
+
+import reportes
+import sheets
+
+FILAS = 30
+
+
+def registros(filas):
+    return pd.DataFrame([dict(zip(fake_sheets.COLUMNAS_RESULTADOS, fila)) for fila in filas])
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """Directorio de informes vacío y sin huellas recordadas"""
+    destino = str(tmp_path / 'reportes')
+    monkeypatch.setattr(reportes, 'DIRECTORIO', destino)
+    monkeypatch.setattr(reportes, '_huellas', {})
+    return destino
+
+
+@pytest.fixture
+def snapshot():
+    return sheets.construir_snapshot(registros(fake_sheets.fila_resultado(i) for i in range(FILAS)))
+
+
+def corregir(snapshot, nombre):
+    """Snapshot con la fila 1 corregida y una fila nueva"""
+    corregida = fake_sheets.fila_resultado(1)
+    corregida[1] = nombre
+    return sheets.anexar_filas(snapshot, registros([corregida, fake_sheets.fila_resultado(FILAS)]))
+
+
+def envejecer(hash_informe, segundos):
+    instante = time.time() - segundos
+    os.utime(reportes.ruta(hash_informe), (instante, instante))
+
+
+def test_genera_todos_y_despues_solo_los_que_cambian(directorio, snapshot, monkeypatch):
+    monkeypatch.setattr(reportes, 'MINIMO_POOL', 10 ** 9)
+    assert reportes.generar(snapshot.resultados) == FILAS
+    assert reportes._listar() == {reportes.huella(r) for r in snapshot.resultados.values()}
+    assert reportes.generar(snapshot.resultados) == 0
+
+    assert reportes.generar(corregir(snapshot, 'Nombre corregido').resultados) == 2
+
+
+def test_pool_de_procesos_genera_los_informes(directorio, snapshot, monkeypatch):
+    monkeypatch.setattr(reportes, 'MINIMO_POOL', 1)
+    monkeypatch.setattr(reportes, 'LOTE', 10)
+    assert reportes.generar(snapshot.resultados, trabajadores=2) == FILAS
+    assert len(reportes._listar()) == FILAS
+
+
+def test_informes_obsoletos_se_borran_solo_pasada_la_edad_maxima(directorio, snapshot, monkeypatch):
+    monkeypatch.setattr(reportes, 'MINIMO_POOL', 10 ** 9)
+    reportes.generar(snapshot.resultados)
+    anterior = reportes.huella(snapshot.resultados[fake_sheets.email(1)])
+    corregido = corregir(snapshot, 'Nombre corregido')
+
+    # Otro worker que aún no cargó la corrección puede seguir sirviéndolo
+    reportes.generar(corregido.resultados)
+    assert os.path.exists(reportes.ruta(anterior))
+
+    envejecer(anterior, reportes.EDAD_MAXIMA + 1)
+    reportes.generar(corregido.resultados)
+    assert not os.path.exists(reportes.ruta(anterior))
+    assert len(reportes._listar()) == len(corregido.resultados)
+
+
+def test_worker_atrasado_no_borra_informes_recientes(directorio, snapshot, monkeypatch):
+    monkeypatch.setattr(reportes, 'MINIMO_POOL', 10 ** 9)
+    corregido = corregir(snapshot, 'Nombre corregido')
+    reportes.generar(corregido.resultados)
+    nuevo = reportes.huella(corregido.resultados[fake_sheets.email(1)])
+
+    # Un worker con el snapshot anterior genera y purga con sus propios resultados
+    reportes._huellas = {}
+    reportes.generar(snapshot.resultados)
+    assert os.path.exists(reportes.ruta(nuevo))
+
+
+def test_obtener_sirve_el_informe_generado(directorio, snapshot, monkeypatch):
+    monkeypatch.setattr(reportes, 'MINIMO_POOL', 10 ** 9)
+    corregido = corregir(snapshot, 'Nombre corregido')
+    reportes.generar(corregido.resultados)
+
+    contenido, hash_informe = reportes.obtener(corregido.resultados[fake_sheets.email(1)])
+    assert 'Nombre corregido' in gzip.decompress(contenido).decode('utf-8')
+    assert os.path.exists(reportes.ruta(hash_informe))
+
+
+def test_informes_solo_legibles_por_el_propietario(directorio, snapshot, monkeypatch):
+    monkeypatch.setattr(reportes, 'MINIMO_POOL', 10 ** 9)
+    reportes.generar(snapshot.resultados)
+
+    hash_informe = reportes.huella(next(iter(snapshot.resultados.values())))
+    destino = reportes.ruta(hash_informe)
+    assert stat.S_IMODE(os.stat(destino).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(destino)).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(directorio).st_mode) == 0o700
@@ -0,0 +1,65 @@
+import time
+
+import fake_sheets
+
+import google_client
+import sheets
+from resiliencia import QuotaTracker
+
+
+def llamadas(hoja):
+    return hoja.llamadas + hoja.spreadsheet.consultas_drive
+
+
+def recargar():
+    sheets.solicitar_refresco(forzar=True).join()
+
+
+def test_errores_transitorios_se_superan_con_reintentos(hojas):
+    resultados, _ = hojas
+    resultados.fallos = [429, 503]
+    assert sheets.refrescar_datos(esperar=True)
+    assert resultados.errores == 2
+    assert sheets.obtener_resultados_completos(fake_sheets.email(7)) is not None
+    assert not google_client.circuito_abierto()
+
+
+def test_api_caida_sirve_el_snapshot_anterior(hojas):
+    resultados, _ = hojas
+    sheets.refrescar_datos(esperar=True)
+    resultados.tasa_error = 1.0
+    resultados.append_rows([fake_sheets.fila_resultado(len(resultados.rows))])
+
+    recargar()
+    assert google_client.circuito_abierto()
+
+    # Con el circuito abierto no se llama a la API, ni al recargar ni ante un email desconocido
+    antes = llamadas(resultados)
+    recargar()
+    assert sheets.obtener_resultados_completos(fake_sheets.email(7)) is not None
+    assert sheets.obtener_resultados_completos('nadie@correo.com') is None
+    assert llamadas(resultados) == antes
+
+
+def test_al_recuperarse_la_api_se_cierra_el_circuito(hojas, circuito):
+    resultados, _ = hojas
+    sheets.refrescar_datos(esperar=True)
+    resultados.tasa_error = 1.0
+    nuevo = len(resultados.rows)
+    resultados.append_rows([fake_sheets.fila_resultado(nuevo)])
+    recargar()
+    assert google_client.circuito_abierto()
+
+    resultados.tasa_error = 0.0
+    time.sleep(circuito.retry_in() + 0.05)
+    recargar()
+    assert not google_client.circuito_abierto()
+    assert sheets.buscar_usuario_por_email(fake_sheets.email(nuevo)) is not None
+
+
+def test_cuota_demora_las_llamadas_que_la_exceden():
+    cuota = QuotaTracker(per_minute=5, window=1.0)
+    esperas = [cuota.reserve() for _ in range(12)]
+    assert esperas[:5] == [0.0] * 5
+    assert 0.9 < esperas[5] <= 1.0
+    assert 1.9 < esperas[10] <= 2.0
@@ -0,0 +1,125 @@
+import pytest
+
+import fake_sheets
+
+import sheets
+from sheet_sync import SheetSync
+
+
+@pytest.fixture
+def hoja(circuito):
+    """Hoja de resultados de 10 filas dentro de su propio archivo de Drive"""
+    hoja = fake_sheets.FakeWorksheet(
+        fake_sheets.COLUMNAS_RESULTADOS, (fake_sheets.fila_resultado(i) for i in range(10))
+    )
+    fake_sheets.FakeSpreadsheet(hoja)
+    return hoja
+
+
+def emails(registros):
+    return [registro['Dirección de correo electrónico'] for registro in registros]
+
+
+@pytest.mark.parametrize('sondeo', [True, False])
+def test_anexado_descarga_solo_filas_nuevas(hoja, sondeo):
+    sync = SheetSync(drive_probe=sondeo)
+    registros, completa = sync.fetch(hoja)
+    assert completa and len(registros) == 10
+
+    hoja.append_rows([fake_sheets.fila_resultado(10), fake_sheets.fila_resultado(11)])
+    registros, completa = sync.fetch(hoja)
+    assert not completa
+    assert emails(registros) == [fake_sheets.email(10).capitalize(), fake_sheets.email(11).capitalize()]
+
+    registros, completa = sync.fetch(hoja)
+    assert (registros, completa) == ([], False)
+
+
+def test_sin_cambios_en_drive_no_lee_la_hoja(hoja):
+    sync = SheetSync()
+    sync.fetch(hoja)
+    llamadas = hoja.llamadas
+    assert sync.fetch(hoja) == ([], False)
+    assert hoja.llamadas == llamadas
+
+
+def test_edicion_de_fila_anterior_recarga_completa(hoja):
+    sync = SheetSync()
+    sync.fetch(hoja)
+    hoja.update_cell(5, 2, 'Nombre editado')
+    registros, completa = sync.fetch(hoja)
+    assert completa and len(registros) == 10
+    assert registros[3]['Nombre'] == 'Nombre editado'
+
+
+@pytest.mark.parametrize('sondeo', [True, False])
+def test_edicion_de_la_ultima_fila_recarga_completa(hoja, sondeo):
+    sync = SheetSync(drive_probe=sondeo)
+    sync.fetch(hoja)
+    hoja.update_cell(11, 2, 'Nombre editado')
+    registros, completa = sync.fetch(hoja)
+    assert completa and registros[-1]['Nombre'] == 'Nombre editado'
+
+
+@pytest.mark.parametrize('sondeo', [True, False])
+def test_cambio_de_cabecera_recarga_completa(hoja, sondeo):
+    sync = SheetSync(drive_probe=sondeo)
+    sync.fetch(hoja)
+    hoja.update_cell(1, 2, 'Nombre completo')
+    registros, completa = sync.fetch(hoja)
+    assert completa and len(registros) == 10
+    assert 'Nombre completo' in registros[0] and 'Nombre' not in registros[0]
+
+
+def test_filas_borradas_recarga_completa(hoja):
+    sync = SheetSync(drive_probe=False)
+    sync.fetch(hoja)
+    del hoja.rows[-3:]
+    registros, completa = sync.fetch(hoja)
+    assert completa and len(registros) == 7
+
+
+def test_completa_descarga_toda_la_hoja(hoja):
+    sync = SheetSync()
+    sync.fetch(hoja)
+    registros, completa = sync.fetch(hoja, completa=True)
+    assert completa and len(registros) == 10
+
+
+def test_estado_guardado_detecta_ediciones_tras_reiniciar(hoja):
+    sync = SheetSync()
+    sync.fetch(hoja)
+    estado = sync.get_state()
+    hoja.update_cell(3, 2, 'Nombre editado')
+
+    reiniciado = SheetSync()
+    reiniciado.set_state(estado)
+    registros, completa = reiniciado.fetch(hoja)
+    assert completa and registros[1]['Nombre'] == 'Nombre editado'
+
+
+def test_refresco_sirve_filas_editadas(hojas):
+    resultados, _ = hojas
+    sheets.refrescar_datos(esperar=True)
+    resultados.update_cell(5, 2, 'Nombre editado')
+
+    # Refresco periódico (incremental)
+    sheets.solicitar_refresco(forzar=True).join()
+    assert sheets.obtener_resultados_completos(fake_sheets.email(3)).nombre == 'Nombre editado'
+
+    # /refresh (recarga completa)
+    resultados.update_cell(5, 2, 'Otro nombre')
+    resultados.append_rows([fake_sheets.fila_resultado(len(resultados.rows))])
+    sheets.refrescar_datos(esperar=True)
+    assert sheets.obtener_resultados_completos(fake_sheets.email(3)).nombre == 'Otro nombre'
+
+
+def test_copia_local_detecta_ediciones_tras_reiniciar(hojas):
+    resultados, _ = hojas
+    sheets.refrescar_datos(esperar=True)
+    resultados.update_cell(5, 2, 'Nombre editado')
+
+    sheets.reiniciar()
+    assert sheets.cargar_snapshot_local()
+    sheets.solicitar_refresco(forzar=True).join()
+    assert sheets.obtener_resultados_completos(fake_sheets.email(3)).nombre == 'Nombre editado'
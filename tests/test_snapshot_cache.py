@@ -0,0 +1,50 @@
+import os
+import stat
+
+import coordinacion
+import reportes
+import snapshot_cache
+from rate_limit import SQLiteBackend
+
+
+def test_copia_local_solo_legible_por_el_propietario(cache_dir):
+    assert snapshot_cache.guardar('usuarios', {'password': 'secreta'})
+    ruta = os.path.join(cache_dir, 'usuarios.pkl')
+    assert stat.S_IMODE(os.stat(ruta).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+    assert snapshot_cache.cargar('usuarios') == {'password': 'secreta'}
+
+
+def test_sobrescribir_conserva_permisos(cache_dir):
+    snapshot_cache.guardar('usuarios', 1)
+    os.chmod(os.path.join(cache_dir, 'usuarios.pkl'), 0o644)
+    snapshot_cache.guardar('usuarios', 2)
+    assert stat.S_IMODE(os.stat(os.path.join(cache_dir, 'usuarios.pkl')).st_mode) == 0o600
+    assert snapshot_cache.cargar('usuarios') == 2
+
+
+def permisos(ruta):
+    return stat.S_IMODE(os.stat(ruta).st_mode)
+
+
+def test_coordinacion_crea_el_directorio_privado(cache_dir):
+    # Al arrancar, lo primero que toca el directorio es la lectura de la generación
+    coordinacion.obtener_generacion('resultados')
+    assert permisos(cache_dir) == 0o700
+
+
+def test_directorio_existente_se_restringe(cache_dir):
+    os.makedirs(cache_dir, mode=0o755)
+    os.chmod(cache_dir, 0o755)
+    snapshot_cache.guardar('usuarios', 1)
+    assert permisos(cache_dir) == 0o700
+
+
+def test_limites_e_informes_en_directorios_privados(cache_dir, monkeypatch):
+    limites = SQLiteBackend(os.path.join(cache_dir, 'limites', 'limites.sqlite3'))
+    limites.take('a', 1.0, 1)
+    assert permisos(cache_dir) == permisos(os.path.join(cache_dir, 'limites')) == 0o700
+
+    directorio = os.path.join(cache_dir, 'reportes')
+    reportes._guardar(directorio, 'ab' * 32, b'informe')
+    assert permisos(directorio) == permisos(os.path.dirname(reportes.ruta('ab' * 32, directorio))) == 0o700